@@ -2,20 +2,44 @@ import json
 import math
 import os
 import logging
+import shutil
+import tempfile
 import uuid
-from typing import Dict, List
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 
 import cv2
+import numpy as np
+from billiard import Pool
 from celery import Celery
-from pdf2image import convert_from_path, pdfinfo_from_path
+from pdf2image import convert_from_path
 from PIL import Image
 
 from app.bank_profiles import detect_bank_profile, extract_account_identity, find_value_bounds, reload_profiles
-from app.image_cleaner import clean_page
+from app.image_cleaner import CLEAN_WORKERS, clean_page_with_skew, cleaned_png_params
+from app.layout_store import write_layout_page
 from app.ocr_engine import ocr_image
-from app.pdf_text_extract import extract_pdf_layout_pages
+from app.ocr_server import ocr_server_enabled
+from app.ocr_result import OcrPage, write_ocr_page
+from app.file_utils import atomic_write_image, atomic_write_json, file_lock
+from app.page_pyramid import (
+    FALLBACK_PREVIEW_DPI,
+    PAGE_PYRAMID_DPI,
+    PAGE_PYRAMID_ENABLED,
+    derive_level,
+    ensure_page_image,
+    fit_base,
+    has_pyramid_base,
+    page_level,
+    read_pyramid_base,
+    store_pyramid_base,
+)
+from app.pdf_preflight import preflight_summary, read_preflight
+from app.pdf_renderer import open_pdf_renderer
+from app.pdf_text_extract import iter_pdf_layout_pages_sharded
 from app.profile_analyzer import analyze_account_identity_from_text
-from app.statement_parser import parse_page_with_profile_fallback, is_transaction_row
+from app.statement_parser import parse_page_with_profile_fallback, is_transaction_row, ocr_rows_preferred, route_page_source
 from app.workflow_service import (
     ensure_submission_pages,
     get_submission_id_for_job,
@@ -30,7 +54,19 @@ DATA_DIR = os.getenv("DATA_DIR", "./data")
 PREVIEW_DPI = int(os.getenv("PREVIEW_DPI", "130"))
 PREVIEW_DRAFT_DPI = int(os.getenv("PREVIEW_DRAFT_DPI", "100"))
 PREVIEW_MAX_PIXELS = int(os.getenv("PREVIEW_MAX_PIXELS", "6000000"))
+PREVIEW_PREFETCH_ENABLED = str(os.getenv("PREVIEW_PREFETCH_ENABLED", "true")).strip().lower() not in {"0", "false", "no"}
+PREVIEW_PREFETCH_PRIORITY = int(os.getenv("PREVIEW_PREFETCH_PRIORITY", "9"))
+DRAFT_LAZY = str(os.getenv("DRAFT_LAZY", "true")).strip().lower() not in {"0", "false", "no"}
+DRAFT_EAGER_PAGES = int(os.getenv("DRAFT_EAGER_PAGES", "1"))
 OCR_BACKEND = "easyocr"
+OCR_PAGE_WORKERS = int(os.getenv("OCR_PAGE_WORKERS", "1"))
+OCR_MODEL_MEMORY_MB = int(os.getenv("OCR_MODEL_MEMORY_MB", "1500"))
+IMAGE_WRITE_WORKERS = int(os.getenv("IMAGE_WRITE_WORKERS", "2"))
+# Cleaned arrays kept in memory for serial OCR; later pages are read back from
+# disk so memory does not grow with page count.
+OCR_IMAGE_HANDOFF_PAGES = int(os.getenv("OCR_IMAGE_HANDOFF_PAGES", "4"))
+PDF_RENDER_WORKERS = int(os.getenv("PDF_RENDER_WORKERS", str(min(4, os.cpu_count() or 1))))
+PDF_RENDER_PAGES_PER_SHARD = int(os.getenv("PDF_RENDER_PAGES_PER_SHARD", "8"))
 AI_ANALYZER_ENABLED = str(os.getenv("AI_ANALYZER_ENABLED", "true")).strip().lower() not in {"0", "false", "no"}
 AI_ANALYZER_PROVIDER = str(os.getenv("AI_ANALYZER_PROVIDER", "gemini")).strip().lower() or "gemini"
 AI_ANALYZER_MODEL = str(os.getenv("AI_ANALYZER_MODEL", "gemini-2.5-flash")).strip() or "gemini-2.5-flash"
@@ -74,31 +110,72 @@ def prepare_draft(job_id: str):
 
     try:
         report("processing", "draft_pdf_to_images", 3, ocr_backend=OCR_BACKEND)
-        total_pages = _render_pdf_pages(
-            input_pdf=input_pdf,
-            pages_dir=pages_dir,
-            step_name="draft_pdf_to_images",
-            progress_start=3,
-            progress_end=58,
-            report_fn=report,
-            dpi=PREVIEW_DRAFT_DPI,
-        )
-
-        page_files = sorted(f for f in os.listdir(pages_dir) if f.endswith(".png"))
-        report("processing", "draft_image_cleaning", 60, pages=len(page_files), ocr_backend=OCR_BACKEND)
-
-        for i, page_file in enumerate(page_files, start=1):
-            src = os.path.join(pages_dir, page_file)
-            dst = os.path.join(cleaned_dir, page_file)
-            cleaned = clean_page(src)
-            cv2.imwrite(dst, cleaned)
-            report(
-                "processing",
-                "draft_image_cleaning",
-                60 + int((i / max(len(page_files), 1)) * 38),
+        total_pages = _pdf_page_count(input_pdf) if DRAFT_LAZY else 0
+        if total_pages > 0:
+            # Lazy draft: only the first pages are prepared before the draft opens;
+            # the rest are cleaned in the background or when first viewed.
+            eager_pages = max(1, min(DRAFT_EAGER_PAGES, total_pages))
+            for page_num in range(1, eager_pages + 1):
+                if ensure_draft_page(job_dir, page_num) is None:
+                    raise RuntimeError(f"draft_page_render_failed:{page_num}")
+                report(
+                    "processing",
+                    "draft_pdf_to_images",
+                    3 + int((page_num / eager_pages) * 92),
+                    pages=total_pages,
+                    ocr_backend=OCR_BACKEND,
+                )
+            with open(os.path.join(job_dir, "preprocess.json"), "w") as f:
+                json.dump({"use_existing_cleaned": True, "lazy_draft": True, "pages": total_pages}, f)
+            update_status(
+                job_dir,
+                "draft",
+                step="ready_for_edit",
+                progress=100,
                 pages=total_pages,
                 ocr_backend=OCR_BACKEND,
             )
+            if eager_pages < total_pages:
+                try:
+                    fill_draft_pages.apply_async(args=[job_id], priority=PREVIEW_PREFETCH_PRIORITY)
+                except Exception as exc:
+                    logger.warning("[WORKER] Could not enqueue draft page fill for %s: %s", job_id, exc)
+            logger.info("[WORKER] Draft ready %s (%s of %s pages prepared)", job_id, eager_pages, total_pages)
+            return {"pages": total_pages}
+
+        with _AsyncImageWriter() as writer, ThreadPoolExecutor(max_workers=max(1, CLEAN_WORKERS)) as cleaner:
+
+            cleaning = []
+
+            def clean_rendered(page_num: int, page_img):
+                cleaning.append(
+                    (
+                        page_num,
+                        cleaner.submit(_clean_and_write, writer, os.path.join(cleaned_dir, f"page_{page_num:03}.png"), page_img, False),
+                    )
+                )
+
+            # Pages are cleaned straight from the rendered arrays on a thread pool;
+            # PNGs are written in the background and flushed before the draft is
+            # marked ready.
+            total_pages = _render_pdf_pages(
+                input_pdf=input_pdf,
+                pages_dir=pages_dir,
+                step_name="draft_pdf_to_images",
+                progress_start=3,
+                progress_end=95,
+                report_fn=report,
+                dpi=PREVIEW_DRAFT_DPI,
+                writer=writer,
+                page_sink=clean_rendered,
+            )
+            _record_deskew_angles(
+                job_dir,
+                {f"page_{page_num:03}": future.result()[1] for page_num, future in cleaning},
+            )
+            report("processing", "draft_image_cleaning", 96, pages=total_pages, ocr_backend=OCR_BACKEND)
+
+        page_files = sorted(f for f in os.listdir(pages_dir) if f.endswith(".png"))
 
         with open(os.path.join(job_dir, "preprocess.json"), "w") as f:
             json.dump({"use_existing_cleaned": True}, f)
@@ -126,6 +203,39 @@ def prepare_draft(job_id: str):
         raise
 
 
+@celery.task
+def fill_draft_pages(job_id: str):
+    """Clean the pages of a lazy draft in reading order, skipping pages already prepared on demand."""
+    job_dir = os.path.join(DATA_DIR, "jobs", job_id)
+    input_pdf = os.path.join(job_dir, "input", "document.pdf")
+    if not os.path.exists(input_pdf):
+        return {"pages": 0}
+    prepared = 0
+    for page_num in range(1, _pdf_page_count(input_pdf) + 1):
+        try:
+            if ensure_draft_page(job_dir, page_num) is not None:
+                prepared += 1
+        except Exception as exc:
+            logger.warning("[WORKER] Draft page fill failed for %s page %s: %s", job_id, page_num, exc)
+    return {"pages": prepared}
+
+
+def ensure_draft_page(job_dir: str, page_num: int):
+    """
+    Cleaned draft page page_num (rendered and cleaned if missing), or None.
+    Used by the background fill, on-demand page requests and OCR, which share
+    one render per page through the file lock.
+    """
+    filename = f"page_{page_num:03}.png"
+    return _ensure_cleaned_page(
+        os.path.join(job_dir, "input", "document.pdf"),
+        os.path.join(job_dir, "cleaned", filename),
+        os.path.join(job_dir, "pages", filename),
+        page_num,
+        dpi=PREVIEW_DRAFT_DPI,
+    )
+
+
 @celery.task
 def process_pdf(job_id: str, parse_mode: str = "text"):
     logger.info("[WORKER] Starting job %s", job_id)
@@ -160,63 +270,75 @@ def process_pdf(job_id: str, parse_mode: str = "text"):
         payload.update(extra)
         update_status(job_dir, status, step=step, progress=safe_progress, **payload)
 
+    ocr_pages = iter(())
+    # pdftotext output is parsed as it streams; pages are pulled on demand and
+    # released once parsed, so page 1 is handled before extraction finishes.
+    pdf_page_count = _pdf_page_count(input_pdf)
+    layout_pages = _LayoutStream(iter_pdf_layout_pages_sharded(input_pdf, pdf_page_count))
     try:
         parsed_output: Dict[str, List[Dict]] = {}
         bounds_output: Dict[str, List[Dict]] = {}
-        layout_pages: List[Dict] = []
-        text_extract_error = None
-        try:
-            layout_pages = extract_pdf_layout_pages(input_pdf)
-        except Exception as exc:
-            text_extract_error = str(exc)
-            layout_pages = []
 
+        # Cleaned grayscale pages kept in memory between cleaning and OCR.
+        cleaned_images: Dict[int, object] = {}
         preprocess_cfg = _read_preprocess_config(job_dir)
         use_existing_cleaned = bool(preprocess_cfg.get("use_existing_cleaned"))
+        lazy_draft = bool(preprocess_cfg.get("lazy_draft"))
+        # Pages a lazy draft has not prepared yet are filled in at the draft's resolution.
+        cleaned_dpi = PREVIEW_DRAFT_DPI if lazy_draft else PREVIEW_DPI
         existing_pages = sorted(f for f in os.listdir(pages_dir) if f.endswith(".png"))
         existing_cleaned = sorted(f for f in os.listdir(cleaned_dir) if f.endswith(".png"))
 
+        ocr_workers = _ocr_pool_size(OCR_PAGE_WORKERS, pdf_page_count) if parse_mode == "ocr" else 1
         if parse_mode == "ocr":
             full_preview_pipeline = bool(use_existing_cleaned and existing_pages and existing_cleaned)
             if full_preview_pipeline:
                 page_files = existing_pages
+                if lazy_draft and pdf_page_count > len(page_files):
+                    page_files = [f"page_{i:03}.png" for i in range(1, pdf_page_count + 1)]
                 report("processing", "pdf_to_images", 25, pages=len(page_files), ocr_backend=OCR_BACKEND)
                 report("processing", "image_cleaning", 45, pages=len(page_files), ocr_backend=OCR_BACKEND)
             else:
                 report("processing", "pdf_to_images", 5, ocr_backend=OCR_BACKEND)
-                total_pages = _render_pdf_pages(
-                    input_pdf=input_pdf,
-                    pages_dir=pages_dir,
-                    step_name="pdf_to_images",
-                    progress_start=5,
-                    progress_end=25,
-                    report_fn=report,
-                    dpi=PREVIEW_DPI,
-                )
-                page_files = [f"page_{i:03}.png" for i in range(1, total_pages + 1)]
-                report("processing", "image_cleaning", 25, pages=len(page_files), ocr_backend=OCR_BACKEND)
-                for i, page_file in enumerate(page_files, start=1):
-                    src = os.path.join(pages_dir, page_file)
-                    dst = os.path.join(cleaned_dir, page_file)
-                    cleaned = clean_page(src)
-                    cv2.imwrite(dst, cleaned)
-                    report(
-                        "processing",
-                        "image_cleaning",
-                        25 + int((i / max(len(page_files), 1)) * 20),
-                        pages=len(page_files),
-                        ocr_backend=OCR_BACKEND,
+                # Pool workers get page paths only; arrays are never pickled to them.
+                handoff_pages = OCR_IMAGE_HANDOFF_PAGES if ocr_workers <= 1 else 0
+                with _AsyncImageWriter() as writer, ThreadPoolExecutor(max_workers=max(1, CLEAN_WORKERS)) as cleaner:
+
+                    def clean_rendered(page_num: int, page_img):
+                        cleaned_images[page_num] = cleaner.submit(
+                            _clean_and_write,
+                            writer,
+                            os.path.join(cleaned_dir, f"page_{page_num:03}.png"),
+                            page_img,
+                            page_num <= handoff_pages,
+                        )
+
+                    total_pages = _render_pdf_pages(
+                        input_pdf=input_pdf,
+                        pages_dir=pages_dir,
+                        step_name="pdf_to_images",
+                        progress_start=5,
+                        progress_end=44,
+                        report_fn=report,
+                        dpi=PREVIEW_DPI,
+                        writer=writer,
+                        page_sink=clean_rendered,
+                    )
+                    page_files = [f"page_{i:03}.png" for i in range(1, total_pages + 1)]
+                    cleaned_images = {page_num: future.result() for page_num, future in cleaned_images.items()}
+                    _record_deskew_angles(
+                        job_dir,
+                        {f"page_{page_num:03}": angle for page_num, (_img, angle) in cleaned_images.items()},
                     )
+                    cleaned_images = {
+                        page_num: img for page_num, (img, _angle) in cleaned_images.items() if img is not None
+                    }
+                    report("processing", "image_cleaning", 45, pages=len(page_files), ocr_backend=OCR_BACKEND)
         else:
-            if layout_pages:
-                page_files = [f"page_{i:03}.png" for i in range(1, len(layout_pages) + 1)]
-            else:
-                try:
-                    info = pdfinfo_from_path(input_pdf)
-                    total_pages = int(info.get("Pages") or 0)
-                except Exception:
-                    total_pages = 0
-                page_files = [f"page_{i:03}.png" for i in range(1, max(total_pages, 0) + 1)]
+            total_pages = pdf_page_count
+            if total_pages <= 0:
+                total_pages = layout_pages.count()
+            page_files = [f"page_{i:03}.png" for i in range(1, max(total_pages, 0) + 1)]
             report("processing", "text_extraction", 45, pages=len(page_files), ocr_backend=OCR_BACKEND)
 
         if submission_id and page_files:
@@ -258,7 +380,7 @@ def process_pdf(job_id: str, parse_mode: str = "text"):
         account_identity_source = "profile_regex"
         account_identity_ai_result = "not_attempted"
         account_identity_ai_reason = None
-        for layout in layout_pages[:5]:
+        for layout in layout_pages.head(5):
             text = (layout or {}).get("text", "")
             if not text:
                 continue
@@ -271,7 +393,7 @@ def process_pdf(job_id: str, parse_mode: str = "text"):
             if account_name and account_number:
                 break
         first_page_text = ""
-        for layout in layout_pages:
+        for layout in layout_pages.head(5):
             first_page_text = str((layout or {}).get("text") or "").strip()
             if first_page_text:
                 break
@@ -294,7 +416,7 @@ def process_pdf(job_id: str, parse_mode: str = "text"):
                 "ocr_backend": OCR_BACKEND,
                 "parse_mode": parse_mode,
                 "pages": len(page_files),
-                "text_extract_error": text_extract_error,
+                "text_extract_error": layout_pages.error,
                 "account_name": account_name,
                 "account_number": account_number,
                 "account_name_bbox": account_name_bbox,
@@ -312,10 +434,31 @@ def process_pdf(job_id: str, parse_mode: str = "text"):
             },
             "pages": {},
         }
+        # Deskew angles recorded when pages were cleaned (draft, above, or on demand).
+        deskew_angles: Dict[str, float] = {}
+
+        if parse_mode == "ocr":
+            # OCR + parsing are page-local and may run ahead in a pool; identity
+            # detection and result syncing below consume them strictly in page order.
+            # Tasks are built as the pool asks for them, so layouts are pulled
+            # only a few pages ahead of the consumer.
+            def ocr_tasks():
+                for idx, page_file in enumerate(page_files, start=1):
+                    layout = layout_pages.get(idx)
+                    yield {
+                        "input_pdf": input_pdf,
+                        "page_num": idx,
+                        "page_path": os.path.join(cleaned_dir, page_file),
+                        "raw_path": os.path.join(pages_dir, page_file),
+                        "dpi": cleaned_dpi,
+                        "profile_text": layout.get("text") if layout else "",
+                        "image": cleaned_images.pop(idx, None),
+                    }
+
+            ocr_pages = _iter_ocr_page_results(ocr_tasks(), ocr_workers)
 
         for idx, page_file in enumerate(page_files, start=1):
             page_name = page_file.replace(".png", "")
-            page_path = os.path.join(cleaned_dir, page_file)
 
             report(
                 "processing",
@@ -326,11 +469,13 @@ def process_pdf(job_id: str, parse_mode: str = "text"):
                 ocr_backend=OCR_BACKEND,
             )
 
-            layout = layout_pages[idx - 1] if idx - 1 < len(layout_pages) else None
+            layout = layout_pages.get(idx)
+            if layout:
+                _store_layout_page(job_dir, idx, layout)
             profile_text = layout.get("text") if layout else ""
             profile = detect_bank_profile(profile_text)
 
-            ocr_items = []
+            ocr_page = OcrPage.empty()
             source_type = "ocr" if parse_mode == "ocr" else "text"
             source_reason = None
             parser_words = layout.get("words", []) if layout else []
@@ -340,10 +485,8 @@ def process_pdf(job_id: str, parse_mode: str = "text"):
             page_h = int(parser_h) if parser_h > 1 else 1
 
             if parse_mode == "ocr":
-                img = cv2.imread(page_path)
-                if img is None:
-                    img = _ensure_cleaned_page(input_pdf, page_path, os.path.join(pages_dir, page_file), idx)
-                if img is None:
+                page_ocr = next(ocr_pages)
+                if page_ocr.get("image_read_failed"):
                     parsed_output[page_name] = []
                     bounds_output[page_name] = []
                     diagnostics["pages"][page_name] = {
@@ -352,7 +495,7 @@ def process_pdf(job_id: str, parse_mode: str = "text"):
                         "fallback_reason": "image_read_failed",
                         "rows_parsed": 0,
                     }
-                    _write_json_atomic(os.path.join(ocr_dir, f"{page_name}.json"), [])
+                    write_ocr_page(ocr_dir, page_name, OcrPage.empty())
                     _write_json_atomic(os.path.join(result_dir, "parsed_rows.json"), parsed_output)
                     _write_json_atomic(os.path.join(result_dir, "bounds.json"), bounds_output)
                     _write_json_atomic(os.path.join(result_dir, "parse_diagnostics.json"), diagnostics)
@@ -360,11 +503,11 @@ def process_pdf(job_id: str, parse_mode: str = "text"):
                         sync_submission_page_result(job_id, page_name, [], diagnostics["pages"][page_name])
                         set_page_parse_status(submission_id, page_name, "failed", "image_read_failed")
                     continue
-                page_h, page_w = img.shape[:2]
-                ocr_items = ocr_image(page_path, backend=OCR_BACKEND)
-                ocr_words = _ocr_items_to_words(ocr_items)
-                ocr_text = " ".join((item.get("text") or "") for item in ocr_items)
-                profile = detect_bank_profile(ocr_text or profile_text)
+                page_h, page_w = page_ocr["page_h"], page_ocr["page_w"]
+                ocr_page = page_ocr["ocr_page"]
+                ocr_words = ocr_page.words()
+                ocr_text = ocr_page.text
+                profile = page_ocr["profile"]
                 if not account_name or not account_number:
                     account_identity = extract_account_identity(ocr_text, profile)
                     if not account_name:
@@ -387,12 +530,7 @@ def process_pdf(job_id: str, parse_mode: str = "text"):
                     account_name_bbox = find_value_bounds(ocr_words, page_w, page_h, account_name, page_name)
                 if not account_number_bbox and account_number:
                     account_number_bbox = find_value_bounds(ocr_words, page_w, page_h, account_number, page_name)
-                page_rows, page_bounds, parser_diag = parse_page_with_profile_fallback(
-                    ocr_words,
-                    page_w,
-                    page_h,
-                    profile,
-                )
+                page_rows, page_bounds, parser_diag = page_ocr["parsed"]
             else:
                 if not account_name or not account_number:
                     account_identity = extract_account_identity(profile_text, profile)
@@ -422,6 +560,42 @@ def process_pdf(job_id: str, parse_mode: str = "text"):
                     parser_h,
                     profile,
                 )
+                if parse_mode == "auto":
+                    route, source_reason = route_page_source(len(parser_words), page_rows, parser_diag)
+                    page_ocr = None
+                    if route == "ocr":
+                        page_ocr = _ocr_parse_page(
+                            {
+                                "input_pdf": input_pdf,
+                                "page_num": idx,
+                                "page_path": os.path.join(cleaned_dir, page_file),
+                                "raw_path": os.path.join(pages_dir, page_file),
+                                "dpi": cleaned_dpi,
+                                "profile_text": profile_text,
+                            }
+                        )
+                        if page_ocr.get("image_read_failed"):
+                            page_ocr, source_reason = None, "image_read_failed"
+                        elif not ocr_rows_preferred(page_rows, profile, page_ocr["parsed"][0], page_ocr["profile"]):
+                            # The text layer still gave more rows; OCR is not an improvement.
+                            page_ocr, source_reason = None, "ocr_fewer_rows"
+                    if page_ocr is not None:
+                        source_type = "ocr"
+                        page_h, page_w = page_ocr["page_h"], page_ocr["page_w"]
+                        ocr_page = page_ocr["ocr_page"]
+                        ocr_words = ocr_page.words()
+                        profile = page_ocr["profile"]
+                        page_rows, page_bounds, parser_diag = page_ocr["parsed"]
+                        if not account_name or not account_number:
+                            account_identity = extract_account_identity(ocr_page.text, profile)
+                            if not account_name:
+                                account_name = account_identity.get("account_name")
+                            if not account_number:
+                                account_number = account_identity.get("account_number")
+                        if not account_name_bbox and account_name:
+                            account_name_bbox = find_value_bounds(ocr_words, page_w, page_h, account_name, page_name)
+                        if not account_number_bbox and account_number:
+                            account_number_bbox = find_value_bounds(ocr_words, page_w, page_h, account_number, page_name)
 
             transaction_rows = [row for row in page_rows if is_transaction_row(row, profile)]
             id_map: Dict[str, str] = {}
@@ -459,13 +633,22 @@ def process_pdf(job_id: str, parse_mode: str = "text"):
                 "ocr_backend": OCR_BACKEND,
                 "parse_mode": parse_mode,
                 "bank_profile": profile.name,
-                "ocr_items": len(ocr_items),
+                "ocr_items": len(ocr_page),
                 "rows_parsed": len(filtered_rows),
                 "profile_detected": parser_diag.get("profile_detected", profile.name),
                 "profile_selected": parser_diag.get("profile_selected", profile.name),
                 "fallback_applied": bool(parser_diag.get("fallback_applied", False)),
                 "fallback_reason": parser_diag.get("fallback_reason") or source_reason,
             }
+            if parse_mode == "auto":
+                diagnostics["pages"][page_name]["route"] = source_type
+                diagnostics["pages"][page_name]["route_reason"] = source_reason
+                routes = diagnostics["job"].setdefault("routes", {"text": 0, "ocr": 0})
+                routes[source_type] = routes.get(source_type, 0) + 1
+            if source_type == "ocr":
+                deskew_angle = _page_deskew_angle(job_dir, page_name, deskew_angles)
+                if deskew_angle is not None:
+                    diagnostics["pages"][page_name]["deskew_angle"] = deskew_angle
 
             diagnostics["job"]["account_name"] = account_name
             diagnostics["job"]["account_number"] = account_number
@@ -475,8 +658,10 @@ def process_pdf(job_id: str, parse_mode: str = "text"):
             diagnostics["job"]["account_identity_ai_attempted"] = account_ai_attempted
             diagnostics["job"]["account_identity_ai_result"] = account_identity_ai_result
             diagnostics["job"]["account_identity_ai_reason"] = account_identity_ai_reason
+            diagnostics["job"]["text_extract_error"] = layout_pages.error
+            layout_pages.release(idx)
 
-            _write_json_atomic(os.path.join(ocr_dir, f"{page_name}.json"), ocr_items)
+            write_ocr_page(ocr_dir, page_name, ocr_page)
 
             _write_json_atomic(os.path.join(result_dir, "parsed_rows.json"), parsed_output)
             _write_json_atomic(os.path.join(result_dir, "bounds.json"), bounds_output)
@@ -498,6 +683,8 @@ def process_pdf(job_id: str, parse_mode: str = "text"):
 
         report("done", "completed", 100, pages=len(page_files), ocr_backend=OCR_BACKEND)
         logger.info("[WORKER] Finished job %s", job_id)
+        if parse_mode != "ocr" and PREVIEW_PREFETCH_ENABLED:
+            _enqueue_preview_prefetch(job_id)
         return {"pages": len(page_files)}
     except Exception as exc:
         fail_payload = {"parse_mode": parse_mode, "ocr_backend": OCR_BACKEND}
@@ -512,18 +699,160 @@ def process_pdf(job_id: str, parse_mode: str = "text"):
         )
         logger.exception("[WORKER] Failed job %s: %s", job_id, exc)
         raise
+    finally:
+        layout_pages.close()
+        close_ocr_pages = getattr(ocr_pages, "close", None)
+        if close_ocr_pages:
+            close_ocr_pages()
+
+
+@celery.task
+def prefetch_previews(job_id: str):
+    """
+    Render preview images for a text-mode job in reading order. Text parsing
+    never rasterizes, so this runs after the job completes at low priority;
+    pages a reviewer opens first are rendered on request and skipped here.
+    """
+    job_dir = os.path.join(DATA_DIR, "jobs", job_id)
+    input_pdf = os.path.join(job_dir, "input", "document.pdf")
+    preview_dir = os.path.join(job_dir, "preview")
+    cleaned_dir = os.path.join(job_dir, "cleaned")
+    if not os.path.exists(input_pdf):
+        return {"pages": 0}
+
+    rendered = 0
+    for page_num in range(1, _pdf_page_count(input_pdf) + 1):
+        filename = f"page_{page_num:03}.png"
+        if os.path.exists(os.path.join(cleaned_dir, filename)):
+            continue
+        try:
+            if ensure_page_image(
+                job_dir,
+                input_pdf,
+                page_num,
+                os.path.join(preview_dir, filename),
+                FALLBACK_PREVIEW_DPI,
+                PREVIEW_MAX_PIXELS,
+            ):
+                rendered += 1
+        except Exception as exc:
+            logger.warning("[WORKER] Preview prefetch failed for %s page %s: %s", job_id, page_num, exc)
+    logger.info("[WORKER] Prefetched %s preview pages for %s", rendered, job_id)
+    return {"pages": rendered}
+
+
+def _enqueue_preview_prefetch(job_id: str):
+    try:
+        prefetch_previews.apply_async(args=[job_id], priority=PREVIEW_PREFETCH_PRIORITY)
+    except Exception as exc:
+        logger.warning("[WORKER] Could not enqueue preview prefetch for %s: %s", job_id, exc)
+
+
+def _ocr_parse_page(task: Dict) -> Dict:
+    page_path = task["page_path"]
+    img = task.pop("image", None)
+    if img is None:
+        img = cv2.imread(page_path)
+    if img is None:
+        img = _ensure_cleaned_page(
+            task["input_pdf"],
+            page_path,
+            task["raw_path"],
+            task["page_num"],
+            dpi=task.get("dpi", PREVIEW_DPI),
+        )
+    if img is None:
+        return {"image_read_failed": True}
+
+    page_h, page_w = img.shape[:2]
+    ocr_page = OcrPage.from_items(ocr_image(img, backend=OCR_BACKEND))
+    ocr_words = ocr_page.words()
+    profile = detect_bank_profile(ocr_page.text or task.get("profile_text") or "")
+    return {
+        "page_w": page_w,
+        "page_h": page_h,
+        "ocr_page": ocr_page,
+        "profile": profile,
+        "parsed": parse_page_with_profile_fallback(ocr_words, page_w, page_h, profile),
+    }
+
+
+def _available_memory_mb() -> Optional[int]:
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def _ocr_pool_size(workers: int, pages: int) -> int:
+    """
+    OCR pool processes for a job. Without the OCR server every pool process
+    loads its own EasyOCR/torch model, so the pool is capped by available
+    memory at OCR_MODEL_MEMORY_MB per process; with the server the processes
+    only parse and send pages to the shared model.
+    """
+    workers = max(1, int(workers or 1))
+    if pages and pages > 0:
+        workers = min(workers, pages)
+    if workers <= 1 or ocr_server_enabled():
+        return workers
+    available_mb = _available_memory_mb()
+    if available_mb is None or OCR_MODEL_MEMORY_MB <= 0:
+        return workers
+    capped = max(1, min(workers, available_mb // OCR_MODEL_MEMORY_MB))
+    if capped < workers:
+        logger.info(
+            "[WORKER] OCR pool capped at %s processes (%s MB available, %s MB per OCR model)",
+            capped,
+            available_mb,
+            OCR_MODEL_MEMORY_MB,
+        )
+    return capped
+
+
+def _iter_ocr_page_results(tasks, workers: int):
+    """
+    Yield _ocr_parse_page results in page order. With workers > 1 pages are
+    processed ahead of the consumer by a billiard pool (regular multiprocessing
+    pools cannot be started from daemonic prefork children); at most two tasks
+    per process are drawn from `tasks` ahead of the consumer.
+    """
+    workers = max(1, int(workers or 1))
+    if workers <= 1:
+        for task in tasks:
+            yield _ocr_parse_page(task)
+        return
+
+    pool = Pool(processes=workers)
+    try:
+        pending = deque()
+        for task in tasks:
+            pending.append(pool.apply_async(_ocr_parse_page, (task,)))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
 
 
 def update_status(job_dir, status, **extra):
-    tmp_path = os.path.join(job_dir, "status.tmp")
     final_path = os.path.join(job_dir, "status.json")
 
     data = {"status": status, **extra}
+    if "preflight" not in data:
+        # Keep the upload-time preflight visible in every status snapshot.
+        preflight = preflight_summary(read_preflight(job_dir))
+        if preflight:
+            data["preflight"] = preflight
 
-    with open(tmp_path, "w") as f:
-        json.dump(data, f)
-
-    os.replace(tmp_path, final_path)
+    atomic_write_json(final_path, data)
     try:
         job_id = os.path.basename(job_dir.rstrip("/"))
         upsert_job_status(job_id, data)
@@ -532,35 +861,12 @@ def update_status(job_dir, status, **extra):
 
 
 def _write_json_atomic(path: str, payload):
-    tmp = f"{path}.tmp"
-    with open(tmp, "w") as f:
-        json.dump(payload, f, indent=2)
-    os.replace(tmp, path)
+    atomic_write_json(path, payload, indent=2)
 
 
 def _normalize_parse_mode(mode: str | None) -> str:
-    return "ocr" if str(mode or "").strip().lower() == "ocr" else "text"
-
-
-def _ocr_items_to_words(ocr_items: List[Dict]) -> List[Dict]:
-    words = []
-    for item in ocr_items:
-        bbox = item.get("bbox") or []
-        text = (item.get("text") or "").strip()
-        if len(bbox) != 4 or not text:
-            continue
-        xs = [pt[0] for pt in bbox]
-        ys = [pt[1] for pt in bbox]
-        words.append(
-            {
-                "text": text,
-                "x1": float(min(xs)),
-                "y1": float(min(ys)),
-                "x2": float(max(xs)),
-                "y2": float(max(ys)),
-            }
-        )
-    return words
+    mode = str(mode or "").strip().lower()
+    return mode if mode in {"ocr", "auto"} else "text"
 
 
 def _read_preprocess_config(job_dir: str) -> Dict:
@@ -595,20 +901,28 @@ def _render_pdf_pages(
     progress_end: int,
     report_fn,
     dpi: int,
+    writer=None,
+    page_sink=None,
 ) -> int:
+    """
+    Render every page to pages_dir. When page_sink is given it receives
+    (page_num, BGR array) for each page so later stages can skip re-reading
+    the PNG; with a writer the PNG itself is written in the background.
+    With the page pyramid enabled each page is rasterized once at
+    PAGE_PYRAMID_DPI (or read back from an earlier pass) and pages_dir gets
+    the level derived for dpi.
+    """
     span = max(1, progress_end - progress_start)
-    total_pages = 0
-    try:
-        info = pdfinfo_from_path(input_pdf)
-        total_pages = int(info.get("Pages") or 0)
-    except Exception:
-        total_pages = 0
+    job_dir = os.path.dirname(os.path.abspath(pages_dir))
+    total_pages = _pdf_page_count(input_pdf)
 
     if total_pages <= 0:
         pages = convert_from_path(input_pdf, dpi=dpi, fmt="png")
         total_pages = max(1, len(pages))
         for i, page in enumerate(pages, start=1):
-            _save_preview_page(page, os.path.join(pages_dir, f"page_{i:03}.png"))
+            page_img = _save_preview_page(page, os.path.join(pages_dir, f"page_{i:03}.png"), writer)
+            if page_sink:
+                page_sink(i, page_img)
             report_fn(
                 "processing",
                 step_name,
@@ -618,16 +932,27 @@ def _render_pdf_pages(
             )
         return total_pages
 
-    for i in range(1, total_pages + 1):
-        page_list = convert_from_path(
-            input_pdf,
-            dpi=dpi,
-            fmt="png",
-            first_page=i,
-            last_page=i,
-        )
-        if page_list:
-            _save_preview_page(page_list[0], os.path.join(pages_dir, f"page_{i:03}.png"))
+    for i, img, img_dpi, src_path, stored in _iter_page_bases(input_pdf, job_dir, total_pages, dpi):
+        if img is not None:
+            page_path = os.path.join(pages_dir, f"page_{i:03}.png")
+            if PAGE_PYRAMID_ENABLED and not stored:
+                if src_path or writer is None:
+                    store_pyramid_base(job_dir, i, img, img_dpi, src_path=src_path)
+                else:
+                    writer.submit(store_pyramid_base, job_dir, i, img, img_dpi)
+                src_path = None
+            page_img = derive_level(img, img_dpi, dpi, PREVIEW_MAX_PIXELS)
+            if src_path and page_img is img:
+                os.replace(src_path, page_path)
+            else:
+                if writer is not None:
+                    writer.write(page_path, page_img)
+                else:
+                    _write_image_atomic(page_path, page_img)
+                if src_path:
+                    os.remove(src_path)
+            if page_sink:
+                page_sink(i, page_img)
         report_fn(
             "processing",
             step_name,
@@ -638,26 +963,105 @@ def _render_pdf_pages(
     return total_pages
 
 
-def _ensure_cleaned_page(input_pdf: str, cleaned_path: str, raw_path: str, page_num: int):
+def _pdf_page_count(input_pdf: str) -> int:
     try:
-        page_list = convert_from_path(
-            input_pdf,
-            dpi=PREVIEW_DPI,
-            fmt="png",
-            first_page=page_num,
-            last_page=page_num,
-        )
-        if not page_list:
-            return None
-        _save_preview_page(page_list[0], raw_path)
-        cleaned = clean_page(raw_path)
-        cv2.imwrite(cleaned_path, cleaned)
-        return cv2.imread(cleaned_path)
+        with open_pdf_renderer(input_pdf) as renderer:
+            return renderer.page_count()
+    except Exception:
+        return 0
+
+
+def _iter_page_bases(input_pdf: str, job_dir: str, total_pages: int, dpi: int):
+    """
+    Yield (page_num, image, image_dpi, src_path, stored) in page order.
+    src_path is set when the image is also a PNG file that may be moved into
+    place; stored is True when the image came from the pyramid on disk.
+    """
+    if PAGE_PYRAMID_ENABLED and all(has_pyramid_base(job_dir, i) for i in range(1, total_pages + 1)):
+        for i in range(1, total_pages + 1):
+            base = read_pyramid_base(job_dir, i)
+            if base is None:
+                yield i, None, dpi, None, True
+            else:
+                yield i, base[0], base[1], None, True
+        return
+
+    render_dpi = max(PAGE_PYRAMID_DPI, dpi) if PAGE_PYRAMID_ENABLED else dpi
+    shard_size = max(1, PDF_RENDER_PAGES_PER_SHARD)
+    shards = [(first, min(total_pages, first + shard_size - 1)) for first in range(1, total_pages + 1, shard_size)]
+    workers = max(1, min(PDF_RENDER_WORKERS, len(shards)))
+    if workers <= 1:
+        # PDFium renders one page at a time under a process-wide lock, so it is
+        # only used when sharding would not run pdftoppm on several cores anyway.
+        with open_pdf_renderer(input_pdf) as renderer:
+            if renderer.in_process:
+                # The document stays open across pages; each page goes straight to an array.
+                for i in range(1, total_pages + 1):
+                    if PAGE_PYRAMID_ENABLED:
+                        rendered = renderer.render_page(i, render_dpi)
+                        img, img_dpi = fit_base(rendered, render_dpi) if rendered is not None else (None, render_dpi)
+                    else:
+                        img, img_dpi = renderer.render_page(i, dpi, max_pixels=PREVIEW_MAX_PIXELS), dpi
+                    yield i, img, img_dpi, None, False
+                return
+
+    # Render page ranges with one pdftoppm run per shard, several shards at a
+    # time, and consume them in page order so progress and sinks stay ordered.
+    scratch_dir = tempfile.mkdtemp(prefix=".render-", dir=job_dir)
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            rendered = executor.map(lambda shard: _render_pdf_shard(input_pdf, render_dpi, scratch_dir, *shard), shards)
+            for (first, last), paths in zip(shards, rendered):
+                for i in range(first, last + 1):
+                    src_path = paths[i - first] if i - first < len(paths) else None
+                    img = cv2.imread(src_path) if src_path else None
+                    if img is None:
+                        yield i, None, render_dpi, None, False
+                        continue
+                    img_dpi = render_dpi
+                    if PAGE_PYRAMID_ENABLED:
+                        fitted, img_dpi = fit_base(img, render_dpi)
+                        if fitted is not img:
+                            img, src_path = fitted, None
+                    yield i, img, img_dpi, src_path, False
+    finally:
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+
+
+def _render_pdf_shard(input_pdf: str, dpi: int, scratch_dir: str, first_page: int, last_page: int) -> List[str]:
+    return convert_from_path(
+        input_pdf,
+        dpi=dpi,
+        fmt="png",
+        first_page=first_page,
+        last_page=last_page,
+        output_folder=scratch_dir,
+        output_file=f"shard{first_page:05}",
+        paths_only=True,
+    )
+
+
+def _ensure_cleaned_page(input_pdf: str, cleaned_path: str, raw_path: str, page_num: int, dpi: int = PREVIEW_DPI):
+    try:
+        job_dir = os.path.dirname(os.path.dirname(os.path.abspath(raw_path)))
+        with file_lock(job_dir, cleaned_path):
+            # Another caller may have prepared the page while we waited.
+            cleaned = cv2.imread(cleaned_path, cv2.IMREAD_GRAYSCALE) if os.path.exists(cleaned_path) else None
+            if cleaned is not None:
+                return cleaned
+            page_img = page_level(job_dir, input_pdf, page_num, dpi, PREVIEW_MAX_PIXELS)
+            if page_img is None:
+                return None
+            _write_image_atomic(raw_path, page_img)
+            cleaned, angle = clean_page_with_skew(page_img)
+            _write_image_atomic(cleaned_path, cleaned, cleaned_png_params())
+        _record_deskew_angles(job_dir, {os.path.splitext(os.path.basename(cleaned_path))[0]: angle})
+        return cleaned
     except Exception:
         return None
 
 
-def _save_preview_page(page: Image.Image, page_path: str):
+def _save_preview_page(page: Image.Image, page_path: str, writer=None) -> np.ndarray:
     w, h = page.size
     pixels = max(1, w * h)
     if pixels > PREVIEW_MAX_PIXELS:
@@ -666,4 +1070,158 @@ def _save_preview_page(page: Image.Image, page_path: str):
             (max(1, int(w * scale)), max(1, int(h * scale))),
             resample=Image.Resampling.BILINEAR,
         )
-    page.save(page_path)
+    page_img = cv2.cvtColor(np.asarray(page.convert("RGB")), cv2.COLOR_RGB2BGR)
+    if writer is not None:
+        writer.write(page_path, page_img)
+    else:
+        _write_image_atomic(page_path, page_img)
+    return page_img
+
+
+def _write_image_atomic(path: str, img: np.ndarray, params=None):
+    atomic_write_image(path, img, params)
+
+
+def _clean_and_write(
+    writer: "_AsyncImageWriter",
+    cleaned_path: str,
+    page_img: np.ndarray,
+    keep: bool = True,
+) -> Tuple[Optional[np.ndarray], float]:
+    """Clean and queue the PNG write; the array is returned only when keep is set."""
+    cleaned, angle = clean_page_with_skew(page_img)
+    writer.write(cleaned_path, cleaned, cleaned_png_params())
+    return (cleaned if keep else None), angle
+
+
+def _deskew_path(job_dir: str) -> str:
+    return os.path.join(job_dir, "deskew.json")
+
+
+def _read_deskew_angles(job_dir: str) -> Dict[str, float]:
+    path = _deskew_path(job_dir)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _record_deskew_angles(job_dir: str, angles: Dict[str, float]):
+    """Merge per-page deskew angles (degrees, by page name) into jobs/<id>/deskew.json."""
+    if not angles:
+        return
+    path = _deskew_path(job_dir)
+    try:
+        with file_lock(job_dir, path):
+            merged = _read_deskew_angles(job_dir)
+            merged.update({name: float(angle) for name, angle in angles.items()})
+            _write_json_atomic(path, merged)
+    except Exception as exc:
+        logger.warning("[WORKER] Failed to record deskew angles for %s: %s", job_dir, exc)
+
+
+def _page_deskew_angle(job_dir: str, page_name: str, cache: Dict[str, float]) -> Optional[float]:
+    # Pages cleaned on demand during this run are picked up by re-reading on a miss.
+    if page_name not in cache:
+        cache.update(_read_deskew_angles(job_dir))
+    return cache.get(page_name)
+
+
+def _store_layout_page(job_dir: str, page_num: int, layout: Dict):
+    try:
+        write_layout_page(job_dir, page_num, layout)
+    except Exception as exc:
+        logger.warning("[WORKER] Failed to store layout for page %s: %s", page_num, exc)
+
+
+class _LayoutStream:
+    """
+    Page layouts from iter_pdf_layout_pages, pulled in page order as they are
+    requested. A page is kept until released; an extraction failure stops the
+    stream and is kept in `error`, leaving later pages without a layout.
+    """
+
+    def __init__(self, pages):
+        self._pages = pages
+        self._buffered: Dict[int, Dict] = {}
+        self._next_page = 1
+        self.error = None
+
+    def get(self, page_num: int):
+        while self._pages is not None and self._next_page <= page_num:
+            try:
+                layout = next(self._pages)
+            except StopIteration:
+                self._pages = None
+                break
+            except Exception as exc:
+                self.error = str(exc)
+                self._pages = None
+                break
+            self._buffered[self._next_page] = layout
+            self._next_page += 1
+        return self._buffered.get(page_num)
+
+    def head(self, count: int) -> List[Dict]:
+        return [layout for layout in (self.get(i) for i in range(1, count + 1)) if layout is not None]
+
+    def count(self) -> int:
+        while self._pages is not None:
+            self.get(self._next_page)
+        return self._next_page - 1
+
+    def release(self, page_num: int):
+        self._buffered.pop(page_num, None)
+
+    def __iter__(self):
+        page_num = 1
+        while True:
+            layout = self.get(page_num)
+            if layout is None:
+                return
+            yield layout
+            page_num += 1
+
+    def close(self):
+        pages, self._pages = self._pages, None
+        close = getattr(pages, "close", None)
+        if close:
+            close()
+
+
+class _AsyncImageWriter:
+    """
+    Encodes and writes page images on a small thread pool (OpenCV releases
+    the GIL) so rendering/cleaning/OCR do not wait on PNG encoding.
+    Leaving the context flushes all pending writes and re-raises failures.
+    """
+
+    def __init__(self, workers: int = IMAGE_WRITE_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=max(1, int(workers)))
+        self._futures = []
+
+    def write(self, path: str, img: np.ndarray, params=None):
+        self.submit(_write_image_atomic, path, img, params)
+
+    def submit(self, fn, *args):
+        self._futures.append(self._executor.submit(fn, *args))
+
+    def flush(self):
+        futures, self._futures = self._futures, []
+        for future in futures:
+            future.result()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self.flush()
+        finally:
+            self._executor.shutdown(wait=True)
+        return False
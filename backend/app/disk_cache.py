@@ -0,0 +1,91 @@
+import logging
+import os
+import threading
+from typing import Optional
+
+from app.file_utils import atomic_write_bytes
+
+
+logger = logging.getLogger(__name__)
+
+
+class DiskCache:
+    """
+    Size-bounded, content-addressed file store with LRU eviction.
+    Entries live at <root>/<key[:2]>/<key><suffix>; file mtime is the
+    recency stamp, refreshed on every hit, and eviction removes the oldest
+    entries once the directory grows past max_bytes.
+    """
+
+    def __init__(self, root: str, max_bytes: int, suffix: str = "", evict_every: int = 32):
+        self.root = root
+        self.max_bytes = max(0, int(max_bytes))
+        self.suffix = suffix
+        self.evict_every = max(1, int(evict_every))
+        self._puts_since_evict = self.evict_every
+        self._lock = threading.Lock()
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], f"{key}{self.suffix}")
+
+    def get_path(self, key: str) -> Optional[str]:
+        path = self.path_for(key)
+        try:
+            os.utime(path, None)
+        except OSError:
+            return None
+        return path
+
+    def get_bytes(self, key: str) -> Optional[bytes]:
+        path = self.get_path(key)
+        if not path:
+            return None
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def put_bytes(self, key: str, data: bytes) -> str:
+        path = self.path_for(key)
+        atomic_write_bytes(path, data)
+        self._maybe_evict()
+        return path
+
+    def _maybe_evict(self):
+        with self._lock:
+            self._puts_since_evict += 1
+            if self._puts_since_evict < self.evict_every:
+                return
+            self._puts_since_evict = 0
+        try:
+            self.evict()
+        except Exception as exc:
+            logger.warning("Cache eviction failed for %s", self.root, exc_info=exc)
+
+    def evict(self):
+        entries = []
+        total = 0
+        for dirpath, _dirnames, filenames in os.walk(self.root):
+            for name in filenames:
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+        if total <= self.max_bytes:
+            return
+        entries.sort()
+        for _mtime, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                continue
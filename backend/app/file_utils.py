@@ -0,0 +1,77 @@
+"""
+Small filesystem helpers shared by the API and the workers.
+
+atomic_write_* write through a uniquely named temp file and os.replace, so
+readers see either the old file or the complete new one, and concurrent
+writers never share a temp file.
+
+file_lock serializes work on one file across threads and processes with an
+fcntl lock. Lock files live in jobs/<id>/.locks/, never next to the files
+they guard, so cleaned/, preview/ and tool_chain/ hold only their own output.
+"""
+import fcntl
+import hashlib
+import json
+import os
+import uuid
+from contextlib import contextmanager
+
+import cv2
+import numpy as np
+
+
+LOCK_DIR_NAME = ".locks"
+
+
+def atomic_write_bytes(path: str, data: bytes):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def atomic_write_json(path: str, payload, **dump_kwargs):
+    atomic_write_bytes(path, json.dumps(payload, **dump_kwargs).encode("utf-8"))
+
+
+def atomic_write_image(path: str, img: np.ndarray, params=None):
+    """Encode img in the format of path's extension (PNG when it has none) and write it atomically."""
+    ext = os.path.splitext(path)[1] or ".png"
+    ok, buf = cv2.imencode(ext, img, params or [])
+    if not ok:
+        raise RuntimeError(f"image_encode_failed:{path}")
+    atomic_write_bytes(path, buf.tobytes())
+
+
+def lock_path(job_dir: str, path: str) -> str:
+    rel = os.path.relpath(os.path.abspath(path), os.path.abspath(job_dir))
+    if rel.startswith(os.pardir):
+        # Not inside the job: key the lock by the absolute path instead.
+        rel = hashlib.blake2b(os.path.abspath(path).encode("utf-8"), digest_size=16).hexdigest()
+    return os.path.join(job_dir, LOCK_DIR_NAME, f"{rel.replace(os.sep, '__')}.lock")
+
+
+@contextmanager
+def file_lock(job_dir: str, path: str):
+    """
+    Exclusive advisory lock on path (inside job_dir), shared by threads and
+    processes. Not reentrant. path's directory is created so the holder can
+    write it.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    target = lock_path(job_dir, path)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with open(target, "a") as handle:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
@@ -0,0 +1,303 @@
+"""
+Interactive page edits (image tools and flatten) with versioned results.
+
+Each page keeps an edit chain in jobs/<id>/tool_chain/<page>.json: the hash
+of the base image the chain started from, the ordered steps, and a position
+(how many steps are applied). The base image itself is kept next to it as
+<page>.base.png. Every prefix of a chain is rendered at most once and stored
+in a shared DiskCache keyed by (base hash, steps), so repeating an edit,
+undo and redo are cache lookups instead of OpenCV work. Live previews run
+the same chain on a downscaled proxy of the base (<page>.proxy.png), cached
+under their own keys.
+"""
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+
+from app.disk_cache import DiskCache
+from app.file_utils import atomic_write_image, atomic_write_json
+from app.image_cleaner import DESKEW_MAX_ANGLE, estimate_skew, rotate_page
+
+
+IMAGE_TOOL_CACHE_DIR = os.getenv("IMAGE_TOOL_CACHE_DIR") or os.path.join(os.getenv("DATA_DIR", "./data"), "cache", "image_tools")
+IMAGE_TOOL_CACHE_MAX_MB = int(os.getenv("IMAGE_TOOL_CACHE_MAX_MB", "1024"))
+IMAGE_TOOL_PROXY_MAX_SIDE = int(os.getenv("IMAGE_TOOL_PROXY_MAX_SIDE", "1000"))
+IMAGE_TOOL_PROXY_QUALITY = int(os.getenv("IMAGE_TOOL_PROXY_QUALITY", "80"))
+
+# Bump when a tool's output changes so stale cache entries stop matching.
+IMAGE_TOOL_CACHE_VERSION = "2"
+
+IMAGE_TOOLS = {
+    "deskew",
+    "contrast",
+    "binarize",
+    "denoise",
+    "sharpen",
+    "remove_lines",
+    "reset",
+}
+
+# The manual tool corrects more than the automatic pass in clean_page.
+_TOOL_DESKEW_MAX_ANGLE = 15.0
+
+# Fast PNG compression: cache entries are written far more often than read twice.
+_CACHE_PNG_PARAMS = [cv2.IMWRITE_PNG_COMPRESSION, 1]
+
+_derived_cache = DiskCache(IMAGE_TOOL_CACHE_DIR, IMAGE_TOOL_CACHE_MAX_MB * 1024 * 1024, suffix=".png")
+
+
+def file_digest(path: str) -> str:
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def tool_step(tool: str) -> Dict:
+    return {"tool": tool}
+
+
+def flatten_step(points) -> Dict:
+    # Points are normalized (0..1) corners; rounding keeps equal edits on one key.
+    return {"tool": "flatten", "points": [[round(float(p.x), 6), round(float(p.y), 6)] for p in points]}
+
+
+def chain_key(base_hash: str, steps: List[Dict]) -> str:
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(IMAGE_TOOL_CACHE_VERSION.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(base_hash.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(json.dumps(steps, sort_keys=True, separators=(",", ":")).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def chain_path(job_dir: str, page_name: str) -> str:
+    return os.path.join(job_dir, "tool_chain", f"{page_name}.json")
+
+
+def chain_base_path(job_dir: str, page_name: str) -> str:
+    return os.path.join(job_dir, "tool_chain", f"{page_name}.base.png")
+
+
+def chain_proxy_path(job_dir: str, page_name: str) -> str:
+    return os.path.join(job_dir, "tool_chain", f"{page_name}.proxy.png")
+
+
+def load_tool_chain(job_dir: str, page_name: str) -> Optional[Dict]:
+    path = chain_path(job_dir, page_name)
+    if not os.path.exists(path) or not os.path.exists(chain_base_path(job_dir, page_name)):
+        return None
+    try:
+        with open(path) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(state, dict) or not isinstance(state.get("steps"), list):
+        return None
+    return state
+
+
+def save_tool_chain(job_dir: str, page_name: str, state: Dict):
+    atomic_write_json(chain_path(job_dir, page_name), state)
+
+
+def start_tool_chain(job_dir: str, page_name: str, base_img: np.ndarray) -> Dict:
+    """Begin a new edit chain from base_img; earlier history for the page is dropped."""
+    path = chain_base_path(job_dir, page_name)
+    write_png(path, base_img)
+    try:
+        os.remove(chain_proxy_path(job_dir, page_name))
+    except FileNotFoundError:
+        pass
+    state = {"base_hash": file_digest(path), "steps": [], "position": 0, "output_hash": None}
+    save_tool_chain(job_dir, page_name, state)
+    return state
+
+
+def push_step(state: Dict, step: Dict) -> Dict:
+    """Append step after the current position, discarding any redo tail."""
+    steps = list(state.get("steps") or [])[: int(state.get("position") or 0)]
+    steps.append(step)
+    return {**state, "steps": steps, "position": len(steps)}
+
+
+def render_tool_chain(job_dir: str, page_name: str, state: Dict, proxy: bool = False) -> np.ndarray:
+    """
+    Return the image for the chain's current position, at full resolution or
+    on the downscaled proxy. Starts from the longest cached prefix and caches
+    every step it has to compute. Raises ValueError for an unknown tool or
+    unusable flatten points.
+    """
+    base_hash = str(state.get("base_hash") or "")
+    if proxy:
+        base_hash = f"{base_hash}:proxy:{IMAGE_TOOL_PROXY_MAX_SIDE}"
+    steps = list(state.get("steps") or [])[: int(state.get("position") or 0)]
+
+    img = None
+    start = 0
+    for n in range(len(steps), 0, -1):
+        data = _derived_cache.get_bytes(chain_key(base_hash, steps[:n]))
+        if data is None:
+            continue
+        img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if img is not None:
+            start = n
+            break
+    if img is None:
+        img = _proxy_base(job_dir, page_name) if proxy else cv2.imread(chain_base_path(job_dir, page_name))
+        if img is None:
+            raise FileNotFoundError(chain_base_path(job_dir, page_name))
+
+    for n in range(start, len(steps)):
+        img = apply_step(img, steps[n])
+        ok, buf = cv2.imencode(".png", img, _CACHE_PNG_PARAMS)
+        if ok:
+            _derived_cache.put_bytes(chain_key(base_hash, steps[: n + 1]), buf.tobytes())
+    return img
+
+
+def encode_proxy(img: np.ndarray) -> bytes:
+    ok, buf = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, IMAGE_TOOL_PROXY_QUALITY])
+    if not ok:
+        raise RuntimeError("image_encode_failed:proxy")
+    return buf.tobytes()
+
+
+def _proxy_base(job_dir: str, page_name: str) -> Optional[np.ndarray]:
+    path = chain_proxy_path(job_dir, page_name)
+    img = cv2.imread(path)
+    if img is not None:
+        return img
+    base = cv2.imread(chain_base_path(job_dir, page_name))
+    if base is None:
+        return None
+    h, w = base.shape[:2]
+    scale = IMAGE_TOOL_PROXY_MAX_SIDE / float(max(h, w))
+    if scale >= 1.0:
+        return base
+    img = cv2.resize(base, (max(1, int(round(w * scale))), max(1, int(round(h * scale)))), interpolation=cv2.INTER_AREA)
+    write_png(path, img, _CACHE_PNG_PARAMS)
+    return img
+
+
+def apply_step(img: np.ndarray, step: Dict) -> np.ndarray:
+    tool = str(step.get("tool") or "")
+    if tool == "flatten":
+        warped = warp_by_points(img, step.get("points") or [])
+        if warped is None:
+            raise ValueError("invalid_corner_points")
+        return warped
+    return apply_image_tool(img, tool)
+
+
+def deskew_image(img: np.ndarray) -> np.ndarray:
+    if img is None or img.size == 0:
+        return img
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if len(img.shape) == 3 else img
+    angle = estimate_skew(gray, max_angle=max(DESKEW_MAX_ANGLE, _TOOL_DESKEW_MAX_ANGLE))
+    if not angle:
+        return img
+    return rotate_page(img, angle, cv2.INTER_CUBIC)
+
+
+def remove_grid_lines(gray: np.ndarray) -> np.ndarray:
+    h, w = gray.shape[:2]
+    if h <= 0 or w <= 0:
+        return gray
+
+    inv = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)[1]
+    h_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (max(20, w // 28), 1))
+    v_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, max(20, h // 28)))
+    h_lines = cv2.morphologyEx(inv, cv2.MORPH_OPEN, h_kernel)
+    v_lines = cv2.morphologyEx(inv, cv2.MORPH_OPEN, v_kernel)
+    lines = cv2.bitwise_or(h_lines, v_lines)
+    if cv2.countNonZero(lines) == 0:
+        return gray
+    return cv2.inpaint(gray, lines, 3, cv2.INPAINT_TELEA)
+
+
+def apply_image_tool(img_bgr: np.ndarray, tool: str) -> np.ndarray:
+    gray = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2GRAY)
+
+    if tool == "deskew":
+        return deskew_image(img_bgr)
+
+    if tool == "contrast":
+        lab = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2LAB)
+        l, a, b = cv2.split(lab)
+        l = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8)).apply(l)
+        return cv2.cvtColor(cv2.merge((l, a, b)), cv2.COLOR_LAB2BGR)
+
+    if tool == "binarize":
+        bw = cv2.adaptiveThreshold(
+            gray,
+            255,
+            cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+            cv2.THRESH_BINARY,
+            31,
+            11,
+        )
+        return cv2.cvtColor(bw, cv2.COLOR_GRAY2BGR)
+
+    if tool == "denoise":
+        return cv2.fastNlMeansDenoisingColored(img_bgr, None, 8, 8, 7, 21)
+
+    if tool == "sharpen":
+        kernel = np.array([[0, -1, 0], [-1, 5, -1], [0, -1, 0]], dtype=np.float32)
+        return cv2.filter2D(img_bgr, -1, kernel)
+
+    if tool == "remove_lines":
+        no_lines = remove_grid_lines(gray)
+        return cv2.cvtColor(no_lines, cv2.COLOR_GRAY2BGR)
+
+    raise ValueError("unsupported_image_tool")
+
+
+def _order_points(pts: np.ndarray) -> np.ndarray:
+    rect = np.zeros((4, 2), dtype=np.float32)
+    s = pts.sum(axis=1)
+    diff = np.diff(pts, axis=1)
+    rect[0] = pts[np.argmin(s)]  # top-left
+    rect[2] = pts[np.argmax(s)]  # bottom-right
+    rect[1] = pts[np.argmin(diff)]  # top-right
+    rect[3] = pts[np.argmax(diff)]  # bottom-left
+    return rect
+
+
+def warp_by_points(img: np.ndarray, points) -> np.ndarray | None:
+    """points: four normalized (x, y) pairs, in any order."""
+    h, w = img.shape[:2]
+    pts = np.array([[float(x) * w, float(y) * h] for x, y in points], dtype=np.float32)
+    if pts.shape != (4, 2):
+        return None
+
+    rect = _order_points(pts)
+    (tl, tr, br, bl) = rect
+
+    width_a = np.linalg.norm(br - bl)
+    width_b = np.linalg.norm(tr - tl)
+    max_w = int(max(width_a, width_b))
+
+    height_a = np.linalg.norm(tr - br)
+    height_b = np.linalg.norm(tl - bl)
+    max_h = int(max(height_a, height_b))
+
+    if max_w < 10 or max_h < 10:
+        return None
+
+    dst = np.array(
+        [[0, 0], [max_w - 1, 0], [max_w - 1, max_h - 1], [0, max_h - 1]],
+        dtype=np.float32,
+    )
+    matrix = cv2.getPerspectiveTransform(rect, dst)
+    return cv2.warpPerspective(img, matrix, (max_w, max_h))
+
+
+def write_png(path: str, img: np.ndarray, params=None):
+    atomic_write_image(path, img, params)
@@ -0,0 +1,77 @@
+"""
+Per-job store of text-layer page layouts.
+
+process_pdf saves each page's pdftotext layout as jobs/<id>/layout/page_NNN.json
+with words packed as [text, x1, y1, x2, y2] rows, so single-page operations
+read one small file instead of extracting the whole document again. Pages
+missing from the store are extracted on their own (pdftotext -f/-l) and
+saved on first use.
+"""
+import json
+import logging
+import os
+from typing import Dict, Optional
+
+from app.file_utils import atomic_write_json
+from app.pdf_text_extract import extract_pdf_layout_page
+
+
+logger = logging.getLogger(__name__)
+
+
+def layout_page_path(job_dir: str, page_num: int) -> str:
+    return os.path.join(job_dir, "layout", f"page_{page_num:03}.json")
+
+
+def write_layout_page(job_dir: str, page_num: int, layout: Dict) -> str:
+    path = layout_page_path(job_dir, page_num)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    packed = {
+        "width": float(layout.get("width", 1)),
+        "height": float(layout.get("height", 1)),
+        "words": [
+            [str(w.get("text") or ""), float(w.get("x1", 0)), float(w.get("y1", 0)), float(w.get("x2", 0)), float(w.get("y2", 0))]
+            for w in layout.get("words", []) or []
+        ],
+    }
+    atomic_write_json(path, packed, separators=(",", ":"))
+    return path
+
+
+def read_layout_page(job_dir: str, page_num: int) -> Optional[Dict]:
+    path = layout_page_path(job_dir, page_num)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path) as f:
+            packed = json.load(f)
+        words = [
+            {"text": text, "x1": x1, "y1": y1, "x2": x2, "y2": y2}
+            for text, x1, y1, x2, y2 in packed.get("words", [])
+        ]
+        return {
+            "width": float(packed.get("width", 1)),
+            "height": float(packed.get("height", 1)),
+            "words": words,
+            "text": " ".join(w["text"] for w in words),
+        }
+    except (OSError, ValueError, TypeError, AttributeError):
+        return None
+
+
+def load_layout_page(job_dir: str, input_pdf: str, page_num: int) -> Optional[Dict]:
+    """Stored layout for page_num, extracting and storing just that page when it is missing."""
+    if page_num <= 0:
+        return None
+    layout = read_layout_page(job_dir, page_num)
+    if layout is not None:
+        return layout
+    if not os.path.exists(input_pdf):
+        return None
+    layout = extract_pdf_layout_page(input_pdf, page_num)
+    if layout is not None:
+        try:
+            write_layout_page(job_dir, page_num, layout)
+        except OSError as exc:
+            logger.warning("Failed to store layout for %s page %s", job_dir, page_num, exc_info=exc)
+    return layout
@@ -1,7 +1,8 @@
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request, Depends
-from fastapi.responses import HTMLResponse, FileResponse
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request, Depends, BackgroundTasks
+from fastapi.responses import HTMLResponse, FileResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
 import uuid, os, json, time
 import datetime as dt
@@ -11,21 +12,45 @@ import shutil
 import cv2
 import numpy as np
 import math
-import pytesseract
-from pdf2image import convert_from_path
-from PIL import Image
 
-from app.celery_app import process_pdf, prepare_draft
+from app.celery_app import ensure_draft_page, process_pdf, prepare_draft
 from app.bank_profiles import PROFILES, detect_bank_profile, extract_account_identity, find_value_bounds, reload_profiles
-from app.ocr_engine import ocr_image
-from app.pdf_text_extract import extract_pdf_layout_pages
+from app.ocr_engine import ocr_image, ocr_images
+from app.ocr_result import OcrPage, ocr_items_to_words, read_ocr_page, write_ocr_page
+from app.layout_store import load_layout_page
+from app.file_utils import atomic_write_json, file_lock
+from app.page_pyramid import FALLBACK_PREVIEW_DPI, ensure_page_image, page_level
+from app.pdf_renderer import open_pdf_renderer
+from app.pdf_preflight import preflight_pdf, preflight_summary, read_preflight, write_preflight
+from app.page_tiles import get_pdf_thumbnail_path, get_thumbnail_path, get_tile_path, tile_info, tile_media_type
 from app.profile_analyzer import (
     analyze_account_identity_from_text,
     analyze_unknown_bank_and_apply,
     analyze_unknown_bank_and_apply_guided,
 )
-from app.statement_parser import normalize_amount, normalize_date, parse_page_with_profile_fallback, is_transaction_row
-from app.image_cleaner import clean_page
+from app.statement_parser import (
+    is_transaction_row,
+    normalize_amount,
+    normalize_date,
+    ocr_rows_preferred,
+    parse_page_with_profile_fallback,
+    route_page_source,
+)
+from app.image_cleaner import clean_page, cleaned_png_params
+from app.image_tools import (
+    IMAGE_TOOLS,
+    chain_path,
+    encode_proxy,
+    file_digest,
+    flatten_step,
+    load_tool_chain,
+    push_step,
+    render_tool_chain,
+    save_tool_chain,
+    start_tool_chain,
+    tool_step,
+    write_png,
+)
 from app.auth_service import (
     AuthUser,
     JWT_SECRET,
@@ -76,7 +101,6 @@ DATA_DIR = os.getenv("DATA_DIR", "./data")
 PREVIEW_MAX_PIXELS = int(os.getenv("PREVIEW_MAX_PIXELS", "6000000"))
 TOOL_IMAGE_DPI = int(os.getenv("TOOL_IMAGE_DPI", "220"))
 TOOL_IMAGE_MAX_PIXELS = int(os.getenv("TOOL_IMAGE_MAX_PIXELS", "16000000"))
-FALLBACK_PREVIEW_DPI = int(os.getenv("FALLBACK_PREVIEW_DPI", "130"))
 AI_ANALYZER_ENABLED = str(os.getenv("AI_ANALYZER_ENABLED", "true")).strip().lower() not in {"0", "false", "no"}
 AI_ANALYZER_PROVIDER = str(os.getenv("AI_ANALYZER_PROVIDER", "gemini")).strip().lower() or "gemini"
 AI_ANALYZER_MODEL = str(os.getenv("AI_ANALYZER_MODEL", "gemini-2.5-flash")).strip() or "gemini-2.5-flash"
@@ -91,8 +115,20 @@ app = FastAPI(title="OCR Passbook / SOA API")
 logger = logging.getLogger(__name__)
 
 
+def _run_preflight(job_dir: str, pdf_path: str) -> Optional[Dict]:
+    """Probe an uploaded PDF, store preflight.json and return its status summary (None on failure)."""
+    try:
+        preflight = preflight_pdf(pdf_path)
+        write_preflight(job_dir, preflight)
+    except Exception as exc:
+        logger.warning("PDF preflight failed for %s", job_dir, exc_info=exc)
+        return None
+    return preflight_summary(preflight)
+
+
 def _normalize_parse_mode(mode: str | None) -> str:
-    return "ocr" if str(mode or "").strip().lower() == "ocr" else "text"
+    mode = str(mode or "").strip().lower()
+    return mode if mode in {"ocr", "auto"} else "text"
 
 
 @app.on_event("startup")
@@ -347,10 +383,7 @@ def _write_page_editor_state(submission: Submission, page_key: str, guide_state:
         pages = {}
         payload["pages"] = pages
     pages[str(page_key)] = _sanitize_editor_guide_state(guide_state)
-    tmp_path = f"{path}.tmp"
-    with open(tmp_path, "w") as f:
-        json.dump(payload, f, indent=2)
-    os.replace(tmp_path, path)
+    atomic_write_json(path, payload, indent=2)
 
 
 def _sample_detected_profiles(layout_pages: List[Dict], max_pages: int) -> List[str]:
@@ -365,30 +398,6 @@ def _sample_detected_profiles(layout_pages: List[Dict], max_pages: int) -> List[
     return names
 
 
-def _ocr_items_to_words(ocr_items: List[Dict]) -> List[Dict]:
-    words: List[Dict] = []
-    for item in ocr_items:
-        bbox = item.get("bbox") or []
-        text = str(item.get("text") or "").strip()
-        if len(bbox) != 4 or not text:
-            continue
-        try:
-            xs = [float(pt[0]) for pt in bbox]
-            ys = [float(pt[1]) for pt in bbox]
-        except Exception:
-            continue
-        words.append(
-            {
-                "text": text,
-                "x1": float(min(xs)),
-                "y1": float(min(ys)),
-                "x2": float(max(xs)),
-                "y2": float(max(ys)),
-            }
-        )
-    return words
-
-
 def _build_layout_pages_from_ocr(job_dir: str, sample_pages: int) -> List[Dict]:
     cleaned_dir = os.path.join(job_dir, "cleaned")
     pages_dir = os.path.join(job_dir, "pages")
@@ -400,31 +409,49 @@ def _build_layout_pages_from_ocr(job_dir: str, sample_pages: int) -> List[Dict]:
     if not page_files and os.path.isdir(pages_dir):
         page_files = sorted(f for f in os.listdir(pages_dir) if f.endswith(".png"))
 
+    def _page_image_path(page_file: str) -> Optional[str]:
+        image_path = os.path.join(cleaned_dir, page_file)
+        if not os.path.exists(image_path):
+            image_path = os.path.join(pages_dir, page_file)
+        return image_path if os.path.exists(image_path) else None
+
+    def _read_cached_ocr(page_key: str) -> List[Dict]:
+        cached = read_ocr_page(ocr_dir, page_key)
+        return cached.to_items() if cached is not None else []
+
+    # OCR the first sample pages without cached results in one batched call.
+    batched_ocr: Dict[str, List[Dict]] = {}
+    pending = []
+    for page_file in page_files[:max(1, sample_pages)]:
+        image_path = _page_image_path(page_file)
+        page_key = page_file.replace(".png", "")
+        if image_path and not _read_cached_ocr(page_key):
+            pending.append((page_key, image_path))
+    if pending:
+        try:
+            results = ocr_images([path for _, path in pending], backend="easyocr")
+            batched_ocr = {page_key: items for (page_key, _), items in zip(pending, results)}
+        except Exception as exc:
+            logger.warning("Batched OCR sampling failed for analyzer in %s", job_dir, exc_info=exc)
+
     layouts: List[Dict] = []
     for page_file in page_files:
         if len(layouts) >= max(1, sample_pages):
             break
         page_key = page_file.replace(".png", "")
-        image_path = os.path.join(cleaned_dir, page_file)
-        if not os.path.exists(image_path):
-            image_path = os.path.join(pages_dir, page_file)
-        if not os.path.exists(image_path):
+        image_path = _page_image_path(page_file)
+        if not image_path:
             continue
 
-        ocr_items: List[Dict] = []
-        ocr_json_path = os.path.join(ocr_dir, f"{page_key}.json")
-        if os.path.exists(ocr_json_path):
-            cached = _read_json_if_exists(ocr_json_path, [])
-            if isinstance(cached, list):
-                ocr_items = cached
-        if not ocr_items:
+        ocr_items: List[Dict] = _read_cached_ocr(page_key) or batched_ocr.get(page_key, [])
+        if not ocr_items and page_key not in batched_ocr:
             try:
                 ocr_items = ocr_image(image_path, backend="easyocr")
             except Exception as exc:
                 logger.warning("OCR sampling failed for analyzer at %s", image_path, exc_info=exc)
                 ocr_items = []
 
-        words = _ocr_items_to_words(ocr_items)
+        words = ocr_items_to_words(ocr_items)
         text = " ".join(str(item.get("text") or "").strip() for item in ocr_items if str(item.get("text") or "").strip()).strip()
         if not text and not words:
             continue
@@ -844,10 +871,11 @@ async def create_job(
     pdf_path = os.path.join(input_dir, "document.pdf")
     with open(pdf_path, "wb") as f:
         f.write(await file.read())
+    preflight = await run_in_threadpool(_run_preflight, job_dir, pdf_path)
 
     # Initial status (atomic write happens in worker later)
     with open(os.path.join(job_dir, "status.json"), "w") as f:
-        json.dump({"status": "queued", "step": "queued", "progress": 0, "parse_mode": parse_mode}, f)
+        json.dump({"status": "queued", "step": "queued", "progress": 0, "parse_mode": parse_mode, "preflight": preflight}, f)
 
     logger.info("Created standalone job %s by user %s (%s)", job_id, user.email, user.role)
 
@@ -864,13 +892,14 @@ async def create_job(
                     step="queued",
                     progress=0,
                     parse_mode=parse_mode,
+                    diagnostics_json={"preflight": preflight},
                 )
             )
             db.commit()
     finally:
         db.close()
 
-    return {"job_id": job_id, "parse_mode": parse_mode}
+    return {"job_id": job_id, "parse_mode": parse_mode, "preflight": preflight}
 
 
 @app.post("/jobs/draft")
@@ -901,6 +930,7 @@ async def create_draft_job(
     pdf_path = os.path.join(input_dir, "document.pdf")
     with open(pdf_path, "wb") as f:
         f.write(await file.read())
+    preflight = await run_in_threadpool(_run_preflight, job_dir, pdf_path)
 
     with open(os.path.join(job_dir, "status.json"), "w") as f:
         json.dump(
@@ -910,6 +940,7 @@ async def create_draft_job(
                 "progress": 1,
                 "ocr_backend": "easyocr",
                 "parse_mode": parse_mode,
+                "preflight": preflight,
             },
             f,
         )
@@ -927,6 +958,7 @@ async def create_draft_job(
                     step="draft_queued",
                     progress=1,
                     parse_mode=parse_mode,
+                    diagnostics_json={"preflight": preflight},
                 )
             )
             db.commit()
@@ -967,7 +999,16 @@ def start_job_from_draft(job_id: uuid.UUID, user: AuthUser = Depends(get_current
         return {"job_id": job_id_str, "started": False, "parse_mode": parse_mode}
 
     with open(status_path, "w") as f:
-        json.dump({"status": "queued", "step": "queued", "progress": 0, "parse_mode": parse_mode}, f)
+        json.dump(
+            {
+                "status": "queued",
+                "step": "queued",
+                "progress": 0,
+                "parse_mode": parse_mode,
+                "preflight": preflight_summary(read_preflight(job_dir)),
+            },
+            f,
+        )
 
     db = SessionLocal()
     try:
@@ -1038,7 +1079,7 @@ async def agent_create_submission(
     parse_mode = _normalize_parse_mode(mode)
     job_id = uuid.uuid4()
     blob_key = f"jobs/{job_id}/input/document.pdf"
-    write_blob(blob_key, await file.read())
+    pdf_path = write_blob(blob_key, await file.read())
 
     sub, job = create_submission_with_job(
         agent_user=user,
@@ -1057,9 +1098,10 @@ async def agent_create_submission(
             json.dump({"original_filename": file.filename}, f)
     except Exception as exc:
         logger.warning("Failed to write meta.json for submission job %s", job_id, exc_info=exc)
+    preflight = await run_in_threadpool(_run_preflight, job_dir, pdf_path)
     status_path = os.path.join(job_dir, "status.json")
     with open(status_path, "w") as f:
-        json.dump({"status": "for_review", "step": "for_review", "progress": 0, "parse_mode": parse_mode}, f)
+        json.dump({"status": "for_review", "step": "for_review", "progress": 0, "parse_mode": parse_mode, "preflight": preflight}, f)
 
     return {"submission_id": str(sub.id), "job_id": str(job.id), "status": sub.status}
 
@@ -1739,6 +1781,11 @@ def list_cleaned(job_id: uuid.UUID, user: AuthUser = Depends(get_current_user)):
     if not os.path.exists(cleaned_dir):
         return {"pages": []}
 
+    lazy_pages = _lazy_draft_page_count(os.path.join(DATA_DIR, "jobs", job_id_str))
+    if lazy_pages:
+        # Pages of a lazy draft are listed before they are prepared.
+        return {"pages": [f"page_{i:03}.png" for i in range(1, lazy_pages + 1)]}
+
     files = sorted(
         f for f in os.listdir(cleaned_dir)
         if f.endswith(".png")
@@ -1766,7 +1813,10 @@ def get_cleaned(job_id: uuid.UUID, filename: str, user: AuthUser = Depends(get_c
     job_id_str = str(job_id)
     path = os.path.join(DATA_DIR, "jobs", job_id_str, "cleaned", filename)
 
-    if not os.path.exists(path):
+    if not os.path.exists(path) and not _ensure_lazy_draft_page(job_id_str, filename):
+        if _lazy_draft_page_count(os.path.join(DATA_DIR, "jobs", job_id_str)):
+            # Only cleaned renders belong in cleaned/; OCR reads them as such.
+            raise HTTPException(status_code=404, detail="Image not found")
         generated = _generate_preview_page_if_missing(job_id_str, filename, path)
         if not generated:
             raise HTTPException(status_code=404, detail="Image not found")
@@ -1778,35 +1828,121 @@ def get_cleaned(job_id: uuid.UUID, filename: str, user: AuthUser = Depends(get_c
 def get_page_preview(job_id: uuid.UUID, page: str, user: AuthUser = Depends(get_current_user)):
     job = _get_job_record_or_404(job_id)
     _authorize_job_access(job, user, write=False)
-    job_id_str = str(job_id)
+    path = _resolve_preview_source(str(job_id), page)
+    if not path:
+        raise HTTPException(status_code=404, detail="Preview page not found")
+    return FileResponse(path, media_type="image/png")
+
+
+@app.get("/jobs/{job_id}/tiles/{page}/info")
+def get_page_tile_info(job_id: uuid.UUID, page: str, user: AuthUser = Depends(get_current_user)):
+    job = _get_job_record_or_404(job_id)
+    _authorize_job_access(job, user, write=False)
+    source_path = _resolve_preview_source(str(job_id), page)
+    if not source_path:
+        raise HTTPException(status_code=404, detail="Preview page not found")
+    try:
+        return tile_info(source_path, os.path.join(DATA_DIR, "jobs", str(job_id)), _preview_page_name(page))
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Preview page not found")
+
+
+@app.get("/jobs/{job_id}/tiles/{page}/{level}/{col}/{row}")
+def get_page_tile(job_id: uuid.UUID, page: str, level: int, col: int, row: int, user: AuthUser = Depends(get_current_user)):
+    job = _get_job_record_or_404(job_id)
+    _authorize_job_access(job, user, write=False)
+    source_path = _resolve_preview_source(str(job_id), page)
+    if not source_path:
+        raise HTTPException(status_code=404, detail="Preview page not found")
+    tile_path = get_tile_path(source_path, os.path.join(DATA_DIR, "jobs", str(job_id)), _preview_page_name(page), level, col, row)
+    if not tile_path:
+        raise HTTPException(status_code=404, detail="tile_not_found")
+    return FileResponse(tile_path, media_type=tile_media_type())
+
+
+@app.get("/jobs/{job_id}/thumbnails/{page}")
+def get_page_thumbnail(job_id: uuid.UUID, page: str, user: AuthUser = Depends(get_current_user)):
+    job = _get_job_record_or_404(job_id)
+    _authorize_job_access(job, user, write=False)
+    job_dir = os.path.join(DATA_DIR, "jobs", str(job_id))
+    page_name = _preview_page_name(page)
+    source_path = next(
+        (
+            path
+            for path in (os.path.join(job_dir, "cleaned", f"{page_name}.png"), os.path.join(job_dir, "preview", f"{page_name}.png"))
+            if os.path.exists(path)
+        ),
+        None,
+    )
+    if source_path:
+        thumb_path = get_thumbnail_path(source_path, job_dir, page_name)
+    else:
+        # No page image yet: render the thumbnail small instead of a full preview first.
+        page_token = page_name.replace("page_", "")
+        thumb_path = get_pdf_thumbnail_path(job_dir, page_name, int(page_token)) if page_token.isdigit() else None
+    if not thumb_path:
+        raise HTTPException(status_code=404, detail="Preview page not found")
+    return FileResponse(thumb_path, media_type=tile_media_type())
+
+
+def _preview_page_name(page: str) -> str:
     page_name = page if page.startswith("page_") else f"page_{page}"
-    filename = f"{page_name}.png" if not page_name.endswith(".png") else page_name
-    job_dir = os.path.join(DATA_DIR, "jobs", job_id_str)
-    cleaned_path = os.path.join(job_dir, "cleaned", filename)
-    preview_dir = os.path.join(job_dir, "preview")
-    preview_path = os.path.join(preview_dir, filename)
+    return page_name[:-4] if page_name.endswith(".png") else page_name
 
-    if os.path.exists(cleaned_path):
-        return FileResponse(cleaned_path, media_type="image/png")
 
+def _resolve_preview_source(job_id: str, page: str) -> Optional[str]:
+    """Cleaned page when present, otherwise the (lazily rendered) preview; None if unavailable."""
+    filename = f"{_preview_page_name(page)}.png"
+    job_dir = os.path.join(DATA_DIR, "jobs", job_id)
+    cleaned_path = os.path.join(job_dir, "cleaned", filename)
+    if os.path.exists(cleaned_path) or _ensure_lazy_draft_page(job_id, filename):
+        return cleaned_path
+
+    preview_path = os.path.join(job_dir, "preview", filename)
     if not os.path.exists(preview_path):
-        ok = _generate_preview_page_if_missing(job_id_str, filename, preview_path)
-        if not ok:
-            raise HTTPException(status_code=404, detail="Preview page not found")
+        if not _generate_preview_page_if_missing(job_id, filename, preview_path):
+            return None
+    return preview_path
+
+
+def _lazy_draft_page_count(job_dir: str) -> int:
+    """Total pages of a lazy draft (see prepare_draft), or 0 for any other job."""
+    preprocess = _read_json_if_exists(os.path.join(job_dir, "preprocess.json"), {})
+    if not isinstance(preprocess, dict) or not preprocess.get("lazy_draft"):
+        return 0
+    pages = _coerce_progress(preprocess.get("pages"), 0)
+    if pages:
+        return pages
+    # Drafts prepared before the count was recorded: ask the PDF, not status.json,
+    # which loses the count once the job is queued or fails.
+    try:
+        with open_pdf_renderer(os.path.join(job_dir, "input", "document.pdf")) as renderer:
+            return renderer.page_count()
+    except Exception as exc:
+        logger.warning("Could not count lazy draft pages in %s", job_dir, exc_info=exc)
+        return 0
+
+
+def _ensure_lazy_draft_page(job_id: str, filename: str) -> bool:
+    """Prepare a not-yet-cleaned lazy draft page on first view."""
+    job_dir = os.path.join(DATA_DIR, "jobs", job_id)
+    page_token = filename.replace(".png", "").replace("page_", "")
+    if not page_token.isdigit():
+        return False
+    page_num = int(page_token)
+    if not 0 < page_num <= _lazy_draft_page_count(job_dir):
+        return False
+    return ensure_draft_page(job_dir, page_num) is not None
 
-    return FileResponse(preview_path, media_type="image/png")
 
 @app.get("/jobs/{job_id}/ocr/{page}")
 def get_ocr(job_id: uuid.UUID, page: str, user: AuthUser = Depends(get_current_user)):
     job = _get_job_record_or_404(job_id)
     _authorize_job_access(job, user, write=False)
-    path = os.path.join(DATA_DIR, "jobs", str(job_id), "ocr", f"{page}.json")
-
-    if not os.path.exists(path):
+    ocr_page = read_ocr_page(os.path.join(DATA_DIR, "jobs", str(job_id), "ocr"), page)
+    if ocr_page is None:
         raise HTTPException(status_code=404, detail="OCR not ready")
-
-    with open(path) as f:
-        return json.load(f)
+    return ocr_page.to_items()
     
 
 @app.get("/jobs/{job_id}/rows/{page}/bounds")
@@ -1972,111 +2108,11 @@ class ImageToolRequest(BaseModel):
     tool: str = Field(min_length=1, max_length=32)
 
 
-IMAGE_TOOLS = {
-    "deskew",
-    "contrast",
-    "binarize",
-    "denoise",
-    "sharpen",
-    "remove_lines",
-    "reset",
-}
-
-
 def _normalize_page_name(page: str) -> str:
     value = str(page or "").strip()
     return value if value.startswith("page_") else f"page_{value.zfill(3)}"
 
 
-def _estimate_skew_angle(gray: np.ndarray) -> float:
-    try:
-        inv = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)[1]
-        coords = np.column_stack(np.where(inv > 0))
-        if coords.size == 0:
-            return 0.0
-        angle = float(cv2.minAreaRect(coords.astype(np.float32))[-1])
-        if angle < -45.0:
-            angle = -(90.0 + angle)
-        else:
-            angle = -angle
-        if abs(angle) < 0.05:
-            return 0.0
-        return angle
-    except Exception:
-        return 0.0
-
-
-def _deskew_image(img: np.ndarray) -> np.ndarray:
-    if img is None or img.size == 0:
-        return img
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if len(img.shape) == 3 else img
-    angle = _estimate_skew_angle(gray)
-    if abs(angle) < 0.05:
-        return img
-    h, w = gray.shape[:2]
-    matrix = cv2.getRotationMatrix2D((w / 2.0, h / 2.0), angle, 1.0)
-    return cv2.warpAffine(
-        img,
-        matrix,
-        (w, h),
-        flags=cv2.INTER_CUBIC,
-        borderMode=cv2.BORDER_REPLICATE,
-    )
-
-
-def _remove_grid_lines(gray: np.ndarray) -> np.ndarray:
-    h, w = gray.shape[:2]
-    if h <= 0 or w <= 0:
-        return gray
-
-    inv = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)[1]
-    h_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (max(20, w // 28), 1))
-    v_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, max(20, h // 28)))
-    h_lines = cv2.morphologyEx(inv, cv2.MORPH_OPEN, h_kernel)
-    v_lines = cv2.morphologyEx(inv, cv2.MORPH_OPEN, v_kernel)
-    lines = cv2.bitwise_or(h_lines, v_lines)
-    if cv2.countNonZero(lines) == 0:
-        return gray
-    return cv2.inpaint(gray, lines, 3, cv2.INPAINT_TELEA)
-
-
-def _apply_image_tool(img_bgr: np.ndarray, tool: str) -> np.ndarray:
-    gray = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2GRAY)
-
-    if tool == "deskew":
-        return _deskew_image(img_bgr)
-
-    if tool == "contrast":
-        lab = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2LAB)
-        l, a, b = cv2.split(lab)
-        l = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8)).apply(l)
-        return cv2.cvtColor(cv2.merge((l, a, b)), cv2.COLOR_LAB2BGR)
-
-    if tool == "binarize":
-        bw = cv2.adaptiveThreshold(
-            gray,
-            255,
-            cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-            cv2.THRESH_BINARY,
-            31,
-            11,
-        )
-        return cv2.cvtColor(bw, cv2.COLOR_GRAY2BGR)
-
-    if tool == "denoise":
-        return cv2.fastNlMeansDenoisingColored(img_bgr, None, 8, 8, 7, 21)
-
-    if tool == "sharpen":
-        kernel = np.array([[0, -1, 0], [-1, 5, -1], [0, -1, 0]], dtype=np.float32)
-        return cv2.filter2D(img_bgr, -1, kernel)
-
-    if tool == "remove_lines":
-        no_lines = _remove_grid_lines(gray)
-        return cv2.cvtColor(no_lines, cv2.COLOR_GRAY2BGR)
-
-    raise HTTPException(status_code=400, detail="unsupported_image_tool")
-
-
 @app.post("/jobs/{job_id}/pages/{page}/flatten")
 def flatten_page(job_id: uuid.UUID, page: str, payload: FlattenRequest, user: AuthUser = Depends(get_current_user)):
     job = _get_job_record_or_404(job_id)
@@ -2085,19 +2121,17 @@ def flatten_page(job_id: uuid.UUID, page: str, payload: FlattenRequest, user: Au
     if len(payload.points) != 4:
         raise HTTPException(status_code=400, detail="Exactly 4 points are required")
 
-    cleaned_path = os.path.join(DATA_DIR, "jobs", job_id_str, "cleaned", f"{page}.png")
+    job_dir = os.path.join(DATA_DIR, "jobs", job_id_str)
+    cleaned_path = os.path.join(job_dir, "cleaned", f"{page}.png")
     if not os.path.exists(cleaned_path):
         raise HTTPException(status_code=404, detail="Page image not found")
 
-    img = cv2.imread(cleaned_path)
-    if img is None:
-        raise HTTPException(status_code=400, detail="Unable to read page image")
-
-    warped = _warp_by_points(img, payload.points)
-    if warped is None:
-        raise HTTPException(status_code=400, detail="Invalid corner points")
-
-    cv2.imwrite(cleaned_path, warped)
+    with file_lock(job_dir, chain_path(job_dir, page)):
+        state = _page_tool_chain(job_dir, page, cleaned_path, None)
+        try:
+            _commit_tool_chain(job_dir, page, cleaned_path, push_step(state, flatten_step(payload.points)))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid corner points")
     if _should_reparse_after_page_edit(job_id_str):
         _reparse_single_page(job_id_str, page)
     return {"ok": True, "page": page}
@@ -2115,7 +2149,7 @@ def reset_flatten_page(job_id: uuid.UUID, page: str, user: AuthUser = Depends(ge
         raise HTTPException(status_code=404, detail="Original page not found")
 
     restored = clean_page(raw_path)
-    cv2.imwrite(cleaned_path, restored)
+    cv2.imwrite(cleaned_path, restored, cleaned_png_params())
     if _should_reparse_after_page_edit(job_id_str):
         _reparse_single_page(job_id_str, page)
     return {"ok": True, "page": page}
@@ -2148,33 +2182,260 @@ def apply_image_tool(
 
     os.makedirs(cleaned_dir, exist_ok=True)
 
-    if tool == "reset":
-        if not source_path:
-            raise HTTPException(status_code=404, detail="original_page_not_found")
-        reset_img = cv2.imread(source_path)
-        if reset_img is None:
-            raise HTTPException(status_code=400, detail="unable_to_read_source_image")
-        cv2.imwrite(cleaned_path, reset_img)
-    else:
+    with file_lock(job_dir, chain_path(job_dir, page_name)):
+        state = _next_tool_chain(job_dir, page_name, cleaned_path, source_path, tool)
+        try:
+            state = _commit_tool_chain(job_dir, page_name, cleaned_path, state)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+
+    if _should_reparse_after_page_edit(job_id_str):
+        _reparse_single_page(job_id_str, page_name)
+
+    return {"ok": True, "page": page_name, "tool": tool, **_tool_chain_summary(state)}
+
+
+@app.post("/jobs/{job_id}/pages/{page}/image-tool/preview")
+def preview_image_tool(
+    job_id: uuid.UUID,
+    page: str,
+    payload: ImageToolRequest,
+    background_tasks: BackgroundTasks,
+    user: AuthUser = Depends(get_current_user),
+):
+    """
+    Apply a tool to a downscaled proxy of the page and return it as JPEG right
+    away; the full-resolution edit is applied in the background and replaces
+    the cleaned page when done (see the X-Tool-Chain-* headers and
+    GET .../image-tool).
+    """
+    job = _get_job_record_or_404(job_id)
+    _authorize_job_access(job, user, write=True)
+
+    tool = str(payload.tool or "").strip().lower()
+    if tool not in IMAGE_TOOLS:
+        raise HTTPException(status_code=400, detail="unsupported_image_tool")
+
+    job_id_str = str(job_id)
+    page_name = _normalize_page_name(page)
+    job_dir = os.path.join(DATA_DIR, "jobs", job_id_str)
+    cleaned_path = os.path.join(job_dir, "cleaned", f"{page_name}.png")
+    tool_source_path = _ensure_tool_source_image(job_id_str, page_name)
+    source_path = tool_source_path or _resolve_job_page_image_path(job_id_str, page_name, prefer_cleaned=False)
+
+    if not source_path and not os.path.exists(cleaned_path):
+        raise HTTPException(status_code=404, detail="page_image_not_found")
+
+    with file_lock(job_dir, chain_path(job_dir, page_name)):
         if not os.path.exists(cleaned_path):
-            if not source_path:
-                raise HTTPException(status_code=404, detail="page_image_not_found")
             seeded = cv2.imread(source_path)
             if seeded is None:
                 raise HTTPException(status_code=400, detail="unable_to_read_source_image")
-            cv2.imwrite(cleaned_path, seeded)
+            write_png(cleaned_path, seeded)
+        applied = _applied_tool_chain(job_dir, page_name, cleaned_path)
+        state = _next_tool_chain(job_dir, page_name, cleaned_path, source_path, tool)
+        if applied is None and tool != "reset":
+            # A new chain from the cleaned page: before this step it had no edits.
+            applied = {"base_hash": state.get("base_hash"), "steps": [], "position": 0}
+        try:
+            proxy = render_tool_chain(job_dir, page_name, state, proxy=True)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+        # The cleaned page stays the chain's last applied output until the
+        # background apply swaps it, so further previews build on this state;
+        # `applied` is what the chain rolls back to if that apply fails.
+        state = {
+            **state,
+            "output_hash": file_digest(cleaned_path),
+            "revision": int(state.get("revision") or 0) + 1,
+            "pending": True,
+            "applied": applied,
+        }
+        save_tool_chain(job_dir, page_name, state)
+
+    background_tasks.add_task(_apply_pending_tool_chain, job_id_str, page_name, state["revision"])
+    summary = _tool_chain_summary(state)
+    return Response(
+        content=encode_proxy(proxy),
+        media_type="image/jpeg",
+        headers={
+            "Cache-Control": "no-store",
+            "X-Tool-Chain-Position": str(summary["position"]),
+            "X-Tool-Chain-Pending": "true",
+        },
+    )
 
-        img = cv2.imread(cleaned_path)
-        if img is None:
-            raise HTTPException(status_code=400, detail="unable_to_read_page_image")
 
-        processed = _apply_image_tool(img, tool)
-        cv2.imwrite(cleaned_path, processed)
+@app.get("/jobs/{job_id}/pages/{page}/image-tool")
+def get_image_tool_state(job_id: uuid.UUID, page: str, user: AuthUser = Depends(get_current_user)):
+    job = _get_job_record_or_404(job_id)
+    _authorize_job_access(job, user)
+    page_name = _normalize_page_name(page)
+    job_dir = os.path.join(DATA_DIR, "jobs", str(job_id))
+    state = load_tool_chain(job_dir, page_name)
+    if not state:
+        return {"page": page_name, "position": 0, "can_undo": False, "can_redo": False, "pending": False, "error": None}
+    return {"page": page_name, **_tool_chain_summary(state)}
+
 
+def _apply_pending_tool_chain(job_id: str, page_name: str, revision: int):
+    job_dir = os.path.join(DATA_DIR, "jobs", job_id)
+    cleaned_path = os.path.join(job_dir, "cleaned", f"{page_name}.png")
+    with file_lock(job_dir, chain_path(job_dir, page_name)):
+        state = load_tool_chain(job_dir, page_name)
+        if not state or state.get("revision") != revision:
+            # A newer preview, apply or undo superseded this one.
+            return
+        reparse = _should_reparse_after_page_edit(job_id)
+        try:
+            # Stay pending through the re-parse so pollers do not reload stale rows.
+            state = _commit_tool_chain(job_dir, page_name, cleaned_path, state, pending=reparse)
+        except Exception as exc:
+            logger.warning("Full-resolution image tool apply failed for job=%s page=%s", job_id, page_name, exc_info=exc)
+            save_tool_chain(job_dir, page_name, _rolled_back_tool_chain(state, str(exc) or exc.__class__.__name__))
+            return
+    if not reparse:
+        return
+    error = None
+    try:
+        _reparse_single_page(job_id, page_name)
+    except Exception as exc:
+        logger.warning("Re-parse after image tool apply failed for job=%s page=%s", job_id, page_name, exc_info=exc)
+        error = str(exc) or exc.__class__.__name__
+    with file_lock(job_dir, chain_path(job_dir, page_name)):
+        latest = load_tool_chain(job_dir, page_name)
+        if latest and latest.get("revision") == state["revision"]:
+            save_tool_chain(job_dir, page_name, {**latest, "pending": False, "error": error})
+
+
+@app.post("/jobs/{job_id}/pages/{page}/image-tool/undo")
+def undo_image_tool(job_id: uuid.UUID, page: str, user: AuthUser = Depends(get_current_user)):
+    return _move_tool_chain(job_id, page, user, -1)
+
+
+@app.post("/jobs/{job_id}/pages/{page}/image-tool/redo")
+def redo_image_tool(job_id: uuid.UUID, page: str, user: AuthUser = Depends(get_current_user)):
+    return _move_tool_chain(job_id, page, user, 1)
+
+
+def _move_tool_chain(job_id: uuid.UUID, page: str, user: AuthUser, delta: int) -> Dict:
+    job = _get_job_record_or_404(job_id)
+    _authorize_job_access(job, user, write=True)
+
+    job_id_str = str(job_id)
+    page_name = _normalize_page_name(page)
+    job_dir = os.path.join(DATA_DIR, "jobs", job_id_str)
+    cleaned_path = os.path.join(job_dir, "cleaned", f"{page_name}.png")
+    with file_lock(job_dir, chain_path(job_dir, page_name)):
+        state = load_tool_chain(job_dir, page_name)
+        if not state or not _tool_chain_is_current(state, cleaned_path):
+            # The page was changed outside the chain (re-clean, flatten reset): no history to walk.
+            raise HTTPException(status_code=409, detail="nothing_to_undo" if delta < 0 else "nothing_to_redo")
+
+        position = int(state.get("position") or 0) + delta
+        if position < 0:
+            raise HTTPException(status_code=409, detail="nothing_to_undo")
+        if position > len(state.get("steps") or []):
+            raise HTTPException(status_code=409, detail="nothing_to_redo")
+
+        state = _commit_tool_chain(job_dir, page_name, cleaned_path, {**state, "position": position})
     if _should_reparse_after_page_edit(job_id_str):
         _reparse_single_page(job_id_str, page_name)
+    return {"ok": True, "page": page_name, **_tool_chain_summary(state)}
+
+
+def _applied_tool_chain(job_dir: str, page_name: str, cleaned_path: str) -> Optional[Dict]:
+    """Base, steps and position the cleaned page was last rendered from, or None without a current chain."""
+    state = load_tool_chain(job_dir, page_name)
+    if not state or not _tool_chain_is_current(state, cleaned_path):
+        return None
+    if state.get("pending"):
+        return state.get("applied")
+    return {"base_hash": state.get("base_hash"), "steps": list(state.get("steps") or []), "position": int(state.get("position") or 0)}
+
+
+def _rolled_back_tool_chain(state: Dict, error: str) -> Dict:
+    """
+    The chain as of its last applied output after a failed background apply.
+    When the base was replaced (reset) there is no history to return to, so
+    the chain is marked stale and the next edit starts from the cleaned page.
+    """
+    applied = state.get("applied") or {}
+    rolled = {key: value for key, value in state.items() if key != "applied"}
+    if applied and applied.get("base_hash") == state.get("base_hash"):
+        rolled.update(steps=applied.get("steps") or [], position=int(applied.get("position") or 0))
+    else:
+        rolled["output_hash"] = None
+    return {**rolled, "pending": False, "error": error}
 
-    return {"ok": True, "page": page_name, "tool": tool}
+
+def _tool_chain_is_current(state: Dict, cleaned_path: str) -> bool:
+    return bool(state.get("output_hash")) and os.path.exists(cleaned_path) and file_digest(cleaned_path) == state.get("output_hash")
+
+
+def _page_tool_chain(job_dir: str, page_name: str, cleaned_path: str, source_path: Optional[str]) -> Dict:
+    """
+    Edit chain for the page as it currently is. The stored chain is reused
+    while the cleaned image is still its output; otherwise a new chain starts
+    from the cleaned image (or the tool source when there is none yet).
+    """
+    state = load_tool_chain(job_dir, page_name)
+    if state and _tool_chain_is_current(state, cleaned_path):
+        return state
+    if os.path.exists(cleaned_path):
+        base = cv2.imread(cleaned_path)
+        if base is None:
+            raise HTTPException(status_code=400, detail="unable_to_read_page_image")
+    else:
+        if not source_path:
+            raise HTTPException(status_code=404, detail="page_image_not_found")
+        base = cv2.imread(source_path)
+        if base is None:
+            raise HTTPException(status_code=400, detail="unable_to_read_source_image")
+    return start_tool_chain(job_dir, page_name, base)
+
+
+def _next_tool_chain(job_dir: str, page_name: str, cleaned_path: str, source_path: Optional[str], tool: str) -> Dict:
+    if tool != "reset":
+        return push_step(_page_tool_chain(job_dir, page_name, cleaned_path, source_path), tool_step(tool))
+    if not source_path:
+        raise HTTPException(status_code=404, detail="original_page_not_found")
+    reset_img = cv2.imread(source_path)
+    if reset_img is None:
+        raise HTTPException(status_code=400, detail="unable_to_read_source_image")
+    # Reset starts a fresh edit history from the original render.
+    previous = load_tool_chain(job_dir, page_name) or {}
+    return {**start_tool_chain(job_dir, page_name, reset_img), "revision": previous.get("revision", 0)}
+
+
+def _commit_tool_chain(job_dir: str, page_name: str, cleaned_path: str, state: Dict, pending: bool = False) -> Dict:
+    """
+    Render the chain at full resolution into the cleaned page; callers hold
+    the chain lock. pending is left set when the caller still has follow-up
+    work (a re-parse) before the page is settled.
+    """
+    img = render_tool_chain(job_dir, page_name, state)
+    write_png(cleaned_path, img)
+    state = {
+        **{key: value for key, value in state.items() if key != "applied"},
+        "output_hash": file_digest(cleaned_path),
+        "revision": int(state.get("revision") or 0) + 1,
+        "pending": pending,
+        "error": None,
+    }
+    save_tool_chain(job_dir, page_name, state)
+    return state
+
+
+def _tool_chain_summary(state: Dict) -> Dict:
+    position = int(state.get("position") or 0)
+    return {
+        "position": position,
+        "can_undo": position > 0,
+        "can_redo": position < len(state.get("steps") or []),
+        "pending": bool(state.get("pending")),
+        "error": state.get("error"),
+    }
 
 
 def _resolve_job_page_image_path(job_id: str, page: str, prefer_cleaned: bool = True) -> Optional[str]:
@@ -2227,31 +2488,23 @@ def _ensure_tool_source_image(job_id: str, page_name: str) -> Optional[str]:
         return source_path
 
     try:
-        pages = convert_from_path(
-            input_pdf,
-            dpi=TOOL_IMAGE_DPI,
-            fmt="png",
-            first_page=page_num,
-            last_page=page_num,
-        )
-        if not pages:
+        page_img = page_level(job_dir, input_pdf, page_num, TOOL_IMAGE_DPI, TOOL_IMAGE_MAX_PIXELS)
+        if page_img is None:
             return None
-        page_img = pages[0]
-        w, h = page_img.size
-        pixels = max(1, w * h)
-        if pixels > TOOL_IMAGE_MAX_PIXELS:
-            scale = math.sqrt(TOOL_IMAGE_MAX_PIXELS / float(pixels))
-            page_img = page_img.resize(
-                (max(1, int(w * scale)), max(1, int(h * scale))),
-                resample=Image.Resampling.BILINEAR,
-            )
-        page_img.save(source_path, format="PNG")
+        cv2.imwrite(source_path, page_img)
         return source_path if os.path.exists(source_path) else None
     except Exception as exc:
         logger.warning("Failed to render tool source image for job=%s page=%s", job_id, page_name, exc_info=exc)
         return None
 
 
+def _pytesseract():
+    # Imported on demand; only the section OCR endpoint needs it.
+    import pytesseract
+
+    return pytesseract
+
+
 def _ocr_section_text_tesseract(section_bgr: np.ndarray, x_offset: int = 0, y_offset: int = 0) -> Dict:
     if section_bgr is None or section_bgr.size == 0:
         return {"text": "", "word_count": 0, "confidence": None, "words": []}
@@ -2261,6 +2514,7 @@ def _ocr_section_text_tesseract(section_bgr: np.ndarray, x_offset: int = 0, y_of
     binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]
     config = "--oem 1 --psm 6 -c preserve_interword_spaces=1"
 
+    pytesseract = _pytesseract()
     data = pytesseract.image_to_data(
         binary,
         output_type=pytesseract.Output.DICT,
@@ -2490,7 +2744,7 @@ def ocr_page_sections(
                     "confidence": ocr.get("confidence"),
                 }
             )
-    except pytesseract.TesseractError as exc:
+    except _pytesseract().TesseractError as exc:
         logger.warning("Section OCR failed for job %s page %s", str(job_id), page_name, exc_info=exc)
         raise HTTPException(status_code=500, detail="tesseract_failed")
 
@@ -2643,7 +2897,7 @@ def _reparse_single_page(job_id: str, page: str):
     parse_mode = _read_job_parse_mode(job_dir)
     input_pdf = os.path.join(job_dir, "input", "document.pdf")
     cleaned_path = os.path.join(job_dir, "cleaned", f"{page}.png")
-    ocr_path = os.path.join(job_dir, "ocr", f"{page}.json")
+    ocr_dir = os.path.join(job_dir, "ocr")
     parsed_path = os.path.join(job_dir, "result", "parsed_rows.json")
     bounds_path = os.path.join(job_dir, "result", "bounds.json")
     diagnostics_path = os.path.join(job_dir, "result", "parse_diagnostics.json")
@@ -2660,15 +2914,13 @@ def _reparse_single_page(job_id: str, page: str):
     source_type = "text"
 
     try:
-        if os.path.exists(input_pdf):
-            layouts = extract_pdf_layout_pages(input_pdf)
-            page_num = int(str(page).replace("page_", ""))
-            if 0 < page_num <= len(layouts):
-                layout = layouts[page_num - 1]
-                parser_words = layout.get("words", []) if isinstance(layout, dict) else []
-                parser_w = float(layout.get("width", page_w)) if isinstance(layout, dict) else page_w
-                parser_h = float(layout.get("height", page_h)) if isinstance(layout, dict) else page_h
-                profile_text = layout.get("text", "") if isinstance(layout, dict) else ""
+        page_num = int(str(page).replace("page_", ""))
+        layout = load_layout_page(job_dir, input_pdf, page_num)
+        if layout is not None:
+            parser_words = layout.get("words", [])
+            parser_w = float(layout.get("width", page_w))
+            parser_h = float(layout.get("height", page_h))
+            profile_text = layout.get("text", "")
     except Exception:
         parser_words = []
         parser_w = page_w
@@ -2678,14 +2930,23 @@ def _reparse_single_page(job_id: str, page: str):
     profile = detect_bank_profile(profile_text)
     page_rows, page_bounds, diag = parse_page_with_profile_fallback(parser_words, parser_w, parser_h, profile)
 
-    ocr_items = []
-    if parse_mode == "ocr":
-        source_type = "ocr"
-        ocr_items = ocr_image(cleaned_path, backend="easyocr")
-        ocr_words = _ocr_items_to_words(ocr_items)
-        ocr_text = " ".join((item.get("text") or "") for item in ocr_items)
-        profile = detect_bank_profile(ocr_text or profile_text)
-        page_rows, page_bounds, diag = parse_page_with_profile_fallback(ocr_words, page_w, page_h, profile)
+    ocr_page = OcrPage.empty()
+    route_reason = None
+    use_ocr = parse_mode == "ocr"
+    if parse_mode == "auto":
+        route, route_reason = route_page_source(len(parser_words), page_rows, diag)
+        use_ocr = route == "ocr"
+    if use_ocr:
+        candidate = OcrPage.from_items(ocr_image(cleaned_path, backend="easyocr"))
+        ocr_profile = detect_bank_profile(candidate.text or profile_text)
+        ocr_parsed = parse_page_with_profile_fallback(candidate.words(), page_w, page_h, ocr_profile)
+        if parse_mode == "ocr" or ocr_rows_preferred(page_rows, profile, ocr_parsed[0], ocr_profile):
+            source_type = "ocr"
+            ocr_page = candidate
+            profile = ocr_profile
+            page_rows, page_bounds, diag = ocr_parsed
+        else:
+            route_reason = "ocr_fewer_rows"
 
     transaction_rows = [row for row in page_rows if is_transaction_row(row, profile)]
     id_map: Dict[str, str] = {}
@@ -2732,8 +2993,7 @@ def _reparse_single_page(job_id: str, page: str):
     with open(bounds_path, "w") as f:
         json.dump(bounds_data, f, indent=2)
 
-    with open(ocr_path, "w") as f:
-        json.dump(ocr_items, f, indent=2)
+    write_ocr_page(ocr_dir, page, ocr_page)
 
     diagnostics_data = {"job": {"ocr_backend": "easyocr", "parse_mode": parse_mode}, "pages": {}}
     if os.path.exists(diagnostics_path):
@@ -2748,8 +3008,8 @@ def _reparse_single_page(job_id: str, page: str):
             account_identity["account_number"] = ai_identity.get("account_number")
     account_name_bbox = find_value_bounds(parser_words, parser_w, parser_h, account_identity.get("account_name"), page)
     account_number_bbox = find_value_bounds(parser_words, parser_w, parser_h, account_identity.get("account_number"), page)
-    if parse_mode == "ocr" and ocr_items:
-        ocr_text = " ".join((item.get("text") or "") for item in ocr_items)
+    if source_type == "ocr" and len(ocr_page):
+        ocr_text = ocr_page.text
         account_identity = extract_account_identity(ocr_text, profile)
         if not account_identity.get("account_name") or not account_identity.get("account_number"):
             ai_identity = analyze_account_identity_from_text(ocr_text)
@@ -2757,7 +3017,7 @@ def _reparse_single_page(job_id: str, page: str):
                 account_identity["account_name"] = ai_identity.get("account_name")
             if not account_identity.get("account_number"):
                 account_identity["account_number"] = ai_identity.get("account_number")
-        ocr_words = _ocr_items_to_words(ocr_items)
+        ocr_words = ocr_page.words()
         account_name_bbox = find_value_bounds(ocr_words, page_w, page_h, account_identity.get("account_name"), page)
         account_number_bbox = find_value_bounds(ocr_words, page_w, page_h, account_identity.get("account_number"), page)
     diagnostics_data["job"]["account_name"] = account_identity.get("account_name")
@@ -2771,7 +3031,7 @@ def _reparse_single_page(job_id: str, page: str):
         "ocr_backend": "easyocr",
         "parse_mode": parse_mode,
         "bank_profile": profile.name,
-        "ocr_items": len(ocr_items),
+        "ocr_items": len(ocr_page),
         "rows_parsed": len(filtered_rows),
         "profile_detected": diag.get("profile_detected", profile.name),
         "profile_selected": diag.get("profile_selected", profile.name),
@@ -2779,6 +3039,9 @@ def _reparse_single_page(job_id: str, page: str):
         "fallback_reason": diag.get("fallback_reason"),
         "manual_flatten": True,
     }
+    if parse_mode == "auto":
+        diagnostics_pages[page]["route"] = source_type
+        diagnostics_pages[page]["route_reason"] = route_reason
     with open(diagnostics_path, "w") as f:
         json.dump(diagnostics_data, f, indent=2)
 
@@ -2813,9 +3076,8 @@ def _backfill_job_account_identity(job_id: str, diagnostics: Dict, diagnostics_p
 
     if os.path.exists(input_pdf):
         try:
-            layouts = extract_pdf_layout_pages(input_pdf)
-            if layouts:
-                first = layouts[0] if isinstance(layouts[0], dict) else {}
+            first = load_layout_page(job_dir, input_pdf, 1)
+            if first is not None:
                 first_text = str(first.get("text") or "").strip()
                 first_words = first.get("words", []) if isinstance(first.get("words", []), list) else []
                 first_w = float(first.get("width", 1) or 1)
@@ -2840,13 +3102,11 @@ def _backfill_job_account_identity(job_id: str, diagnostics: Dict, diagnostics_p
 
     # OCR fallback when text layer is unavailable.
     if (not identity.get("account_name") or not identity.get("account_number")):
-        ocr_path = os.path.join(job_dir, "ocr", f"{page}.json")
-        if os.path.exists(ocr_path):
+        ocr_page = read_ocr_page(os.path.join(job_dir, "ocr"), page)
+        if ocr_page is not None:
             try:
-                with open(ocr_path) as f:
-                    ocr_items = json.load(f)
-                ocr_text = " ".join((item.get("text") or "") for item in ocr_items)
-                ocr_words = _ocr_items_to_words(ocr_items)
+                ocr_text = ocr_page.text
+                ocr_words = ocr_page.words()
                 profile_ocr = detect_bank_profile(ocr_text)
                 identity_ocr = extract_account_identity(ocr_text, profile_ocr)
                 if not identity.get("account_name"):
@@ -2912,7 +3172,7 @@ def _backfill_page_descriptions(job_id: str, page: str, page_rows: List[Dict]) -
     job_dir = os.path.join(DATA_DIR, "jobs", job_id)
     input_pdf = os.path.join(job_dir, "input", "document.pdf")
     cleaned_path = os.path.join(job_dir, "cleaned", f"{page}.png")
-    ocr_path = os.path.join(job_dir, "ocr", f"{page}.json")
+    ocr_dir = os.path.join(job_dir, "ocr")
 
     row_desc: Dict[str, str] = {}
 
@@ -2924,9 +3184,8 @@ def _backfill_page_descriptions(job_id: str, page: str, page_rows: List[Dict]) -
     # Prefer text-layer parse when available for better descriptions.
     if os.path.exists(input_pdf) and page_num > 0:
         try:
-            layouts = extract_pdf_layout_pages(input_pdf)
-            if 0 < page_num <= len(layouts):
-                layout = layouts[page_num - 1]
+            layout = load_layout_page(job_dir, input_pdf, page_num)
+            if layout is not None:
                 layout_words = layout.get("words", []) if isinstance(layout, dict) else []
                 profile = detect_bank_profile(layout.get("text", "") if isinstance(layout, dict) else "")
                 parsed, _, _ = parse_page_with_profile_fallback(
@@ -2949,13 +3208,11 @@ def _backfill_page_descriptions(job_id: str, page: str, page_rows: List[Dict]) -
             img = cv2.imread(cleaned_path)
             if img is not None:
                 h, w = img.shape[:2]
-                if os.path.exists(ocr_path):
-                    with open(ocr_path) as f:
-                        ocr_items = json.load(f)
-                else:
-                    ocr_items = ocr_image(cleaned_path, backend="easyocr")
-                ocr_words = _ocr_items_to_words(ocr_items)
-                ocr_text = " ".join((item.get("text") or "") for item in ocr_items)
+                ocr_page = read_ocr_page(ocr_dir, page)
+                if ocr_page is None:
+                    ocr_page = OcrPage.from_items(ocr_image(cleaned_path, backend="easyocr"))
+                ocr_words = ocr_page.words()
+                ocr_text = ocr_page.text
                 profile = detect_bank_profile(ocr_text)
                 parsed, _, _ = parse_page_with_profile_fallback(ocr_words, w, h, profile)
                 parsed = [r for r in parsed if is_transaction_row(r, profile)]
@@ -2976,66 +3233,6 @@ def _backfill_page_descriptions(job_id: str, page: str, page_rows: List[Dict]) -
     return enriched
 
 
-def _order_points(pts: np.ndarray) -> np.ndarray:
-    rect = np.zeros((4, 2), dtype=np.float32)
-    s = pts.sum(axis=1)
-    diff = np.diff(pts, axis=1)
-    rect[0] = pts[np.argmin(s)]  # top-left
-    rect[2] = pts[np.argmax(s)]  # bottom-right
-    rect[1] = pts[np.argmin(diff)]  # top-right
-    rect[3] = pts[np.argmax(diff)]  # bottom-left
-    return rect
-
-
-def _warp_by_points(img: np.ndarray, points: List[FlattenPoint]) -> np.ndarray | None:
-    h, w = img.shape[:2]
-    pts = np.array([[p.x * w, p.y * h] for p in points], dtype=np.float32)
-    if pts.shape != (4, 2):
-        return None
-
-    rect = _order_points(pts)
-    (tl, tr, br, bl) = rect
-
-    width_a = np.linalg.norm(br - bl)
-    width_b = np.linalg.norm(tr - tl)
-    max_w = int(max(width_a, width_b))
-
-    height_a = np.linalg.norm(tr - br)
-    height_b = np.linalg.norm(tl - bl)
-    max_h = int(max(height_a, height_b))
-
-    if max_w < 10 or max_h < 10:
-        return None
-
-    dst = np.array(
-        [[0, 0], [max_w - 1, 0], [max_w - 1, max_h - 1], [0, max_h - 1]],
-        dtype=np.float32,
-    )
-    matrix = cv2.getPerspectiveTransform(rect, dst)
-    return cv2.warpPerspective(img, matrix, (max_w, max_h))
-
-
-def _ocr_items_to_words(ocr_items: List[Dict]) -> List[Dict]:
-    words = []
-    for item in ocr_items:
-        bbox = item.get("bbox") or []
-        text = (item.get("text") or "").strip()
-        if len(bbox) != 4 or not text:
-            continue
-        xs = [pt[0] for pt in bbox]
-        ys = [pt[1] for pt in bbox]
-        words.append(
-            {
-                "text": text,
-                "x1": float(min(xs)),
-                "y1": float(min(ys)),
-                "x2": float(max(xs)),
-                "y2": float(max(ys)),
-            }
-        )
-    return words
-
-
 def _generate_preview_page_if_missing(
     job_id: str,
     filename: str,
@@ -3061,30 +3258,10 @@ def _generate_preview_page_if_missing(
     if not os.path.exists(input_pdf):
         return False
 
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-
+    # Text-mode jobs rasterize lazily: the prefetch task and concurrent
+    # requests for the same page share one render through the file lock.
     try:
-        pages = convert_from_path(
-            input_pdf,
-            dpi=max(72, int(dpi)),
-            fmt="png",
-            first_page=page_num,
-            last_page=page_num,
-        )
-        if not pages:
-            return False
-        page = pages[0]
-        w, h = page.size
-        pixels = max(1, w * h)
-        pixel_cap = max(1, int(max_pixels))
-        if pixels > pixel_cap:
-            scale = math.sqrt(pixel_cap / float(pixels))
-            page = page.resize(
-                (max(1, int(w * scale)), max(1, int(h * scale))),
-                resample=Image.Resampling.BILINEAR,
-            )
-        page.save(output_path, format="PNG")
-        return os.path.exists(output_path)
+        return ensure_page_image(job_dir, input_pdf, page_num, output_path, max(72, int(dpi)), max(1, int(max_pixels)))
     except Exception:
         return False
 
@@ -1,31 +1,65 @@
-import easyocr
 import cv2
+import hashlib
+import json
+import logging
 import math
-import pytesseract
+import numpy as np
 import os
+import re
+
+from app.disk_cache import DiskCache
+from app.ocr_server import OCR_SERVER_UNAVAILABLE, call_ocr_server, ocr_server_enabled
+from app.statement_parser import find_table_header, normalize_amount
 
 os.environ.setdefault("PADDLE_PDX_DISABLE_MODEL_SOURCE_CHECK", "True")
 
-try:
-    from paddleocr import PaddleOCR
-except Exception:
-    PaddleOCR = None
+# OCR backends (torch, paddle) are imported on first use of that backend so the
+# API and text-only workers can import this module without loading them.
+EASYOCR_BATCHED = str(os.getenv("EASYOCR_BATCHED", "true")).strip().lower() not in {"0", "false", "no"}
+EASYOCR_BATCH_SIZE = int(os.getenv("EASYOCR_BATCH_SIZE", "8"))
+# Adaptive mode: after the low-resolution pass, re-read weak boxes from a sharper page.
+EASYOCR_REFINE = str(os.getenv("EASYOCR_REFINE", "false")).strip().lower() not in {"0", "false", "no"}
+EASYOCR_REFINE_MIN_CONFIDENCE = float(os.getenv("EASYOCR_REFINE_MIN_CONFIDENCE", "0.6"))
+EASYOCR_REFINE_MAX_WIDTH = int(os.getenv("EASYOCR_REFINE_MAX_WIDTH", "1800"))
+EASYOCR_REFINE_MAX_PIXELS = int(os.getenv("EASYOCR_REFINE_MAX_PIXELS", "6000000"))
+EASYOCR_REFINE_MAX_BOXES = int(os.getenv("EASYOCR_REFINE_MAX_BOXES", "150"))
+# ROI mode: recognize only the identity area above the table header and the table columns below it.
+OCR_ROI_ENABLED = str(os.getenv("OCR_ROI_ENABLED", "false")).strip().lower() not in {"0", "false", "no"}
+OCR_ROI_HEADER_BAND = float(os.getenv("OCR_ROI_HEADER_BAND", "0.45"))
+OCR_ROI_X_PAD = float(os.getenv("OCR_ROI_X_PAD", "0.03"))
+OCR_CACHE_ENABLED = str(os.getenv("OCR_CACHE_ENABLED", "true")).strip().lower() not in {"0", "false", "no"}
+OCR_CACHE_DIR = os.getenv("OCR_CACHE_DIR") or os.path.join(os.getenv("DATA_DIR", "./data"), "cache", "ocr")
+OCR_CACHE_MAX_MB = int(os.getenv("OCR_CACHE_MAX_MB", "512"))
+# Bump when backend output changes so stale cache entries are not reused.
+OCR_CACHE_VERSION = "1"
+# Centres closer than this with the same text are treated as one detection.
+OVERLAP_DX = 30.0
+OVERLAP_DY = 18.0
+# Digit-like tokens (with letters EasyOCR commonly confuses for digits) that should be amounts.
+AMOUNT_LIKE_RE = re.compile(r"^(?=.*\d)[(\-₱]?[0-9OoIlSB][0-9OoIlSB,.\s]*[0-9OoIlSB][)\-]?$")
+AMOUNT_CONFUSABLE_RE = re.compile(r"[OoIlSB]")
 
 _reader = None
 _paddle_reader = None
+_ocr_cache = DiskCache(OCR_CACHE_DIR, OCR_CACHE_MAX_MB * 1024 * 1024, suffix=".json")
+logger = logging.getLogger(__name__)
 
 def get_reader():
     global _reader
     if _reader is None:
+        import easyocr
+
         _reader = easyocr.Reader(['en'], gpu=False)
     return _reader
 
 
 def get_paddle_reader():
     global _paddle_reader
-    if PaddleOCR is None:
-        raise RuntimeError("paddleocr_not_installed")
     if _paddle_reader is None:
+        try:
+            from paddleocr import PaddleOCR
+        except Exception as exc:
+            raise RuntimeError("paddleocr_not_installed") from exc
         _paddle_reader = PaddleOCR(
             lang="en",
             ocr_version="PP-OCRv5",
@@ -46,6 +80,99 @@ def ocr_image(
     max_pixels=1_800_000,
     chunk_height=620,
     chunk_overlap=60,
+    batch_size=None,
+):
+    kwargs = {
+        "backend": backend,
+        "max_width": max_width,
+        "max_pixels": max_pixels,
+        "chunk_height": chunk_height,
+        "chunk_overlap": chunk_overlap,
+        "batch_size": batch_size,
+    }
+    img = _load_image(image_path)
+    if img is None:
+        return []
+
+    cache_key = _ocr_cache_key(img, kwargs)
+    cached = _read_cached_ocr(cache_key)
+    if cached is not None:
+        return cached
+
+    if ocr_server_enabled():
+        try:
+            items = call_ocr_server("ocr_image", image_path=img, **kwargs)
+        except OCR_SERVER_UNAVAILABLE as exc:
+            logger.warning("OCR server unavailable, running OCR in-process: %s", exc)
+            items = ocr_image_local(img, **kwargs)
+    else:
+        items = ocr_image_local(img, **kwargs)
+
+    _write_cached_ocr(cache_key, items)
+    return items
+
+
+def ocr_images(
+    image_paths,
+    backend="easyocr",
+    max_width=850,
+    max_pixels=1_800_000,
+    chunk_height=620,
+    chunk_overlap=60,
+    batch_size=None,
+):
+    """
+    OCR several pages in one call. With batched EasyOCR the strips of every
+    page share detector/recognizer batches; other backends run page by page.
+    Returns one item list per input path, in input order.
+    """
+    kwargs = {
+        "backend": backend,
+        "max_width": max_width,
+        "max_pixels": max_pixels,
+        "chunk_height": chunk_height,
+        "chunk_overlap": chunk_overlap,
+        "batch_size": batch_size,
+    }
+    results = [[] for _ in image_paths]
+    pending = []
+    for i, path in enumerate(image_paths):
+        img = _load_image(path)
+        if img is None:
+            continue
+        cache_key = _ocr_cache_key(img, kwargs)
+        cached = _read_cached_ocr(cache_key)
+        if cached is not None:
+            results[i] = cached
+        else:
+            pending.append((i, img, cache_key))
+    if not pending:
+        return results
+
+    images = [img for _, img, _ in pending]
+    if ocr_server_enabled():
+        try:
+            fresh = call_ocr_server("ocr_images", image_paths=images, **kwargs)
+        except OCR_SERVER_UNAVAILABLE as exc:
+            logger.warning("OCR server unavailable, running OCR in-process: %s", exc)
+            fresh = ocr_images_local(images, **kwargs)
+    else:
+        fresh = ocr_images_local(images, **kwargs)
+
+    for (i, _, cache_key), items in zip(pending, fresh):
+        results[i] = items
+        _write_cached_ocr(cache_key, items)
+    return results
+
+
+def ocr_image_local(
+    image_path,
+    backend="easyocr",
+    max_width=850,
+    max_pixels=1_800_000,
+    chunk_height=620,
+    chunk_overlap=60,
+    batch_size=None,
 ):
     if backend == "paddleocr":
         return _ocr_image_paddle(
@@ -65,21 +192,160 @@ def ocr_image(
         max_pixels=max_pixels,
         chunk_height=chunk_height,
         chunk_overlap=chunk_overlap,
+        batch_size=batch_size,
     )
 
 
+def ocr_images_local(
+    image_paths,
+    backend="easyocr",
+    max_width=850,
+    max_pixels=1_800_000,
+    chunk_height=620,
+    chunk_overlap=60,
+    batch_size=None,
+):
+    if backend != "easyocr" or not EASYOCR_BATCHED or OCR_ROI_ENABLED:
+        return [
+            ocr_image_local(
+                path,
+                backend=backend,
+                max_width=max_width,
+                max_pixels=max_pixels,
+                chunk_height=chunk_height,
+                chunk_overlap=chunk_overlap,
+                batch_size=batch_size,
+            )
+            for path in image_paths
+        ]
+
+    reader = get_reader()
+    strips = []
+    pages = {}
+    for page_idx, path in enumerate(image_paths):
+        source = _load_image(path)
+        if source is None:
+            continue
+        img = _fit_image(source, max_width, max_pixels)
+        pages[page_idx] = (source, img)
+        for top, chunk in _split_vertical_chunks(img, chunk_height, chunk_overlap):
+            strips.append((page_idx, top, chunk))
+
+    results = _readtext_strips_batched(reader, [chunk for _, _, chunk in strips], batch_size)
+    per_page = [[] for _ in image_paths]
+    per_page_seen = [_OverlapIndex() for _ in image_paths]
+    for (page_idx, top, _), chunk_results in zip(strips, results):
+        _append_easyocr_results(per_page[page_idx], per_page_seen[page_idx], chunk_results, top)
+    if EASYOCR_REFINE:
+        for page_idx, (source, img) in pages.items():
+            _refine_easyocr_items(reader, source, img, per_page[page_idx])
+    return per_page
+
+
 def _ocr_image_easyocr(
     image_path,
     max_width=850,
     max_pixels=1_800_000,
     chunk_height=620,
     chunk_overlap=60,
+    batch_size=None,
 ):
     reader = get_reader()
-    img = cv2.imread(image_path)
-    if img is None:
+    source = _load_image(image_path)
+    if source is None:
         return []
 
+    img = _fit_image(source, max_width, max_pixels)
+    chunks = _split_vertical_chunks(img, chunk_height, chunk_overlap)
+
+    if OCR_ROI_ENABLED:
+        ocr_items = _ocr_easyocr_roi(reader, img, chunks)
+        if EASYOCR_REFINE:
+            _refine_easyocr_items(reader, source, img, ocr_items)
+        return ocr_items
+
+    if EASYOCR_BATCHED:
+        results = _readtext_strips_batched(reader, [chunk for _, chunk in chunks], batch_size)
+    else:
+        results = [
+            reader.readtext(
+                chunk,
+                batch_size=1,
+                mag_ratio=0.9,
+                canvas_size=1024,
+                decoder="greedy",
+            )
+            for _, chunk in chunks
+        ]
+
+    ocr_items = []
+    seen = _OverlapIndex()
+    for (top, _), chunk_results in zip(chunks, results):
+        _append_easyocr_results(ocr_items, seen, chunk_results, top)
+    if EASYOCR_REFINE:
+        _refine_easyocr_items(reader, source, img, ocr_items)
+    return ocr_items
+
+
+def _ocr_cache_key(img, kwargs):
+    if not OCR_CACHE_ENABLED:
+        return None
+    pixels = np.ascontiguousarray(img)
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(OCR_CACHE_VERSION.encode("utf-8"))
+    digest.update(f"{pixels.shape}|{pixels.dtype}".encode("utf-8"))
+    for name in ("backend", "max_width", "max_pixels", "chunk_height", "chunk_overlap"):
+        digest.update(f"|{name}={kwargs.get(name)}".encode("utf-8"))
+    if kwargs.get("backend", "easyocr") == "easyocr":
+        # Batched strip recognition is not bit-identical to per-strip readtext.
+        digest.update(f"|batched={EASYOCR_BATCHED}".encode("utf-8"))
+    if OCR_ROI_ENABLED and kwargs.get("backend", "easyocr") == "easyocr":
+        digest.update(f"|roi={OCR_ROI_HEADER_BAND},{OCR_ROI_X_PAD}".encode("utf-8"))
+    if EASYOCR_REFINE and kwargs.get("backend", "easyocr") == "easyocr":
+        digest.update(
+            f"|refine={EASYOCR_REFINE_MIN_CONFIDENCE},{EASYOCR_REFINE_MAX_WIDTH},"
+            f"{EASYOCR_REFINE_MAX_PIXELS},{EASYOCR_REFINE_MAX_BOXES}".encode("utf-8")
+        )
+    digest.update(pixels.data)
+    return digest.hexdigest()
+
+
+def _read_cached_ocr(cache_key):
+    if not cache_key:
+        return None
+    data = _ocr_cache.get_bytes(cache_key)
+    if data is None:
+        return None
+    try:
+        items = json.loads(data)
+    except ValueError:
+        return None
+    return items if isinstance(items, list) else None
+
+
+def _write_cached_ocr(cache_key, items):
+    if not cache_key:
+        return
+    try:
+        _ocr_cache.put_bytes(cache_key, json.dumps(items, separators=(",", ":")).encode("utf-8"))
+    except Exception as exc:
+        logger.warning("Failed to write OCR cache entry %s", cache_key, exc_info=exc)
+
+
+def _load_image(image):
+    # Accept a file path or an already decoded BGR/grayscale array.
+    if image is None:
+        return None
+    if isinstance(image, np.ndarray):
+        if image.size == 0:
+            return None
+        if image.ndim == 2:
+            return cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+        return image
+    return cv2.imread(image)
+
+
+def _fit_image(img, max_width, max_pixels):
     h, w = img.shape[:2]
     if max(h, w) > max_width:
         scale = max_width / float(max(h, w))
@@ -90,42 +356,254 @@ def _ocr_image_easyocr(
     if pixels > max_pixels:
         scale = math.sqrt(max_pixels / float(pixels))
         img = cv2.resize(img, None, fx=scale, fy=scale)
+    return img
 
-    ocr_items = []
-    h, _ = img.shape[:2]
-    step = max(1, chunk_height - chunk_overlap)
-    idx = 1
 
+def _split_vertical_chunks(img, chunk_height, chunk_overlap):
+    chunks = []
+    h = img.shape[0]
+    step = max(1, chunk_height - chunk_overlap)
     for top in range(0, h, step):
         bottom = min(h, top + chunk_height)
         chunk = img[top:bottom, :]
-        if chunk.size == 0:
+        if chunk.size:
+            chunks.append((top, chunk))
+        if bottom >= h:
+            break
+    return chunks
+
+
+def _readtext_strips_batched(reader, chunks, batch_size=None):
+    """
+    Run EasyOCR over many strips with shared detector/recognizer batches.
+    readtext_batched needs equally sized inputs, so strips are padded with
+    white on the right/bottom; padding never shifts word coordinates.
+    """
+    size = max(1, int(batch_size or EASYOCR_BATCH_SIZE))
+    results = []
+    for start in range(0, len(chunks), size):
+        group = chunks[start:start + size]
+        target_h = max(chunk.shape[0] for chunk in group)
+        target_w = max(chunk.shape[1] for chunk in group)
+        padded = [
+            cv2.copyMakeBorder(
+                chunk,
+                0,
+                target_h - chunk.shape[0],
+                0,
+                target_w - chunk.shape[1],
+                cv2.BORDER_CONSTANT,
+                value=(255, 255, 255),
+            )
+            for chunk in group
+        ]
+        results.extend(
+            reader.readtext_batched(
+                padded,
+                batch_size=size,
+                mag_ratio=0.9,
+                canvas_size=1024,
+                decoder="greedy",
+            )
+        )
+    return results
+
+
+def _append_easyocr_results(ocr_items, seen, chunk_results, top):
+    for (bbox, text, conf) in chunk_results:
+        shifted_bbox = [[float(pt[0]), float(pt[1] + top)] for pt in bbox]
+        if not seen.add_if_new(shifted_bbox, text):
             continue
 
-        chunk_results = reader.readtext(
-            chunk,
-            batch_size=1,
-            mag_ratio=0.9,
-            canvas_size=1024,
-            decoder="greedy",
+        ocr_items.append({
+            "id": len(ocr_items) + 1,
+            "text": text,
+            "confidence": float(conf),
+            "bbox": shifted_bbox,
+        })
+
+
+def _ocr_easyocr_roi(reader, img, chunks):
+    """
+    Detect and recognize only what the parser uses: strips reaching into the
+    top band (identity area and table header) are detected in full and their
+    band boxes recognized; once find_table_header locates the header, strips
+    below the band are detected only within the table's x-span, and only
+    boxes below the header inside that span are recognized. Logos, side
+    marketing and footers beside the table are never detected or recognized.
+    Without a header every strip is detected and recognized in full, which
+    matches a full readtext pass.
+    """
+    page_h, page_w = img.shape[:2]
+    band_bottom = page_h * OCR_ROI_HEADER_BAND
+
+    ocr_items = []
+    seen = _OverlapIndex()
+    remaining = []
+    for top, chunk in chunks:
+        if top >= band_bottom:
+            continue
+        grey = _grey(chunk)
+        horizontal, free = _detect_boxes(reader, chunk)
+        band_h = {i for i, box in enumerate(horizontal) if box[2] + top < band_bottom}
+        band_f = {i for i, box in enumerate(free) if min(pt[1] for pt in box) + top < band_bottom}
+        _recognize_boxes(
+            reader,
+            ocr_items,
+            seen,
+            grey,
+            top,
+            [box for i, box in enumerate(horizontal) if i in band_h],
+            [box for i, box in enumerate(free) if i in band_f],
+        )
+        remaining.append(
+            (
+                top,
+                grey,
+                [box for i, box in enumerate(horizontal) if i not in band_h],
+                [box for i, box in enumerate(free) if i not in band_f],
+            )
+        )
+    lower = [(top, chunk) for top, chunk in chunks if top >= band_bottom]
+
+    header = find_table_header(_roi_words(ocr_items))
+    if not header:
+        for top, chunk in lower:
+            remaining.append((top, _grey(chunk), *_detect_boxes(reader, chunk)))
+        for top, grey, horizontal, free in remaining:
+            _recognize_boxes(reader, ocr_items, seen, grey, top, horizontal, free)
+        return ocr_items
+
+    pad = page_w * OCR_ROI_X_PAD
+    span_x1 = min(header["x1"], header["table_x1"]) - pad
+    span_x2 = max(header["x2"], header["table_x2"]) + pad
+    header_top = header["y1"]
+
+    def in_table(x1, x2, y2, top):
+        return y2 + top > header_top and x2 > span_x1 and x1 < span_x2
+
+    for top, grey, horizontal, free in remaining:
+        _recognize_boxes(
+            reader,
+            ocr_items,
+            seen,
+            grey,
+            top,
+            [box for box in horizontal if in_table(box[0], box[1], box[3], top)],
+            [
+                box
+                for box in free
+                if in_table(min(pt[0] for pt in box), max(pt[0] for pt in box), max(pt[1] for pt in box), top)
+            ],
         )
 
-        for (bbox, text, conf) in chunk_results:
-            shifted_bbox = [[float(pt[0]), float(pt[1] + top)] for pt in bbox]
-            if _is_overlap_duplicate(ocr_items, shifted_bbox, text):
-                continue
+    crop_x1 = max(0, int(math.floor(span_x1)))
+    crop_x2 = min(page_w, int(math.ceil(span_x2)))
+    if crop_x2 <= crop_x1:
+        return ocr_items
+    for top, chunk in lower:
+        # Detection sees only the table columns; boxes are shifted back to chunk coordinates.
+        horizontal, free = _detect_boxes(reader, np.ascontiguousarray(chunk[:, crop_x1:crop_x2]))
+        horizontal = [[box[0] + crop_x1, box[1] + crop_x1, box[2], box[3]] for box in horizontal]
+        free = [[[pt[0] + crop_x1, pt[1]] for pt in box] for box in free]
+        _recognize_boxes(reader, ocr_items, seen, _grey(chunk), top, horizontal, free)
+    return ocr_items
 
-            ocr_items.append({
-                "id": idx,
-                "text": text,
-                "confidence": float(conf),
-                "bbox": shifted_bbox,
-            })
-            idx += 1
 
-        if bottom >= h:
-            break
+def _detect_boxes(reader, chunk):
+    horizontal, free = reader.detect(chunk, mag_ratio=0.9, canvas_size=1024)
+    return (horizontal[0] if horizontal else []), (free[0] if free else [])
+
+
+def _grey(chunk):
+    return cv2.cvtColor(chunk, cv2.COLOR_BGR2GRAY) if chunk.ndim == 3 else chunk
+
+
+def _recognize_boxes(reader, ocr_items, seen, grey, top, horizontal, free):
+    if not horizontal and not free:
+        return
+    results = reader.recognize(
+        grey,
+        horizontal_list=horizontal,
+        free_list=free,
+        decoder="greedy",
+        detail=1,
+        reformat=False,
+    )
+    _append_easyocr_results(ocr_items, seen, results, top)
+
+
+def _roi_words(ocr_items):
+    words = []
+    for item in ocr_items:
+        xs = [pt[0] for pt in item["bbox"]]
+        ys = [pt[1] for pt in item["bbox"]]
+        text = (item.get("text") or "").strip()
+        if text:
+            words.append({"text": text, "x1": min(xs), "y1": min(ys), "x2": max(xs), "y2": max(ys)})
+    return words
 
+
+def _needs_refine(text, conf):
+    if float(conf) < EASYOCR_REFINE_MIN_CONFIDENCE:
+        return True
+    value = str(text or "").strip()
+    if not AMOUNT_LIKE_RE.match(value):
+        return False
+    # normalize_amount silently drops letters, so "1,2O4.50" would parse as the wrong number.
+    return normalize_amount(value) is None or bool(AMOUNT_CONFUSABLE_RE.search(value))
+
+
+def _refine_easyocr_items(reader, source, img, ocr_items):
+    """
+    Second, targeted pass of the adaptive mode: boxes with low confidence or
+    amount-like text that does not parse cleanly are recognized again from a
+    higher-resolution rendition of the page. Boxes keep their low-res
+    coordinates; text/confidence are replaced only when the re-read is more
+    confident.
+    """
+    candidates = [item for item in ocr_items if _needs_refine(item.get("text"), item.get("confidence", 0.0))]
+    if not candidates:
+        return ocr_items
+    candidates = sorted(candidates, key=lambda item: float(item.get("confidence", 0.0)))[:max(0, EASYOCR_REFINE_MAX_BOXES)]
+
+    hi_res = _fit_image(source, EASYOCR_REFINE_MAX_WIDTH, EASYOCR_REFINE_MAX_PIXELS)
+    scale = hi_res.shape[1] / float(max(1, img.shape[1]))
+    if scale <= 1.05:
+        return ocr_items
+    grey = cv2.cvtColor(hi_res, cv2.COLOR_BGR2GRAY) if hi_res.ndim == 3 else hi_res
+    grey_h, grey_w = grey.shape[:2]
+
+    for item in candidates:
+        xs = [pt[0] for pt in item["bbox"]]
+        ys = [pt[1] for pt in item["bbox"]]
+        pad = max(2.0, (max(ys) - min(ys)) * 0.15)
+        box = [
+            max(0, int((min(xs) - pad) * scale)),
+            min(grey_w, int(math.ceil((max(xs) + pad) * scale))),
+            max(0, int((min(ys) - pad) * scale)),
+            min(grey_h, int(math.ceil((max(ys) + pad) * scale))),
+        ]
+        if box[1] - box[0] < 2 or box[3] - box[2] < 2:
+            continue
+        try:
+            reread = reader.recognize(
+                grey,
+                horizontal_list=[box],
+                free_list=[],
+                decoder="greedy",
+                detail=1,
+                reformat=False,
+            )
+        except Exception as exc:
+            logger.warning("EasyOCR re-read failed: %s", exc)
+            return ocr_items
+        if not reread:
+            continue
+        _, text, conf = reread[0]
+        if text and float(conf) > float(item.get("confidence", 0.0)):
+            item["text"] = text
+            item["confidence"] = float(conf)
     return ocr_items
 
 
@@ -134,7 +612,7 @@ def _ocr_image_tesseract(
     max_width=1000,
     max_pixels=2_000_000,
 ):
-    img = cv2.imread(image_path)
+    img = _load_image(image_path)
     if img is None:
         return []
 
@@ -157,6 +635,8 @@ def _ocr_image_tesseract(
         "-c preserve_interword_spaces=1 "
         "-c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789.,/-()$"
     )
+    import pytesseract
+
     data = pytesseract.image_to_data(
         gray,
         output_type=pytesseract.Output.DICT,
@@ -165,6 +645,7 @@ def _ocr_image_tesseract(
     )
 
     items = []
+    seen = _OverlapIndex()
     n = len(data.get("text", []))
     idx = 1
     for i in range(n):
@@ -192,7 +673,7 @@ def _ocr_image_tesseract(
             [x + w, y + h],
             [x, y + h],
         ]
-        if _is_overlap_duplicate(items, bbox, text):
+        if not seen.add_if_new(bbox, text):
             continue
 
         items.append({
@@ -212,7 +693,7 @@ def _ocr_image_paddle(
     max_pixels=2_300_000,
 ):
     reader = get_paddle_reader()
-    img = cv2.imread(image_path)
+    img = _load_image(image_path)
     if img is None:
         return []
 
@@ -260,6 +741,7 @@ def _ocr_image_paddle(
 
     results = reader.ocr(img) or []
     items = []
+    seen = _OverlapIndex()
     idx = 1
     for page in results:
         if not page:
@@ -284,7 +766,7 @@ def _ocr_image_paddle(
                     x = max(0.0, min(float(orig_w), x))
                     y = max(0.0, min(float(orig_h), y))
                     norm_bbox.append([x, y])
-                if len(norm_bbox) != 4 or _is_overlap_duplicate(items, norm_bbox, text):
+                if len(norm_bbox) != 4 or not seen.add_if_new(norm_bbox, text):
                     continue
                 items.append({
                     "id": idx,
@@ -314,7 +796,7 @@ def _ocr_image_paddle(
                 x = max(0.0, min(float(orig_w), x))
                 y = max(0.0, min(float(orig_h), y))
                 norm_bbox.append([x, y])
-            if _is_overlap_duplicate(items, norm_bbox, text):
+            if not seen.add_if_new(norm_bbox, text):
                 continue
             items.append({
                 "id": idx,
@@ -326,23 +808,52 @@ def _ocr_image_paddle(
     return items
 
 
-def _is_overlap_duplicate(existing_items, bbox, text):
-    if not existing_items:
+class _OverlapIndex:
+    """
+    Grid index of item centres for overlap de-duplication.
+    Cells are OVERLAP_DX x OVERLAP_DY wide and keyed with the normalized text,
+    so a lookup only inspects the 3x3 neighbourhood of one text bucket.
+    """
+
+    def __init__(self, dx=OVERLAP_DX, dy=OVERLAP_DY):
+        self.dx = float(dx)
+        self.dy = float(dy)
+        self._cells = {}
+
+    def is_duplicate(self, bbox, text):
+        if len(bbox) != 4:
+            return False
+        cx, cy = _bbox_center(bbox)
+        key = _normalize_overlap_text(text)
+        gx = int(cx // self.dx)
+        gy = int(cy // self.dy)
+        for ix in (gx - 1, gx, gx + 1):
+            for iy in (gy - 1, gy, gy + 1):
+                for px, py in self._cells.get((key, ix, iy), ()):
+                    if abs(py - cy) <= self.dy and abs(px - cx) <= self.dx:
+                        return True
         return False
 
-    cx = sum(pt[0] for pt in bbox) / 4.0
-    cy = sum(pt[1] for pt in bbox) / 4.0
-    normalized_text = (text or "").strip().lower()
+    def add(self, bbox, text):
+        if len(bbox) != 4:
+            return
+        cx, cy = _bbox_center(bbox)
+        cell = (_normalize_overlap_text(text), int(cx // self.dx), int(cy // self.dy))
+        self._cells.setdefault(cell, []).append((cx, cy))
 
-    for item in existing_items[-120:]:
-        item_bbox = item.get("bbox") or []
-        if len(item_bbox) != 4:
-            continue
+    def add_if_new(self, bbox, text):
+        if self.is_duplicate(bbox, text):
+            return False
+        self.add(bbox, text)
+        return True
+
+
+def _bbox_center(bbox):
+    return (
+        sum(float(pt[0]) for pt in bbox) / 4.0,
+        sum(float(pt[1]) for pt in bbox) / 4.0,
+    )
 
-        item_cx = sum(pt[0] for pt in item_bbox) / 4.0
-        item_cy = sum(pt[1] for pt in item_bbox) / 4.0
-        if abs(item_cy - cy) <= 18 and abs(item_cx - cx) <= 30:
-            if (item.get("text") or "").strip().lower() == normalized_text:
-                return True
 
-    return False
+def _normalize_overlap_text(text):
+    return (text or "").strip().lower()
@@ -0,0 +1,147 @@
+"""
+Compact page-level OCR results.
+
+OCR backends produce lists of {"id", "text", "confidence", "bbox"} dicts with
+four [x, y] points per box. OcrPage keeps the same data as one (N, 4, 2)
+float32 array, one (N,) float32 confidence array and a text list, stores it as
+ocr/<page>.npz, and derives parser words (x1/y1/x2/y2) from the arrays.
+"""
+import io
+import json
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.file_utils import atomic_write_bytes
+
+
+class OcrPage:
+    __slots__ = ("texts", "bboxes", "confidences", "_boxes")
+
+    def __init__(self, texts: List[str], bboxes: np.ndarray, confidences: np.ndarray):
+        self.texts = [str(text or "") for text in texts]
+        self.bboxes = np.asarray(bboxes, dtype=np.float32).reshape(-1, 4, 2)
+        self.confidences = np.asarray(confidences, dtype=np.float32).reshape(-1)
+        self._boxes = None
+        if not (len(self.texts) == self.bboxes.shape[0] == self.confidences.shape[0]):
+            raise ValueError("ocr_page_length_mismatch")
+
+    @classmethod
+    def empty(cls) -> "OcrPage":
+        return cls([], np.zeros((0, 4, 2), dtype=np.float32), np.zeros((0,), dtype=np.float32))
+
+    @classmethod
+    def from_items(cls, items: List[Dict]) -> "OcrPage":
+        texts: List[str] = []
+        quads: List[List[List[float]]] = []
+        confs: List[float] = []
+        for item in items or []:
+            bbox = item.get("bbox") or []
+            if len(bbox) != 4:
+                continue
+            try:
+                quad = [[float(pt[0]), float(pt[1])] for pt in bbox]
+                conf = float(item.get("confidence") or 0.0)
+            except (TypeError, ValueError, IndexError):
+                continue
+            texts.append(str(item.get("text") or ""))
+            quads.append(quad)
+            confs.append(conf)
+        if not quads:
+            return cls.empty()
+        return cls(texts, np.asarray(quads, dtype=np.float32), np.asarray(confs, dtype=np.float32))
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    @property
+    def boxes(self) -> np.ndarray:
+        """(N, 4) array of x1, y1, x2, y2, computed once per page."""
+        if self._boxes is None:
+            if len(self):
+                self._boxes = np.concatenate((self.bboxes.min(axis=1), self.bboxes.max(axis=1)), axis=1)
+            else:
+                self._boxes = np.zeros((0, 4), dtype=np.float32)
+        return self._boxes
+
+    @property
+    def text(self) -> str:
+        return " ".join(text for text in self.texts)
+
+    def to_items(self) -> List[Dict]:
+        return [
+            {
+                "id": i + 1,
+                "text": text,
+                "confidence": float(conf),
+                "bbox": quad.tolist(),
+            }
+            for i, (text, conf, quad) in enumerate(zip(self.texts, self.confidences, self.bboxes))
+        ]
+
+    def words(self) -> List[Dict]:
+        words: List[Dict] = []
+        for text, (x1, y1, x2, y2) in zip(self.texts, self.boxes.tolist()):
+            text = text.strip()
+            if not text:
+                continue
+            words.append({"text": text, "x1": x1, "y1": y1, "x2": x2, "y2": y2})
+        return words
+
+    def save(self, path: str):
+        buf = io.BytesIO()
+        np.savez_compressed(
+            buf,
+            texts=np.asarray(self.texts, dtype=np.str_),
+            bboxes=self.bboxes,
+            confidences=self.confidences,
+        )
+        atomic_write_bytes(path, buf.getvalue())
+
+    @classmethod
+    def load(cls, path: str) -> "OcrPage":
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data["texts"].tolist(), data["bboxes"], data["confidences"])
+
+
+def ocr_items_to_words(ocr_items) -> List[Dict]:
+    if isinstance(ocr_items, OcrPage):
+        return ocr_items.words()
+    return OcrPage.from_items(ocr_items).words()
+
+
+def ocr_page_path(ocr_dir: str, page: str) -> str:
+    return os.path.join(ocr_dir, f"{page}.npz")
+
+
+def write_ocr_page(ocr_dir: str, page: str, ocr_page) -> str:
+    if not isinstance(ocr_page, OcrPage):
+        ocr_page = OcrPage.from_items(ocr_page)
+    os.makedirs(ocr_dir, exist_ok=True)
+    path = ocr_page_path(ocr_dir, page)
+    ocr_page.save(path)
+    legacy_path = os.path.join(ocr_dir, f"{page}.json")
+    if os.path.exists(legacy_path):
+        os.remove(legacy_path)
+    return path
+
+
+def read_ocr_page(ocr_dir: str, page: str) -> Optional[OcrPage]:
+    """Read ocr/<page>.npz, falling back to the JSON files older jobs wrote."""
+    path = ocr_page_path(ocr_dir, page)
+    if os.path.exists(path):
+        try:
+            return OcrPage.load(path)
+        except (OSError, ValueError, KeyError):
+            pass
+    legacy_path = os.path.join(ocr_dir, f"{page}.json")
+    if os.path.exists(legacy_path):
+        try:
+            with open(legacy_path) as f:
+                items = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if isinstance(items, list):
+            return OcrPage.from_items(items)
+    return None
@@ -0,0 +1,152 @@
+"""
+Long-lived OCR model server.
+
+Loads the EasyOCR/PaddleOCR models once and serves OCR requests from API and
+Celery worker processes over a Unix socket, so recycled worker children do not
+pay the model load again and do not each hold a copy of the weights.
+
+Run with `python -m app.ocr_server`; clients opt in by setting OCR_SERVER_SOCKET.
+"""
+import logging
+import os
+import threading
+from multiprocessing.connection import Client, Listener
+from typing import Dict
+
+
+OCR_SERVER_SOCKET = os.getenv("OCR_SERVER_SOCKET", "").strip()
+OCR_SERVER_AUTHKEY = os.getenv("OCR_SERVER_AUTHKEY", "ocr-webapp").encode("utf-8")
+OCR_SERVER_TIMEOUT_SEC = float(os.getenv("OCR_SERVER_TIMEOUT_SEC", "300"))
+OCR_SERVER_PRELOAD = [
+    name.strip().lower()
+    for name in os.getenv("OCR_SERVER_PRELOAD", "easyocr").split(",")
+    if name.strip()
+]
+
+# Errors meaning the server could not be reached at all; only these make
+# callers fall back to in-process OCR. A server that accepted the request but
+# did not answer in time raises RuntimeError instead.
+OCR_SERVER_UNAVAILABLE = (ConnectionError, FileNotFoundError, EOFError)
+
+logger = logging.getLogger(__name__)
+
+_backend_locks: Dict[str, threading.Lock] = {}
+_backend_locks_guard = threading.Lock()
+
+
+def ocr_server_enabled() -> bool:
+    return bool(OCR_SERVER_SOCKET)
+
+
+def call_ocr_server(method: str, **kwargs):
+    """
+    Send one request to the OCR server and return its result.
+    Raises one of OCR_SERVER_UNAVAILABLE when the server is unreachable so
+    callers can fall back to in-process OCR, and RuntimeError when the server
+    failed or did not answer within OCR_SERVER_TIMEOUT_SEC.
+    """
+    conn = Client(OCR_SERVER_SOCKET, family="AF_UNIX", authkey=OCR_SERVER_AUTHKEY)
+    try:
+        conn.send({"method": method, "kwargs": kwargs})
+        if not conn.poll(OCR_SERVER_TIMEOUT_SEC):
+            raise RuntimeError("ocr_server_timeout")
+        response = conn.recv()
+    finally:
+        conn.close()
+
+    if not isinstance(response, dict) or not response.get("ok"):
+        error = response.get("error") if isinstance(response, dict) else None
+        raise RuntimeError(error or "ocr_server_failed")
+    return response.get("result")
+
+
+def _backend_lock(backend: str) -> threading.Lock:
+    with _backend_locks_guard:
+        lock = _backend_locks.get(backend)
+        if lock is None:
+            lock = threading.Lock()
+            _backend_locks[backend] = lock
+        return lock
+
+
+def _handle_request(request: Dict) -> Dict:
+    from app import ocr_engine
+
+    method = str(request.get("method") or "")
+    kwargs = dict(request.get("kwargs") or {})
+    backend = str(kwargs.get("backend") or "easyocr")
+
+    handlers = {
+        "ocr_image": ocr_engine.ocr_image_local,
+        "ocr_images": ocr_engine.ocr_images_local,
+    }
+    handler = handlers.get(method)
+    if handler is None:
+        return {"ok": False, "error": "unsupported_method"}
+
+    # Models are shared across connections; run one inference per backend at a time.
+    with _backend_lock(backend):
+        return {"ok": True, "result": handler(**kwargs)}
+
+
+def _serve_connection(conn):
+    try:
+        while True:
+            try:
+                request = conn.recv()
+            except EOFError:
+                return
+            try:
+                response = _handle_request(request)
+            except Exception as exc:
+                logger.exception("[OCR_SERVER] Request failed: %s", exc)
+                response = {"ok": False, "error": str(exc)}
+            conn.send(response)
+    finally:
+        conn.close()
+
+
+def _preload_models():
+    from app import ocr_engine
+
+    loaders = {
+        "easyocr": ocr_engine.get_reader,
+        "paddleocr": ocr_engine.get_paddle_reader,
+    }
+    for name in OCR_SERVER_PRELOAD:
+        loader = loaders.get(name)
+        if loader is None:
+            continue
+        try:
+            loader()
+            logger.info("[OCR_SERVER] Loaded %s model", name)
+        except Exception as exc:
+            logger.warning("[OCR_SERVER] Failed to preload %s: %s", name, exc, exc_info=exc)
+
+
+def serve_forever(socket_path: str = OCR_SERVER_SOCKET):
+    if not socket_path:
+        raise RuntimeError("OCR_SERVER_SOCKET is not set")
+
+    os.makedirs(os.path.dirname(socket_path) or ".", exist_ok=True)
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+
+    _preload_models()
+    listener = Listener(socket_path, family="AF_UNIX", authkey=OCR_SERVER_AUTHKEY)
+    logger.info("[OCR_SERVER] Listening on %s", socket_path)
+    try:
+        while True:
+            try:
+                conn = listener.accept()
+            except Exception as exc:
+                logger.warning("[OCR_SERVER] Rejected connection: %s", exc)
+                continue
+            threading.Thread(target=_serve_connection, args=(conn,), daemon=True).start()
+    finally:
+        listener.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    serve_forever()
@@ -0,0 +1,154 @@
+"""
+Per-page resolution pyramid.
+
+Each page is rasterized once at PAGE_PYRAMID_DPI and kept as
+jobs/<id>/pyramid/page_NNN.png with a small JSON sidecar holding the DPI the
+image actually has (it may be lower than requested when the pixel cap
+applies). Draft, preview, OCR and image-tool consumers derive the resolution
+they need from it by downscaling instead of rendering the PDF again.
+"""
+import json
+import logging
+import os
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+from app.file_utils import atomic_write_image, atomic_write_json, file_lock
+from app.pdf_renderer import fit_pixels, open_pdf_renderer
+
+
+PAGE_PYRAMID_ENABLED = str(os.getenv("PAGE_PYRAMID_ENABLED", "true")).strip().lower() not in {"0", "false", "no"}
+PAGE_PYRAMID_DPI = int(os.getenv("PAGE_PYRAMID_DPI", os.getenv("TOOL_IMAGE_DPI", "220")))
+PAGE_PYRAMID_MAX_PIXELS = int(os.getenv("PAGE_PYRAMID_MAX_PIXELS", os.getenv("TOOL_IMAGE_MAX_PIXELS", "16000000")))
+# DPI of the uncleaned preview pages the API renders on demand and the workers
+# prefetch; defined here once so both write identical previews.
+FALLBACK_PREVIEW_DPI = int(os.getenv("FALLBACK_PREVIEW_DPI", "130"))
+
+logger = logging.getLogger(__name__)
+
+
+def pyramid_base_path(job_dir: str, page_num: int) -> str:
+    return os.path.join(job_dir, "pyramid", f"page_{page_num:03}.png")
+
+
+def read_pyramid_base(job_dir: str, page_num: int) -> Optional[Tuple[np.ndarray, float]]:
+    path = pyramid_base_path(job_dir, page_num)
+    meta_path = f"{os.path.splitext(path)[0]}.json"
+    if not os.path.exists(meta_path):
+        return None
+    try:
+        with open(meta_path) as f:
+            dpi = float(json.load(f).get("dpi") or 0)
+    except (OSError, ValueError, AttributeError):
+        return None
+    img = cv2.imread(path)
+    if img is None or dpi <= 0:
+        return None
+    return img, dpi
+
+
+def has_pyramid_base(job_dir: str, page_num: int) -> bool:
+    path = pyramid_base_path(job_dir, page_num)
+    return os.path.exists(f"{os.path.splitext(path)[0]}.json") and os.path.exists(path)
+
+
+def store_pyramid_base(job_dir: str, page_num: int, img: np.ndarray, dpi: float, src_path: Optional[str] = None):
+    """
+    Save a page's top pyramid level. A PNG already on disk (src_path) that
+    holds exactly img is moved into place instead of being encoded again.
+    The sidecar is written last so readers never see a half-written level.
+    """
+    path = pyramid_base_path(job_dir, page_num)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if src_path:
+        os.replace(src_path, path)
+    else:
+        atomic_write_image(path, img)
+
+    meta_path = f"{os.path.splitext(path)[0]}.json"
+    atomic_write_json(meta_path, {"dpi": float(dpi), "width": int(img.shape[1]), "height": int(img.shape[0])})
+
+
+def fit_base(img: np.ndarray, dpi: float) -> Tuple[np.ndarray, float]:
+    """Apply PAGE_PYRAMID_MAX_PIXELS to a freshly rendered base and return its effective DPI."""
+    fitted = fit_pixels(img, PAGE_PYRAMID_MAX_PIXELS)
+    if fitted is img:
+        return img, float(dpi)
+    return fitted, float(dpi) * fitted.shape[1] / float(max(1, img.shape[1]))
+
+
+def derive_level(base: np.ndarray, base_dpi: float, dpi: float, max_pixels: Optional[int] = None) -> np.ndarray:
+    scale = float(dpi) / float(base_dpi) if base_dpi > 0 else 1.0
+    img = base
+    if scale < 0.999:
+        h, w = base.shape[:2]
+        img = cv2.resize(
+            base,
+            (max(1, int(round(w * scale))), max(1, int(round(h * scale)))),
+            interpolation=cv2.INTER_AREA,
+        )
+    return fit_pixels(img, max_pixels)
+
+
+def page_level(
+    job_dir: str,
+    input_pdf: str,
+    page_num: int,
+    dpi: int,
+    max_pixels: Optional[int] = None,
+) -> Optional[np.ndarray]:
+    """
+    Return page_num at dpi (BGR). Uses the stored pyramid base when present,
+    otherwise renders the base once, stores it and derives from it. With the
+    pyramid disabled the page is rendered directly at dpi.
+    """
+    if not PAGE_PYRAMID_ENABLED:
+        with open_pdf_renderer(input_pdf) as renderer:
+            return renderer.render_page(page_num, dpi, max_pixels=max_pixels)
+
+    base = read_pyramid_base(job_dir, page_num)
+    if base is None:
+        with file_lock(job_dir, pyramid_base_path(job_dir, page_num)):
+            base = read_pyramid_base(job_dir, page_num)
+            if base is None:
+                with open_pdf_renderer(input_pdf) as renderer:
+                    rendered = renderer.render_page(page_num, max(PAGE_PYRAMID_DPI, int(dpi)))
+                if rendered is None:
+                    return None
+                img, base_dpi = fit_base(rendered, max(PAGE_PYRAMID_DPI, int(dpi)))
+                try:
+                    store_pyramid_base(job_dir, page_num, img, base_dpi)
+                except OSError as exc:
+                    logger.warning("Failed to store pyramid base for %s page %s", job_dir, page_num, exc_info=exc)
+                base = (img, base_dpi)
+    return derive_level(base[0], base[1], dpi, max_pixels)
+
+
+def ensure_page_image(
+    job_dir: str,
+    input_pdf: str,
+    page_num: int,
+    output_path: str,
+    dpi: int,
+    max_pixels: Optional[int] = None,
+) -> bool:
+    """
+    Write page_num at dpi to output_path unless it already exists. Callers
+    racing on the same file (request handlers, the prefetch task) wait for the
+    in-flight render and then reuse its result instead of rendering again.
+    """
+    if os.path.exists(output_path):
+        return True
+    with file_lock(job_dir, output_path):
+        if os.path.exists(output_path):
+            return True
+        img = page_level(job_dir, input_pdf, page_num, dpi, max_pixels)
+        if img is None:
+            return False
+        try:
+            atomic_write_image(output_path, img)
+        except RuntimeError:
+            return False
+    return os.path.exists(output_path)
@@ -0,0 +1,198 @@
+"""
+Deep-zoom tiles and thumbnails for page images.
+
+Levels follow the Deep Zoom convention: the top level is the source image,
+each level below halves it, and level 0 is 1x1. Tiles are TILE_SIZE squares
+encoded as WebP or JPEG and cached under jobs/<id>/tiles/<page>/<version>/,
+where the version is derived from the source file's mtime and size so an
+edited page never serves stale tiles. A level's tiles are cut together the
+first time any of them is requested. Cutting, and dropping versions left
+over from earlier edits, happen under the page's file lock, so concurrent
+requests wait for one cut instead of repeating it. Pages with no page image
+yet get their thumbnail from the pyramid base or a small direct PDF render,
+never from a full-size preview.
+"""
+import json
+import math
+import os
+import shutil
+from typing import Dict, Optional
+
+import cv2
+import numpy as np
+
+from app.file_utils import atomic_write_image, atomic_write_json, file_lock
+from app.page_pyramid import read_pyramid_base
+from app.pdf_renderer import open_pdf_renderer
+
+
+TILE_SIZE = int(os.getenv("TILE_SIZE", "512"))
+TILE_FORMAT = "jpeg" if str(os.getenv("TILE_FORMAT", "webp")).strip().lower() in {"jpg", "jpeg"} else "webp"
+TILE_QUALITY = int(os.getenv("TILE_QUALITY", "80"))
+THUMBNAIL_MAX_SIDE = int(os.getenv("THUMBNAIL_MAX_SIDE", "320"))
+THUMBNAIL_RENDER_DPI = int(os.getenv("THUMBNAIL_RENDER_DPI", "40"))
+
+TILE_MEDIA_TYPES = {"webp": "image/webp", "jpeg": "image/jpeg"}
+_EXTENSIONS = {"webp": ".webp", "jpeg": ".jpg"}
+
+
+def tile_media_type() -> str:
+    return TILE_MEDIA_TYPES[TILE_FORMAT]
+
+
+def source_version(source_path: str) -> str:
+    st = os.stat(source_path)
+    return f"{st.st_mtime_ns:x}-{st.st_size:x}"
+
+
+def max_level(width: int, height: int) -> int:
+    return int(math.ceil(math.log2(max(1, width, height))))
+
+
+def level_size(width: int, height: int, level: int) -> tuple:
+    scale = 2 ** (max_level(width, height) - level)
+    return max(1, int(math.ceil(width / scale))), max(1, int(math.ceil(height / scale)))
+
+
+def tile_cache_root(job_dir: str, page_name: str) -> str:
+    return os.path.join(job_dir, "tiles", page_name)
+
+
+def tile_info(source_path: str, job_dir: str, page_name: str) -> Dict:
+    cache_root = tile_cache_root(job_dir, page_name)
+    version_dir = os.path.join(cache_root, source_version(source_path))
+    info_path = os.path.join(version_dir, "info.json")
+    info = _read_info(info_path)
+    if info is not None:
+        return info
+
+    with file_lock(job_dir, cache_root):
+        info = _read_info(info_path)
+        if info is not None:
+            return info
+        _drop_old_versions(cache_root, version_dir)
+        img = cv2.imread(source_path, cv2.IMREAD_UNCHANGED)
+        if img is None:
+            raise ValueError("source_unreadable")
+        height, width = img.shape[:2]
+        top = max_level(width, height)
+        levels = []
+        for level in range(top + 1):
+            w, h = level_size(width, height, level)
+            levels.append({"level": level, "width": w, "height": h, "cols": math.ceil(w / TILE_SIZE), "rows": math.ceil(h / TILE_SIZE)})
+        info = {
+            "width": width,
+            "height": height,
+            "tile_size": TILE_SIZE,
+            "format": TILE_FORMAT,
+            "max_level": top,
+            "version": os.path.basename(version_dir),
+            "levels": levels,
+        }
+        atomic_write_json(info_path, info)
+    return info
+
+
+def get_tile_path(source_path: str, job_dir: str, page_name: str, level: int, col: int, row: int) -> Optional[str]:
+    """Return the cached tile for (level, col, row), cutting the level on first use; None if out of range."""
+    cache_root = tile_cache_root(job_dir, page_name)
+    version_dir = os.path.join(cache_root, source_version(source_path))
+    path = os.path.join(version_dir, str(level), f"{col}_{row}{_EXTENSIONS[TILE_FORMAT]}")
+    if os.path.exists(path):
+        return path
+
+    with file_lock(job_dir, cache_root):
+        if os.path.exists(path):
+            # Another request cut this level while we waited.
+            return path
+        _drop_old_versions(cache_root, version_dir)
+        img = cv2.imread(source_path, cv2.IMREAD_UNCHANGED)
+        if img is None:
+            return None
+        height, width = img.shape[:2]
+        if level < 0 or level > max_level(width, height):
+            return None
+        level_w, level_h = level_size(width, height, level)
+        if col < 0 or row < 0 or col * TILE_SIZE >= level_w or row * TILE_SIZE >= level_h:
+            return None
+
+        level_img = img if (level_w, level_h) == (width, height) else cv2.resize(img, (level_w, level_h), interpolation=cv2.INTER_AREA)
+        level_dir = os.path.dirname(path)
+        for y in range(0, level_h, TILE_SIZE):
+            for x in range(0, level_w, TILE_SIZE):
+                tile = level_img[y:y + TILE_SIZE, x:x + TILE_SIZE]
+                tile_path = os.path.join(level_dir, f"{x // TILE_SIZE}_{y // TILE_SIZE}{_EXTENSIONS[TILE_FORMAT]}")
+                _write_encoded(tile_path, tile)
+    return path if os.path.exists(path) else None
+
+
+def get_thumbnail_path(source_path: str, job_dir: str, page_name: str) -> Optional[str]:
+    return _thumbnail_path(
+        job_dir,
+        page_name,
+        source_version(source_path),
+        lambda: cv2.imread(source_path, cv2.IMREAD_UNCHANGED),
+    )
+
+
+def get_pdf_thumbnail_path(job_dir: str, page_name: str, page_num: int) -> Optional[str]:
+    """Thumbnail of a page that has no page image yet: from the pyramid base when stored, else a low-DPI render."""
+    input_pdf = os.path.join(job_dir, "input", "document.pdf")
+    if page_num <= 0 or not os.path.exists(input_pdf):
+        return None
+
+    def _render():
+        base = read_pyramid_base(job_dir, page_num)
+        if base is not None:
+            return base[0]
+        with open_pdf_renderer(input_pdf) as renderer:
+            return renderer.render_page(page_num, THUMBNAIL_RENDER_DPI, max_pixels=4 * THUMBNAIL_MAX_SIDE * THUMBNAIL_MAX_SIDE)
+
+    return _thumbnail_path(job_dir, page_name, f"pdf-{source_version(input_pdf)}", _render)
+
+
+def _thumbnail_path(job_dir: str, page_name: str, version: str, load) -> Optional[str]:
+    cache_root = tile_cache_root(job_dir, page_name)
+    version_dir = os.path.join(cache_root, version)
+    path = os.path.join(version_dir, f"thumb{_EXTENSIONS[TILE_FORMAT]}")
+    if os.path.exists(path):
+        return path
+
+    with file_lock(job_dir, cache_root):
+        if os.path.exists(path):
+            return path
+        _drop_old_versions(cache_root, version_dir)
+        img = load()
+        if img is None:
+            return None
+        height, width = img.shape[:2]
+        scale = min(1.0, THUMBNAIL_MAX_SIDE / float(max(width, height)))
+        if scale < 1.0:
+            img = cv2.resize(img, (max(1, int(width * scale)), max(1, int(height * scale))), interpolation=cv2.INTER_AREA)
+        _write_encoded(path, img)
+    return path
+
+
+def _read_info(info_path: str) -> Optional[Dict]:
+    if not os.path.exists(info_path):
+        return None
+    try:
+        with open(info_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _drop_old_versions(cache_root: str, version_dir: str):
+    # Callers hold the page's tile lock, so no other request is cutting into these.
+    if os.path.isdir(version_dir) or not os.path.isdir(cache_root):
+        return
+    current = os.path.basename(version_dir)
+    for name in os.listdir(cache_root):
+        if name != current:
+            shutil.rmtree(os.path.join(cache_root, name), ignore_errors=True)
+
+
+def _write_encoded(path: str, img: np.ndarray):
+    quality = cv2.IMWRITE_JPEG_QUALITY if TILE_FORMAT == "jpeg" else cv2.IMWRITE_WEBP_QUALITY
+    atomic_write_image(path, img, [quality, TILE_QUALITY])
@@ -0,0 +1,164 @@
+"""
+Upload-time PDF preflight.
+
+preflight_pdf opens the document once with PDFium and, without rasterizing,
+records page count, encryption and page sizes, plus text-layer word counts
+for up to PREFLIGHT_TEXT_SAMPLE_PAGES pages spread over the document, and a
+rough processing-time estimate per parse mode extrapolated from that sample.
+The PDFium lock is taken per page, so uploads do not stall renders. The result is
+kept as jobs/<id>/preflight.json; a compact summary travels with the job
+status so the UI and scheduler can use it before a worker starts.
+"""
+import json
+import os
+import time
+from typing import Dict, List, Optional
+
+from pdf2image import pdfinfo_from_path
+
+from app.file_utils import atomic_write_json
+from app.pdf_renderer import pdfium_available, pdfium_document, pdfium_lock
+
+try:
+    import pypdfium2 as pdfium
+except Exception:
+    pdfium = None
+
+
+PREFLIGHT_TEXT_PAGE_SECONDS = float(os.getenv("PREFLIGHT_TEXT_PAGE_SECONDS", "0.05"))
+PREFLIGHT_OCR_PAGE_SECONDS = float(os.getenv("PREFLIGHT_OCR_PAGE_SECONDS", "4.0"))
+PREFLIGHT_MIN_TEXT_WORDS = int(os.getenv("PREFLIGHT_MIN_TEXT_WORDS", "5"))
+PREFLIGHT_TEXT_SAMPLE_PAGES = int(os.getenv("PREFLIGHT_TEXT_SAMPLE_PAGES", "16"))
+
+
+def preflight_pdf(pdf_path: str) -> Dict:
+    started = time.perf_counter()
+    if pdfium_available():
+        result = _preflight_pdfium(pdf_path)
+    else:
+        result = _preflight_pdfinfo(pdf_path)
+    result["estimate"] = _estimate(result)
+    result["elapsed_ms"] = round((time.perf_counter() - started) * 1000.0, 2)
+    return result
+
+
+def preflight_summary(preflight: Optional[Dict]) -> Optional[Dict]:
+    """Status-sized view of a preflight result (no per-page list)."""
+    if not isinstance(preflight, dict):
+        return None
+    return {key: value for key, value in preflight.items() if key != "pages"}
+
+
+def preflight_path(job_dir: str) -> str:
+    return os.path.join(job_dir, "preflight.json")
+
+
+def write_preflight(job_dir: str, preflight: Dict) -> str:
+    path = preflight_path(job_dir)
+    atomic_write_json(path, preflight)
+    return path
+
+
+def read_preflight(job_dir: str) -> Optional[Dict]:
+    path = preflight_path(job_dir)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _preflight_pdfium(pdf_path: str) -> Dict:
+    try:
+        with pdfium_document(pdf_path) as doc:
+            with pdfium_lock():
+                encrypted = pdfium.raw.FPDF_GetSecurityHandlerRevision(doc.raw) != -1
+                page_count = len(doc)
+            sampled = set(_text_sample_pages(page_count, PREFLIGHT_TEXT_SAMPLE_PAGES))
+            pages = []
+            for index in range(page_count):
+                # One page per lock hold; other threads' renders interleave.
+                with pdfium_lock():
+                    width_pt, height_pt = doc.get_page_size(index)
+                    words = _page_word_count(doc, index) if index in sampled else None
+                pages.append(
+                    {
+                        "page": index + 1,
+                        "width_pt": round(float(width_pt), 2),
+                        "height_pt": round(float(height_pt), 2),
+                        "words": words,
+                        "has_text": None if words is None else words >= PREFLIGHT_MIN_TEXT_WORDS,
+                    }
+                )
+    except pdfium.PdfiumError as exc:
+        if getattr(exc, "err_code", None) == pdfium.raw.FPDF_ERR_PASSWORD:
+            return {"page_count": 0, "encrypted": True, "password_required": True, "pages": []}
+        raise
+    return {"page_count": len(pages), "encrypted": encrypted, "password_required": False, "pages": pages}
+
+
+def _page_word_count(doc, index: int) -> int:
+    page = doc[index]
+    try:
+        textpage = page.get_textpage()
+        try:
+            return len(textpage.get_text_range().split())
+        finally:
+            textpage.close()
+    finally:
+        page.close()
+
+
+def _text_sample_pages(page_count: int, limit: int) -> List[int]:
+    """0-based page indexes spread evenly over the document, first and last included."""
+    if page_count <= 0:
+        return []
+    if limit <= 0 or page_count <= limit:
+        return list(range(page_count))
+    if limit == 1:
+        return [0]
+    return sorted({round(i * (page_count - 1) / (limit - 1)) for i in range(limit)})
+
+
+def _preflight_pdfinfo(pdf_path: str) -> Dict:
+    # Without PDFium only document-level facts are cheap; text presence stays unknown.
+    info = pdfinfo_from_path(pdf_path)
+    page_count = int(info.get("Pages") or 0)
+    return {
+        "page_count": page_count,
+        "encrypted": str(info.get("Encrypted") or "no").strip().lower().startswith("yes"),
+        "password_required": False,
+        "pages": [{"page": i, "words": None, "has_text": None} for i in range(1, page_count + 1)],
+    }
+
+
+def _estimate(result: Dict) -> Dict:
+    pages = result.get("pages") or []
+    total = len(pages)
+    # Page counts are extrapolated from the pages whose text layer was sampled.
+    sampled = [page for page in pages if page.get("has_text") is not None]
+    if sampled:
+        text_pages = round(total * sum(1 for page in sampled if page["has_text"]) / len(sampled))
+        image_pages = total - text_pages
+    else:
+        text_pages = image_pages = 0
+    if not sampled or image_pages == 0:
+        suggested_mode = "text"
+    elif text_pages == 0:
+        suggested_mode = "ocr"
+    else:
+        suggested_mode = "auto"
+    return {
+        "text_pages": text_pages,
+        "image_pages": image_pages,
+        "sampled_pages": len(sampled),
+        "suggested_mode": suggested_mode,
+        "seconds": {
+            "text": round(total * PREFLIGHT_TEXT_PAGE_SECONDS, 1),
+            "ocr": round(total * PREFLIGHT_OCR_PAGE_SECONDS, 1),
+            "auto": round(text_pages * PREFLIGHT_TEXT_PAGE_SECONDS + (total - text_pages) * PREFLIGHT_OCR_PAGE_SECONDS, 1),
+        },
+    }
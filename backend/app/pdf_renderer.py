@@ -0,0 +1,195 @@
+"""
+Pluggable PDF page rasterization.
+
+`pdfium` renders in-process through pypdfium2: the document is opened once and
+pages are rendered straight into numpy arrays. `poppler` shells out to
+pdftoppm through pdf2image, one process per call. PDF_RENDERER selects the
+backend (`auto` uses pdfium when pypdfium2 is installed).
+"""
+import logging
+import math
+import os
+import threading
+from contextlib import contextmanager
+from typing import Optional
+
+import cv2
+import numpy as np
+from pdf2image import convert_from_path, pdfinfo_from_path
+
+try:
+    import pypdfium2 as pdfium
+except Exception:
+    pdfium = None
+
+
+PDF_RENDERER = str(os.getenv("PDF_RENDERER", "auto")).strip().lower() or "auto"
+
+logger = logging.getLogger(__name__)
+
+# PDFium is not thread-safe; every call into it goes through this lock.
+_pdfium_lock = threading.Lock()
+
+
+class PdfRenderer:
+    name = ""
+    # True when pages are rendered in this process without spawning tools.
+    in_process = False
+
+    def __init__(self, pdf_path: str):
+        self.pdf_path = pdf_path
+
+    def page_count(self) -> int:
+        raise NotImplementedError
+
+    def render_page(
+        self,
+        page_num: int,
+        dpi: int,
+        grayscale: bool = False,
+        max_pixels: Optional[int] = None,
+    ) -> Optional[np.ndarray]:
+        """Render a 1-based page to a BGR (or grayscale) array, or None."""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+class PdfiumRenderer(PdfRenderer):
+    name = "pdfium"
+    in_process = True
+
+    def __init__(self, pdf_path: str):
+        super().__init__(pdf_path)
+        with _pdfium_lock:
+            self._doc = pdfium.PdfDocument(pdf_path)
+
+    def page_count(self) -> int:
+        with _pdfium_lock:
+            return len(self._doc)
+
+    def render_page(self, page_num, dpi, grayscale=False, max_pixels=None):
+        if page_num <= 0:
+            return None
+        with _pdfium_lock:
+            if page_num > len(self._doc):
+                return None
+            page = self._doc[page_num - 1]
+            try:
+                width_pt, height_pt = page.get_size()
+                # Cap the pixel count by lowering the scale instead of resizing afterwards.
+                scale = _fit_scale(width_pt, height_pt, dpi / 72.0, max_pixels)
+                bitmap = page.render(scale=scale, grayscale=grayscale)
+                try:
+                    img = np.array(bitmap.to_numpy(), copy=True)
+                finally:
+                    bitmap.close()
+            finally:
+                page.close()
+        if not grayscale and img.ndim == 3 and img.shape[2] == 4:
+            img = cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
+        return img
+
+    def close(self):
+        doc, self._doc = getattr(self, "_doc", None), None
+        if doc is not None:
+            with _pdfium_lock:
+                doc.close()
+
+
+class PopplerRenderer(PdfRenderer):
+    name = "poppler"
+
+    def page_count(self) -> int:
+        info = pdfinfo_from_path(self.pdf_path)
+        return int(info.get("Pages") or 0)
+
+    def render_page(self, page_num, dpi, grayscale=False, max_pixels=None):
+        if page_num <= 0:
+            return None
+        pages = convert_from_path(
+            self.pdf_path,
+            dpi=dpi,
+            fmt="png",
+            first_page=page_num,
+            last_page=page_num,
+            grayscale=grayscale,
+        )
+        if not pages:
+            return None
+        page = pages[0]
+        if grayscale:
+            img = np.asarray(page.convert("L"))
+        else:
+            img = cv2.cvtColor(np.asarray(page.convert("RGB")), cv2.COLOR_RGB2BGR)
+        return fit_pixels(img, max_pixels)
+
+
+@contextmanager
+def pdfium_document(pdf_path: str):
+    """
+    Open pdf_path with PDFium for a read. Only opening and closing take the
+    process-wide PDFium lock; wrap each use of the document in pdfium_lock()
+    so renders in other threads can run between pages. Requires pypdfium2
+    (see pdfium_available); open failures raise pdfium's PdfiumError.
+    """
+    with _pdfium_lock:
+        doc = pdfium.PdfDocument(pdf_path)
+    try:
+        yield doc
+    finally:
+        with _pdfium_lock:
+            doc.close()
+
+
+def pdfium_lock() -> threading.Lock:
+    """The process-wide lock every PDFium call must hold (PDFium is not thread-safe)."""
+    return _pdfium_lock
+
+
+def pdfium_available() -> bool:
+    return pdfium is not None
+
+
+def open_pdf_renderer(pdf_path: str, backend: Optional[str] = None) -> PdfRenderer:
+    backend = (backend or PDF_RENDERER).strip().lower()
+    if backend in {"auto", "pdfium"} and pdfium is not None:
+        try:
+            return PdfiumRenderer(pdf_path)
+        except Exception as exc:
+            logger.warning("PDFium could not open %s, using poppler: %s", pdf_path, exc)
+    elif backend == "pdfium":
+        logger.warning("PDF_RENDERER=pdfium but pypdfium2 is not installed; using poppler")
+    return PopplerRenderer(pdf_path)
+
+
+def fit_pixels(img: Optional[np.ndarray], max_pixels: Optional[int]) -> Optional[np.ndarray]:
+    if img is None or not max_pixels:
+        return img
+    h, w = img.shape[:2]
+    pixels = max(1, w * h)
+    if pixels <= max_pixels:
+        return img
+    scale = math.sqrt(max_pixels / float(pixels))
+    return cv2.resize(img, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_LINEAR)
+
+
+def _fit_scale(width_pt: float, height_pt: float, scale: float, max_pixels: Optional[int]) -> float:
+    if not max_pixels:
+        return scale
+    pixels = max(1.0, width_pt * scale) * max(1.0, height_pt * scale)
+    if pixels <= max_pixels:
+        return scale
+    fitted = scale * math.sqrt(max_pixels / pixels)
+    # PDFium rounds bitmap sizes up; step down until the rounded size fits.
+    while math.ceil(width_pt * fitted) * math.ceil(height_pt * fitted) > max_pixels:
+        fitted *= 0.995
+    return fitted
@@ -1,6 +1,14 @@
+import os
 import subprocess
+import tempfile
 import xml.etree.ElementTree as ET
-from typing import Dict, List
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional
+
+
+PDF_TEXT_WORKERS = int(os.getenv("PDF_TEXT_WORKERS", str(min(4, os.cpu_count() or 1))))
+PDF_TEXT_PAGES_PER_SHARD = int(os.getenv("PDF_TEXT_PAGES_PER_SHARD", "25"))
 
 
 def extract_pdf_layout_pages(pdf_path: str) -> List[Dict]:
@@ -8,46 +16,149 @@ def extract_pdf_layout_pages(pdf_path: str) -> List[Dict]:
     Extract per-page word layout from a text-layer PDF using pdftotext -bbox-layout.
     Returns: [{"width", "height", "words", "text"}, ...]
     """
-    xml_text = subprocess.check_output(
-        ["pdftotext", "-bbox-layout", pdf_path, "-"],
-        text=True,
-        stderr=subprocess.STDOUT,
-    )
-
-    root = ET.fromstring(xml_text)
-    pages: List[Dict] = []
-
-    for page in root.findall(".//{*}page"):
-        width = float(page.attrib.get("width", "1"))
-        height = float(page.attrib.get("height", "1"))
-
-        words = []
-        text_parts = []
-
-        for word in page.findall(".//{*}word"):
-            text = (word.text or "").strip()
-            if not text:
-                continue
-
-            x1 = float(word.attrib.get("xMin", "0"))
-            y1 = float(word.attrib.get("yMin", "0"))
-            x2 = float(word.attrib.get("xMax", str(width)))
-            y2 = float(word.attrib.get("yMax", "0"))
-
-            words.append({
-                "text": text,
-                "x1": x1,
-                "y1": y1,
-                "x2": x2,
-                "y2": y2,
-            })
-            text_parts.append(text)
-
-        pages.append({
-            "width": width,
-            "height": height,
-            "words": words,
-            "text": " ".join(text_parts),
+    return list(iter_pdf_layout_pages(pdf_path))
+
+
+def iter_pdf_layout_pages_sharded(
+    pdf_path: str,
+    total_pages: int,
+    workers: Optional[int] = None,
+    pages_per_shard: Optional[int] = None,
+) -> Iterator[Dict]:
+    """
+    Yield the same pages as iter_pdf_layout_pages, extracted as page ranges by
+    several pdftotext runs in parallel and merged back in page order. Only a
+    few shards run ahead of the consumer. Uses a single run when the page
+    count is unknown or there is only one shard.
+    """
+    shard_size = max(1, int(pages_per_shard or PDF_TEXT_PAGES_PER_SHARD))
+    shards = [(first, min(total_pages, first + shard_size - 1)) for first in range(1, max(0, total_pages) + 1, shard_size)]
+    workers = max(1, min(int(workers or PDF_TEXT_WORKERS), len(shards)))
+    if workers <= 1:
+        yield from iter_pdf_layout_pages(pdf_path)
+        return
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        next_shard = 0
+        try:
+            while pending or next_shard < len(shards):
+                while next_shard < len(shards) and len(pending) < workers + 1:
+                    first, last = shards[next_shard]
+                    pending.append(executor.submit(_extract_shard, pdf_path, first, last))
+                    next_shard += 1
+                yield from pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def _extract_shard(pdf_path: str, first_page: int, last_page: int) -> List[Dict]:
+    return list(iter_pdf_layout_pages(pdf_path, first_page=first_page, last_page=last_page))
+
+
+def extract_pdf_layout_page(pdf_path: str, page_num: int) -> Optional[Dict]:
+    """Extract a single page (1-based) with pdftotext -f/-l; None when the page does not exist."""
+    if page_num <= 0:
+        return None
+    for layout in iter_pdf_layout_pages(pdf_path, first_page=page_num, last_page=page_num):
+        return layout
+    return None
+
+
+def iter_pdf_layout_pages(
+    pdf_path: str,
+    first_page: Optional[int] = None,
+    last_page: Optional[int] = None,
+) -> Iterator[Dict]:
+    """
+    Stream per-page word layout from pdftotext -bbox-layout, yielding each page
+    as soon as its closing tag is read. Only the current page's elements are
+    kept in memory. Raises CalledProcessError after the last page when
+    pdftotext fails; closing the generator early stops pdftotext.
+    """
+    cmd = ["pdftotext", "-bbox-layout"]
+    if first_page:
+        cmd += ["-f", str(int(first_page))]
+    if last_page:
+        cmd += ["-l", str(int(last_page))]
+    cmd += [pdf_path, "-"]
+    with tempfile.TemporaryFile() as stderr:
+        proc = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=stderr,
+            # Unbuffered so each read returns what pdftotext has written so far
+            # instead of waiting for a full chunk.
+            bufsize=0,
+        )
+        try:
+            open_elems: List[ET.Element] = []
+            for event, elem in ET.iterparse(proc.stdout, events=("start", "end")):
+                if event == "start":
+                    open_elems.append(elem)
+                    continue
+                open_elems.pop()
+                if _local_name(elem.tag) != "page":
+                    continue
+                yield _page_layout(elem)
+                # Drop the finished page from the tree so memory stays flat.
+                if open_elems:
+                    open_elems[-1].remove(elem)
+                elem.clear()
+        except ET.ParseError:
+            if proc.wait() == 0:
+                raise
+        finally:
+            if proc.poll() is None:
+                proc.kill()
+            proc.stdout.close()
+            returncode = proc.wait()
+
+        if returncode != 0:
+            stderr.seek(0)
+            raise subprocess.CalledProcessError(
+                returncode,
+                proc.args,
+                output=stderr.read().decode("utf-8", errors="replace"),
+            )
+
+
+def _page_layout(page: ET.Element) -> Dict:
+    width = float(page.attrib.get("width", "1"))
+    height = float(page.attrib.get("height", "1"))
+
+    words = []
+    text_parts = []
+
+    for word in page.iter():
+        if _local_name(word.tag) != "word":
+            continue
+        text = (word.text or "").strip()
+        if not text:
+            continue
+
+        x1 = float(word.attrib.get("xMin", "0"))
+        y1 = float(word.attrib.get("yMin", "0"))
+        x2 = float(word.attrib.get("xMax", str(width)))
+        y2 = float(word.attrib.get("yMax", "0"))
+
+        words.append({
+            "text": text,
+            "x1": x1,
+            "y1": y1,
+            "x2": x2,
+            "y2": y2,
         })
+        text_parts.append(text)
+
+    return {
+        "width": width,
+        "height": height,
+        "words": words,
+        "text": " ".join(text_parts),
+    }
+
 
-    return pages
+def _local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
@@ -2,7 +2,7 @@ import datetime as dt
 import re
 from typing import Dict, List, Optional, Tuple
 
-from app.bank_profiles import BankProfile, PROFILES
+from app.bank_profiles import BankProfile, PROFILES, detect_bank_profile
 
 
 DATE_PATTERNS = {
@@ -396,6 +396,45 @@ def parse_page_with_profile_fallback(
     return selected_rows, selected_bounds, selected_diag
 
 
+def find_table_header(words: List[Dict], profile: Optional[BankProfile] = None) -> Optional[Dict]:
+    """
+    Locate the transaction table header in a word list.
+    Returns the column anchors from _find_header_anchors plus the header line
+    box (x1/y1/x2/y2) and the table x-span covered by the anchors, or None.
+    Without a profile the one detected from the words is tried, then GENERIC.
+    """
+    grouped = _group_words_by_line(words)
+    if not grouped:
+        return None
+
+    if profile is None:
+        profile = detect_bank_profile(" ".join(w["text"] for w in words))
+    candidates = [profile]
+    generic = PROFILES.get("GENERIC")
+    if generic is not None and generic is not profile:
+        candidates.append(generic)
+
+    for candidate in candidates:
+        header = _find_header_anchors(grouped, candidate)
+        if not header:
+            continue
+        line = next(line for line in grouped if line["cy"] == header["y"])
+        anchors = [header[key] for key in ("date", "description", "debit", "credit", "balance") if header.get(key) is not None]
+        header.update(
+            {
+                "profile": candidate.name,
+                "x1": min(w["x1"] for w in line["words"]),
+                "y1": min(w["y1"] for w in line["words"]),
+                "x2": max(w["x2"] for w in line["words"]),
+                "y2": max(w["y2"] for w in line["words"]),
+                "table_x1": min(anchors),
+                "table_x2": max(anchors),
+            }
+        )
+        return header
+    return None
+
+
 def evaluate_quality(rows: List[Dict]) -> Dict:
     total = len(rows)
     if total == 0:
@@ -475,6 +514,42 @@ def should_fallback_to_ocr(
     return False, None
 
 
+_ROW_COUNT_REASONS = {"few_rows", "no_rows"}
+
+
+def route_page_source(
+    text_word_count: int,
+    rows: List[Dict],
+    diagnostics: Dict,
+) -> Tuple[str, Optional[str]]:
+    """
+    Per-page source for `auto` parse mode: "ocr" with the reason when the
+    page has no text layer or its parse fails evaluate_quality on the row
+    content, otherwise "text". A short page (few_rows/no_rows alone), such as
+    a closing summary, stays on its text layer.
+    """
+    fallback, reason = should_fallback_to_ocr(text_word_count, rows, diagnostics)
+    if fallback:
+        return "ocr", reason
+    quality = evaluate_quality(rows)
+    failures = [r for r in quality["reasons"] if r not in _ROW_COUNT_REASONS]
+    if failures:
+        return "ocr", "text_quality:" + ",".join(failures)
+    return "text", None
+
+
+def ocr_rows_preferred(
+    text_rows: List[Dict],
+    text_profile: BankProfile,
+    ocr_rows: List[Dict],
+    ocr_profile: BankProfile,
+) -> bool:
+    """True when the OCR parse of a routed page yields at least as many transaction rows as the text parse."""
+    text_count = sum(1 for row in text_rows if is_transaction_row(row, text_profile))
+    ocr_count = sum(1 for row in ocr_rows if is_transaction_row(row, ocr_profile))
+    return ocr_count >= text_count
+
+
 def _rows_conversion_ratio(rows: List[Dict], diagnostics: Dict) -> float:
     row_candidates = int(diagnostics.get("row_candidates") or 0)
     if row_candidates <= 0:
@@ -45,6 +45,7 @@ const guideUndoBtn = document.getElementById('guideUndoBtn');
 const guideRedoBtn = document.getElementById('guideRedoBtn');
 const runSectionOcrBtn = document.getElementById('runSectionOcrBtn');
 const imageToolButtons = Array.from(document.querySelectorAll('.preview-image-tool-btn'));
+const imageHistoryButtons = Array.from(document.querySelectorAll('.preview-image-history-btn'));
 const guideSectionsInfo = document.getElementById('guideSectionsInfo');
 const sectionOcrResult = document.getElementById('sectionOcrResult');
 const previewColumnsRuler = document.getElementById('previewColumnsRuler');
@@ -134,6 +135,11 @@ let panOriginX = 0;
 let panOriginY = 0;
 const prefetchedPreviewSrcs = new Set();
 const previewBlobUrlCache = new Map();
+// Deep-zoom layer over the preview: the page image is a thumbnail and only the
+// tiles covering the visible area, at the level matching the zoom, are loaded.
+const previewTileLayer = createPreviewTileLayer();
+const previewTileInfoCache = new Map();
+let previewTileState = null;
 let authToken = localStorage.getItem('auth_token') || '';
 let authRole = localStorage.getItem('auth_role') || '';
 let authUserEmail = localStorage.getItem('auth_email') || '';
@@ -193,6 +199,11 @@ let sectionOcrInFlight = false;
 let sectionOcrProgressTimer = null;
 let sectionOcrProgressValue = 0;
 let imageToolInFlight = false;
+let imageToolApplyPollTimer = null;
+let imageToolProxyUrl = '';
+// Undo/redo availability of the current page's image edit chain.
+let imageToolChainState = { key: '', pageKey: '', canUndo: false, canRedo: false };
+const IMAGE_TOOL_POLL_MS = 600;
 let activeParseMode = 'text';
 let ocrToolsUnlocked = false;
 let toastContainer = null;
@@ -1252,17 +1263,29 @@ async function applyImageToolForCurrentPage(tool) {
 
   try {
     setImageToolBusy(true);
-    const res = await fetchAuthed(`/jobs/${currentJobId}/pages/${pageKey}/image-tool`, {
+    // The proxy preview comes back right away; the full-resolution page is
+    // applied in the background and picked up by waitForImageToolApply.
+    const res = await fetchAuthed(`/jobs/${currentJobId}/pages/${pageKey}/image-tool/preview`, {
       method: 'POST',
       headers: { 'Content-Type': 'application/json' },
       body: JSON.stringify({ tool }),
     });
-    const body = await safeParseJson(res);
     if (!res.ok) {
+      const body = await safeParseJson(res);
       throw new Error((body && body.detail) || `Failed to apply ${imageToolLabel(tool)}`);
     }
-    await refreshCurrentPageData(pageKey);
-    renderCurrentPage();
+    const blob = await res.blob();
+    if (currentPageKey() === pageKey) {
+      if (imageToolProxyUrl) URL.revokeObjectURL(imageToolProxyUrl);
+      imageToolProxyUrl = URL.createObjectURL(blob);
+      clearPreviewTiles();
+      previewImage.dataset.loadedSrc = '';
+      previewImage.src = imageToolProxyUrl;
+      previewImage.style.display = 'block';
+    }
+    const position = Number(res.headers.get('X-Tool-Chain-Position') || 0);
+    setImageToolChainState(pageKey, { can_undo: position > 0, can_redo: false });
+    waitForImageToolApply(currentJobId, pageKey);
   } catch (err) {
     alert(err.message || `Failed to apply ${imageToolLabel(tool)}`);
   } finally {
@@ -1270,6 +1293,78 @@ async function applyImageToolForCurrentPage(tool) {
   }
 }
 
+async function moveImageToolHistory(direction) {
+  if (!currentJobId || !pageList.length || imageToolInFlight) return;
+  const pageKey = currentPageKey();
+  if (!pageKey) return;
+  const label = direction === 'undo' ? 'undo' : 'redo';
+
+  try {
+    setImageToolBusy(true);
+    const res = await fetchAuthed(`/jobs/${currentJobId}/pages/${pageKey}/image-tool/${label}`, { method: 'POST' });
+    const body = await safeParseJson(res);
+    if (!res.ok) {
+      throw new Error((body && body.detail) || `Failed to ${label} image edit`);
+    }
+    setImageToolChainState(pageKey, body);
+    await refreshCurrentPageData(pageKey);
+    if (currentPageKey() === pageKey) renderCurrentPage();
+  } catch (err) {
+    alert(err.message || `Failed to ${label} image edit`);
+  } finally {
+    setImageToolBusy(false);
+  }
+}
+
+function setImageToolChainState(pageKey, body) {
+  imageToolChainState = {
+    key: `${currentJobId}|${pageKey}|${pageImageVersion[pageKey] || 0}`,
+    pageKey,
+    canUndo: !!(body && body.can_undo),
+    canRedo: !!(body && body.can_redo),
+  };
+  updateGuideToolButtons();
+}
+
+async function refreshImageToolChainState(pageKey) {
+  if (!imageHistoryButtons.length || !currentJobId || isTextOnlyToolsMode()) return;
+  const key = `${currentJobId}|${pageKey}|${pageImageVersion[pageKey] || 0}`;
+  if (imageToolChainState.key === key) return;
+  imageToolChainState = { key, pageKey, canUndo: false, canRedo: false };
+  try {
+    const res = await fetchAuthed(`/jobs/${currentJobId}/pages/${pageKey}/image-tool`);
+    const body = await safeParseJson(res);
+    if (res.ok && imageToolChainState.key === key) setImageToolChainState(pageKey, body);
+  } catch (err) {
+    console.warn(err.message || 'Failed to load image edit history');
+  }
+}
+
+function waitForImageToolApply(jobId, pageKey) {
+  if (imageToolApplyPollTimer) clearTimeout(imageToolApplyPollTimer);
+  const poll = async () => {
+    imageToolApplyPollTimer = null;
+    if (jobId !== currentJobId) return;
+    try {
+      const res = await fetchAuthed(`/jobs/${jobId}/pages/${pageKey}/image-tool`);
+      const body = await safeParseJson(res);
+      if (res.ok && body && body.pending) {
+        imageToolApplyPollTimer = setTimeout(poll, IMAGE_TOOL_POLL_MS);
+        return;
+      }
+      if (res.ok && body && body.error && jobId === currentJobId) {
+        alert(`Image edit could not be applied: ${body.error}`);
+      }
+    } catch (err) {
+      console.warn(err.message || 'Failed to check image tool status');
+    }
+    if (jobId !== currentJobId) return;
+    await refreshCurrentPageData(pageKey);
+    if (currentPageKey() === pageKey) renderCurrentPage();
+  };
+  imageToolApplyPollTimer = setTimeout(poll, IMAGE_TOOL_POLL_MS);
+}
+
 function startSectionOcrProgress(sectionCount) {
   if (sectionOcrProgressTimer) {
     clearInterval(sectionOcrProgressTimer);
@@ -1604,6 +1699,14 @@ function updateGuideToolButtons() {
       btn.disabled = disableImageTools;
     });
   }
+  if (imageHistoryButtons.length) {
+    const disableHistory = imageToolInFlight || sectionOcrInFlight || !pageList.length || !currentJobId || textOnlyMode;
+    const chain = imageToolChainState.pageKey === currentPageKey() ? imageToolChainState : { canUndo: false, canRedo: false };
+    imageHistoryButtons.forEach((btn) => {
+      const allowed = btn.dataset.imageHistory === 'undo' ? chain.canUndo : chain.canRedo;
+      btn.disabled = disableHistory || !allowed;
+    });
+  }
   updateGuideSectionsInfo();
   renderPreviewColumnsRuler();
   renderPreviewRowsRuler();
@@ -3195,6 +3298,7 @@ previewImage.addEventListener('error', () => {
 window.addEventListener('resize', () => {
   if (previewImage && previewImage.naturalWidth) {
     setPreviewAspectRatioFromImage();
+    renderPreviewTiles();
   }
   syncTablePanelHeightToPreview();
   if (pageList.length) {
@@ -3391,6 +3495,14 @@ if (imageToolButtons.length) {
   });
 }
 
+if (imageHistoryButtons.length) {
+  imageHistoryButtons.forEach((btn) => {
+    btn.addEventListener('click', async () => {
+      await moveImageToolHistory(btn.dataset.imageHistory === 'redo' ? 'redo' : 'undo');
+    });
+  });
+}
+
 if (previewColumnsRuler) {
   previewColumnsRuler.addEventListener('dragstart', (e) => {
     if (isTextOnlyToolsMode()) {
@@ -4008,6 +4120,8 @@ function renderCurrentPage() {
   syncPageSelect();
 
   loadPreviewImageForPage(pageKey);
+  refreshImageToolChainState(pageKey);
+  updateGuideToolButtons();
 
   const activeRow = parsedRows.find((r) => r.row_key === activeRowKey);
   if (activeRow && activeRow.page !== pageKey) {
@@ -4193,6 +4307,8 @@ function syncPageSelect() {
 function applyPreviewTransform() {
   const transform = `translate(${Math.round(previewPanX)}px, ${Math.round(previewPanY)}px) scale(${previewZoom.toFixed(3)})`;
   previewImage.style.transform = transform;
+  if (previewTileLayer) previewTileLayer.style.transform = transform;
+  renderPreviewTiles();
   previewCanvas.style.transform = 'none';
   if (zoomLevel) {
     zoomLevel.textContent = `${Math.round(previewZoom * 100)}%`;
@@ -4287,6 +4403,7 @@ function clearCanvas() {
 }
 
 function setPreviewEmptyState() {
+  clearPreviewTiles();
   previewImage.removeAttribute('src');
   previewImage.removeAttribute('data-src');
   previewImage.removeAttribute('data-loaded-src');
@@ -5269,8 +5386,13 @@ function buildPreviewSrc(pageKey) {
   return `/jobs/${currentJobId}/preview/${pageKey}?v=${pageImageVersion[pageKey] || 0}`;
 }
 
+function buildThumbnailSrc(pageKey) {
+  return `/jobs/${currentJobId}/thumbnails/${pageKey}?v=${pageImageVersion[pageKey] || 0}`;
+}
+
 function clearPreviewBlobCache() {
   prefetchedPreviewSrcs.clear();
+  previewTileInfoCache.clear();
   for (const url of previewBlobUrlCache.values()) {
     URL.revokeObjectURL(url);
   }
@@ -5278,9 +5400,12 @@ function clearPreviewBlobCache() {
 }
 
 function clearPreviewCacheForPage(pageKey) {
-  const marker = `/preview/${pageKey}?`;
+  const markers = [`/preview/${pageKey}?`, `/thumbnails/${pageKey}?`, `/tiles/${pageKey}/`];
+  for (const key of previewTileInfoCache.keys()) {
+    if (key.startsWith(`${currentJobId}|${pageKey}|`)) previewTileInfoCache.delete(key);
+  }
   for (const [src, objectUrl] of previewBlobUrlCache.entries()) {
-    if (!src.includes(marker)) continue;
+    if (!markers.some((marker) => src.includes(marker))) continue;
     URL.revokeObjectURL(objectUrl);
     previewBlobUrlCache.delete(src);
     prefetchedPreviewSrcs.delete(src);
@@ -5302,7 +5427,7 @@ async function getPreviewBlobUrl(src) {
 
 async function loadPreviewImageForPage(pageKey) {
   if (!currentJobId) return;
-  const src = buildPreviewSrc(pageKey);
+  const src = buildThumbnailSrc(pageKey);
   if (previewImage.dataset.loadedSrc === src && previewImage.src) {
     previewImage.style.display = 'block';
     setPreviewAspectRatioFromImage();
@@ -5311,28 +5436,139 @@ async function loadPreviewImageForPage(pageKey) {
     return;
   }
   resetPreviewTransform();
+  clearPreviewTiles();
   previewImage.style.display = 'none';
   previewImage.dataset.requestedSrc = src;
   try {
-    const objectUrl = await getPreviewBlobUrl(src);
+    // The thumbnail sets the page's aspect ratio and shows until tiles arrive.
+    const [objectUrl, info] = await Promise.all([getPreviewBlobUrl(src), getPreviewTileInfo(pageKey)]);
     if (previewImage.dataset.requestedSrc !== src) return;
+    previewTileState = { pageKey, info, tiles: new Map() };
     previewImage.dataset.loadedSrc = src;
     previewImage.src = objectUrl;
   } catch (err) {
-    if (previewImage.dataset.requestedSrc === src) {
+    console.warn(err.message || 'Failed to load page tiles');
+    if (previewImage.dataset.requestedSrc === src) loadFullPreviewImage(pageKey, src);
+  }
+}
+
+// Fallback when tiles are unavailable: the whole page image in one request.
+async function loadFullPreviewImage(pageKey, requestedSrc) {
+  const src = buildPreviewSrc(pageKey);
+  try {
+    const objectUrl = await getPreviewBlobUrl(src);
+    if (previewImage.dataset.requestedSrc !== requestedSrc) return;
+    previewImage.dataset.loadedSrc = requestedSrc;
+    previewImage.src = objectUrl;
+  } catch (err) {
+    if (previewImage.dataset.requestedSrc === requestedSrc) {
       setPreviewEmptyState();
     }
     console.warn(err.message || 'Failed to load preview image');
   }
 }
 
+async function getPreviewTileInfo(pageKey) {
+  const key = `${currentJobId}|${pageKey}|${pageImageVersion[pageKey] || 0}`;
+  if (!previewTileInfoCache.has(key)) {
+    const request = fetchAuthed(`/jobs/${currentJobId}/tiles/${pageKey}/info?v=${pageImageVersion[pageKey] || 0}`)
+      .then(async (res) => {
+        const body = await safeParseJson(res);
+        if (!res.ok || !body || !Array.isArray(body.levels)) {
+          throw new Error(`Tile info load failed (${res.status})`);
+        }
+        return body;
+      });
+    previewTileInfoCache.set(key, request);
+    request.catch(() => previewTileInfoCache.delete(key));
+  }
+  return previewTileInfoCache.get(key);
+}
+
+function createPreviewTileLayer() {
+  if (!previewImage || !previewImage.parentElement) return null;
+  const layer = document.createElement('div');
+  layer.className = 'preview-tiles';
+  previewImage.insertAdjacentElement('afterend', layer);
+  return layer;
+}
+
+function clearPreviewTiles() {
+  previewTileState = null;
+  if (previewTileLayer) previewTileLayer.replaceChildren();
+}
+
+function renderPreviewTiles() {
+  const state = previewTileState;
+  if (!state || !previewTileLayer || !previewWrap || !previewImage.naturalWidth) return;
+  if (currentPageKey() !== state.pageKey || previewImage.style.display === 'none') return;
+
+  const wrapRect = previewWrap.getBoundingClientRect();
+  const rect = getRenderedImageRect(previewImage);
+  const baseLeft = rect.left - wrapRect.left;
+  const baseTop = rect.top - wrapRect.top;
+  if (rect.width <= 0 || rect.height <= 0) return;
+
+  // Smallest level at least as wide as the page is drawn on screen.
+  const { info } = state;
+  const drawnWidth = rect.width * previewZoom * (window.devicePixelRatio || 1);
+  const level = info.levels.find((l) => l.width >= drawnWidth) || info.levels[info.levels.length - 1];
+
+  // Visible part of the page, undoing the layer's pan/zoom about the wrap centre.
+  const cx = previewWrap.clientWidth / 2;
+  const cy = previewWrap.clientHeight / 2;
+  const toPage = (screen, centre, pan, base, size) => (centre + ((screen - centre - pan) / previewZoom) - base) / size;
+  const u0 = clamp(toPage(0, cx, previewPanX, baseLeft, rect.width), 0, 1);
+  const u1 = clamp(toPage(previewWrap.clientWidth, cx, previewPanX, baseLeft, rect.width), 0, 1);
+  const v0 = clamp(toPage(0, cy, previewPanY, baseTop, rect.height), 0, 1);
+  const v1 = clamp(toPage(previewWrap.clientHeight, cy, previewPanY, baseTop, rect.height), 0, 1);
+  const size = info.tile_size;
+  const lastCol = level.cols - 1;
+  const lastRow = level.rows - 1;
+  const col0 = clamp(Math.floor((u0 * level.width) / size), 0, lastCol);
+  const col1 = clamp(Math.ceil((u1 * level.width) / size) - 1, 0, lastCol);
+  const row0 = clamp(Math.floor((v0 * level.height) / size), 0, lastRow);
+  const row1 = clamp(Math.ceil((v1 * level.height) / size) - 1, 0, lastRow);
+
+  const wanted = new Set();
+  for (let row = row0; row <= row1; row += 1) {
+    for (let col = col0; col <= col1; col += 1) {
+      const key = `${level.level}/${col}/${row}`;
+      wanted.add(key);
+      let tile = state.tiles.get(key);
+      if (!tile) {
+        tile = document.createElement('img');
+        tile.alt = '';
+        tile.decoding = 'async';
+        state.tiles.set(key, tile);
+        previewTileLayer.appendChild(tile);
+        const src = `/jobs/${currentJobId}/tiles/${state.pageKey}/${key}?v=${info.version}`;
+        getPreviewBlobUrl(src).then((objectUrl) => {
+          if (previewTileState === state && state.tiles.get(key) === tile) tile.src = objectUrl;
+        }).catch(() => {});
+      }
+      const x = col * size;
+      const y = row * size;
+      tile.style.left = `${baseLeft + (x / level.width) * rect.width}px`;
+      tile.style.top = `${baseTop + (y / level.height) * rect.height}px`;
+      tile.style.width = `${(Math.min(size, level.width - x) / level.width) * rect.width}px`;
+      tile.style.height = `${(Math.min(size, level.height - y) / level.height) * rect.height}px`;
+    }
+  }
+  for (const [key, tile] of state.tiles.entries()) {
+    if (wanted.has(key)) continue;
+    tile.remove();
+    state.tiles.delete(key);
+  }
+}
+
 function prefetchPreviewPageByIndex(idx) {
   if (!currentJobId || idx < 0 || idx >= pageList.length) return;
   const pageKey = pageList[idx].replace('.png', '');
-  const src = buildPreviewSrc(pageKey);
+  const src = buildThumbnailSrc(pageKey);
   if (prefetchedPreviewSrcs.has(src)) return;
   prefetchedPreviewSrcs.add(src);
-  getPreviewBlobUrl(src).catch(() => {
+  Promise.all([getPreviewBlobUrl(src), getPreviewTileInfo(pageKey)]).catch(() => {
     prefetchedPreviewSrcs.delete(src);
   });
 }
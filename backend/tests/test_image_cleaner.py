@@ -0,0 +1,95 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import json
+
+import cv2
+import numpy as np
+import pytest
+
+from app import celery_app, image_cleaner
+from app.image_cleaner import clean_page, clean_page_with_skew, cleaned_png_params, estimate_skew, rotate_page
+
+
+def _reference_clean(gray):
+    blurred = cv2.GaussianBlur(gray, (3, 3), 0)
+    thresh = cv2.adaptiveThreshold(blurred, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY, 31, 15)
+    return cv2.morphologyEx(thresh, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_RECT, (2, 2)))
+
+
+def _pages(count):
+    rng = np.random.default_rng(7)
+    pages = []
+    for i in range(count):
+        page = np.full((300 + 10 * i, 220, 3), 235, dtype=np.uint8)
+        cv2.putText(page, f"01/0{i + 1} Deposit 1,000.00", (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (20, 20, 20), 1)
+        page = cv2.add(page, rng.integers(0, 12, page.shape, dtype=np.uint8))
+        pages.append(page)
+    return pages
+
+
+def test_clean_page_matches_reference_on_threads():
+    pages = _pages(6)
+    expected = [_reference_clean(cv2.cvtColor(page, cv2.COLOR_BGR2GRAY)) for page in pages]
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        cleaned = list(executor.map(clean_page, pages))
+
+    for got, want in zip(cleaned, expected):
+        assert np.array_equal(got, want)
+
+
+def test_cleaned_page_round_trips_through_bilevel_png():
+    cleaned = clean_page(_pages(1)[0])
+
+    ok, bilevel = cv2.imencode(".png", cleaned, cleaned_png_params())
+    assert ok
+    ok, gray = cv2.imencode(".png", cleaned)
+    assert len(bilevel) < len(gray)
+    assert np.array_equal(cv2.imdecode(bilevel, cv2.IMREAD_GRAYSCALE), cleaned)
+
+
+def _statement_page():
+    page = np.full((1650, 1275), 235, dtype=np.uint8)
+    for i, y in enumerate(range(120, 1550, 36)):
+        cv2.putText(page, f"01/{i % 28 + 1:02} POS PURCHASE {i:04} 1,234.56 9,876.54", (80, y), cv2.FONT_HERSHEY_SIMPLEX, 0.8, 20, 2)
+    return page
+
+
+@pytest.mark.parametrize("skew", [-3.7, -1.2, 0.6, 2.5, 4.4])
+def test_estimate_skew_recovers_rotation(skew):
+    assert estimate_skew(rotate_page(_statement_page(), skew)) == pytest.approx(-skew, abs=0.1)
+
+
+def test_estimate_skew_ignores_level_and_blank_pages():
+    assert estimate_skew(_statement_page()) == 0.0
+    assert estimate_skew(np.full((400, 300), 255, dtype=np.uint8)) == 0.0
+
+
+def test_clean_page_deskews_unless_disabled(monkeypatch):
+    skewed = rotate_page(_statement_page(), 2.0)
+
+    cleaned, angle = clean_page_with_skew(skewed)
+    assert angle == pytest.approx(-2.0, abs=0.1)
+    assert cleaned.shape == skewed.shape
+
+    monkeypatch.setattr(image_cleaner, "CLEAN_DESKEW", False)
+    assert clean_page_with_skew(skewed)[1] == 0.0
+
+
+def test_cleaned_page_records_deskew_angle(monkeypatch, tmp_path):
+    job_dir = tmp_path / "job-1"
+    for name in ("pages", "cleaned"):
+        (job_dir / name).mkdir(parents=True)
+    skewed = cv2.cvtColor(rotate_page(_statement_page(), -1.5), cv2.COLOR_GRAY2BGR)
+    monkeypatch.setattr(celery_app, "page_level", lambda *_args: skewed)
+
+    celery_app._ensure_cleaned_page(
+        str(job_dir / "input" / "document.pdf"),
+        str(job_dir / "cleaned" / "page_002.png"),
+        str(job_dir / "pages" / "page_002.png"),
+        2,
+    )
+
+    angles = json.loads((job_dir / "deskew.json").read_text())
+    assert angles["page_002"] == pytest.approx(1.5, abs=0.1)
+    assert celery_app._page_deskew_angle(str(job_dir), "page_002", {}) == angles["page_002"]
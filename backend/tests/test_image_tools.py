@@ -0,0 +1,200 @@
+import types
+import uuid
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from app import image_tools, main
+from app.disk_cache import DiskCache
+
+
+def _setup_page(monkeypatch, tmp_path):
+    job_id = uuid.uuid4()
+    job_dir = Path(tmp_path, "jobs", str(job_id))
+    (job_dir / "cleaned").mkdir(parents=True)
+    img = np.zeros((40, 30, 3), dtype=np.uint8)
+    img[:, :, 0] = np.arange(30, dtype=np.uint8)
+    cv2.imwrite(str(job_dir / "cleaned" / "page_001.png"), img)
+
+    calls = []
+
+    def _tool(image, tool):
+        calls.append(tool)
+        return cv2.add(image, np.full(image.shape, 10, dtype=np.uint8))
+
+    monkeypatch.setattr(image_tools, "_derived_cache", DiskCache(str(tmp_path / "cache"), 64 * 1024 * 1024, suffix=".png"))
+    monkeypatch.setattr(image_tools, "apply_image_tool", _tool)
+    monkeypatch.setattr(main, "_get_job_record_or_404", lambda _jid: types.SimpleNamespace(id=_jid, submission_id=None))
+    monkeypatch.setattr(main, "_ensure_tool_source_image", lambda *_args: None)
+    monkeypatch.setattr(main, "_should_reparse_after_page_edit", lambda _jid: False)
+    return job_id, job_dir / "cleaned" / "page_001.png", img, calls
+
+
+def test_image_tool_undo_redo_reuses_cached_prefixes(client_factory, app_with_temp_data, monkeypatch):
+    _app, tmp_path = app_with_temp_data
+    job_id, cleaned_path, original, calls = _setup_page(monkeypatch, tmp_path)
+    url = f"/jobs/{job_id}/pages/page_001/image-tool"
+
+    with client_factory(role="credit_evaluator") as client:
+        assert client.post(url, json={"tool": "sharpen"}).status_code == 200
+        after_one = cv2.imread(str(cleaned_path))
+        second = client.post(url, json={"tool": "contrast"}).json()
+        after_two = cv2.imread(str(cleaned_path))
+        assert (second["position"], second["can_undo"], second["can_redo"]) == (2, True, False)
+
+        assert client.post(f"{url}/undo").json()["position"] == 1
+        assert np.array_equal(cv2.imread(str(cleaned_path)), after_one)
+        assert client.post(f"{url}/undo").json()["can_undo"] is False
+        assert np.array_equal(cv2.imread(str(cleaned_path)), original)
+        assert client.post(f"{url}/undo").status_code == 409
+
+        assert client.post(f"{url}/redo").json()["position"] == 1
+        assert client.post(f"{url}/redo").json()["can_redo"] is False
+        assert np.array_equal(cv2.imread(str(cleaned_path)), after_two)
+        assert client.post(f"{url}/redo").status_code == 409
+
+        # Undo and re-apply the same edit: served from the cache.
+        client.post(f"{url}/undo")
+        assert client.post(url, json={"tool": "contrast"}).status_code == 200
+        assert np.array_equal(cv2.imread(str(cleaned_path)), after_two)
+
+    assert calls == ["sharpen", "contrast"]
+
+
+def test_image_tool_chain_restarts_when_page_changes_outside_it(client_factory, app_with_temp_data, monkeypatch):
+    _app, tmp_path = app_with_temp_data
+    job_id, cleaned_path, _original, calls = _setup_page(monkeypatch, tmp_path)
+    url = f"/jobs/{job_id}/pages/page_001/image-tool"
+
+    with client_factory(role="credit_evaluator") as client:
+        client.post(url, json={"tool": "sharpen"})
+        replaced = np.full((40, 30, 3), 200, dtype=np.uint8)
+        cv2.imwrite(str(cleaned_path), replaced)
+
+        assert client.post(f"{url}/undo").status_code == 409
+        result = client.post(url, json={"tool": "sharpen"}).json()
+        assert (result["position"], result["can_undo"]) == (1, True)
+        client.post(f"{url}/undo")
+        assert np.array_equal(cv2.imread(str(cleaned_path)), replaced)
+
+    assert calls == ["sharpen", "sharpen"]
+
+
+def test_flatten_is_a_chain_step(client_factory, app_with_temp_data, monkeypatch):
+    _app, tmp_path = app_with_temp_data
+    job_id, cleaned_path, original, _calls = _setup_page(monkeypatch, tmp_path)
+    points = [{"x": 0.0, "y": 0.0}, {"x": 0.5, "y": 0.0}, {"x": 0.5, "y": 0.5}, {"x": 0.0, "y": 0.5}]
+
+    with client_factory(role="credit_evaluator") as client:
+        assert client.post(f"/jobs/{job_id}/pages/page_001/flatten", json={"points": points}).status_code == 200
+        assert cv2.imread(str(cleaned_path)).shape[:2] == (20, 15)
+        bad = [{"x": 0.1, "y": 0.1}] * 4
+        assert client.post(f"/jobs/{job_id}/pages/page_001/flatten", json={"points": bad}).json()["detail"] == "Invalid corner points"
+        assert client.post(f"/jobs/{job_id}/pages/page_001/image-tool/undo").status_code == 200
+
+    assert np.array_equal(cv2.imread(str(cleaned_path)), original)
+
+
+def test_image_tool_preview_returns_proxy_and_applies_full_resolution_in_background(
+    client_factory, app_with_temp_data, monkeypatch
+):
+    _app, tmp_path = app_with_temp_data
+    job_id, cleaned_path, original, calls = _setup_page(monkeypatch, tmp_path)
+    monkeypatch.setattr(image_tools, "IMAGE_TOOL_PROXY_MAX_SIDE", 20)
+    url = f"/jobs/{job_id}/pages/page_001/image-tool"
+
+    with client_factory(role="credit_evaluator") as client:
+        res = client.post(f"{url}/preview", json={"tool": "sharpen"})
+        assert res.status_code == 200
+        assert res.headers["content-type"] == "image/jpeg"
+        assert res.headers["x-tool-chain-position"] == "1"
+        proxy = cv2.imdecode(np.frombuffer(res.content, dtype=np.uint8), cv2.IMREAD_COLOR)
+        assert proxy.shape[:2] == (20, 15)
+
+        # The test client runs the background apply before returning.
+        assert client.get(url).json() == {"page": "page_001", "position": 1, "can_undo": True, "can_redo": False, "pending": False, "error": None}
+        assert cv2.imread(str(cleaned_path)).shape[:2] == original.shape[:2]
+        assert not np.array_equal(cv2.imread(str(cleaned_path)), original)
+
+        assert client.post(f"{url}/undo").status_code == 200
+        assert np.array_equal(cv2.imread(str(cleaned_path)), original)
+
+    # One proxy-sized and one full-resolution run.
+    assert calls == ["sharpen", "sharpen"]
+
+
+def test_superseded_background_apply_is_skipped(app_with_temp_data, monkeypatch):
+    _app, tmp_path = app_with_temp_data
+    job_id, cleaned_path, original, calls = _setup_page(monkeypatch, tmp_path)
+    job_dir = str(Path(tmp_path, "jobs", str(job_id)))
+    state = image_tools.start_tool_chain(job_dir, "page_001", original)
+    state = image_tools.push_step(state, image_tools.tool_step("sharpen"))
+    image_tools.save_tool_chain(job_dir, "page_001", {**state, "revision": 3, "pending": True})
+
+    main._apply_pending_tool_chain(str(job_id), "page_001", 2)
+    assert calls == []
+    assert image_tools.load_tool_chain(job_dir, "page_001")["pending"] is True
+
+    main._apply_pending_tool_chain(str(job_id), "page_001", 3)
+    assert calls == ["sharpen"]
+    assert image_tools.load_tool_chain(job_dir, "page_001")["pending"] is False
+    assert not np.array_equal(cv2.imread(str(cleaned_path)), original)
+
+
+def test_background_apply_stays_pending_until_reparse_finishes(app_with_temp_data, monkeypatch):
+    _app, tmp_path = app_with_temp_data
+    job_id, _cleaned_path, original, _calls = _setup_page(monkeypatch, tmp_path)
+    job_dir = str(Path(tmp_path, "jobs", str(job_id)))
+    state = image_tools.start_tool_chain(job_dir, "page_001", original)
+    state = image_tools.push_step(state, image_tools.tool_step("sharpen"))
+    image_tools.save_tool_chain(job_dir, "page_001", {**state, "revision": 1, "pending": True})
+
+    seen = []
+    monkeypatch.setattr(main, "_should_reparse_after_page_edit", lambda _jid: True)
+    monkeypatch.setattr(main, "_reparse_single_page", lambda *_args: seen.append(image_tools.load_tool_chain(job_dir, "page_001")["pending"]))
+    main._apply_pending_tool_chain(str(job_id), "page_001", 1)
+    assert seen == [True]
+    assert main._tool_chain_summary(image_tools.load_tool_chain(job_dir, "page_001"))["pending"] is False
+
+
+def test_failed_background_apply_reports_error(client_factory, app_with_temp_data, monkeypatch):
+    _app, tmp_path = app_with_temp_data
+    job_id, cleaned_path, original, _calls = _setup_page(monkeypatch, tmp_path)
+
+    url = f"/jobs/{job_id}/pages/page_001/image-tool"
+    monkeypatch.setattr(main, "render_tool_chain", _render_proxy_only)
+    with client_factory(role="credit_evaluator") as client:
+        assert client.post(f"{url}/preview", json={"tool": "sharpen"}).status_code == 200
+        body = client.get(url).json()
+
+    assert (body["pending"], body["error"]) == (False, "full_resolution_failed")
+    assert (body["position"], body["can_undo"]) == (0, False)
+    assert np.array_equal(cv2.imread(str(cleaned_path)), original)
+
+
+def test_failed_background_apply_rolls_back_to_the_applied_position(client_factory, app_with_temp_data, monkeypatch):
+    _app, tmp_path = app_with_temp_data
+    job_id, cleaned_path, _original, _calls = _setup_page(monkeypatch, tmp_path)
+
+    url = f"/jobs/{job_id}/pages/page_001/image-tool"
+    with client_factory(role="credit_evaluator") as client:
+        assert client.post(url, json={"tool": "sharpen"}).status_code == 200
+        applied = cv2.imread(str(cleaned_path))
+        monkeypatch.setattr(main, "render_tool_chain", _render_proxy_only)
+        assert client.post(f"{url}/preview", json={"tool": "sharpen"}).status_code == 200
+        assert client.post(f"{url}/preview", json={"tool": "sharpen"}).status_code == 200
+        body = client.get(url).json()
+        assert (body["position"], body["can_undo"], body["can_redo"]) == (1, True, False)
+        assert np.array_equal(cv2.imread(str(cleaned_path)), applied)
+
+        monkeypatch.setattr(main, "render_tool_chain", image_tools.render_tool_chain)
+        assert client.post(f"{url}/undo").status_code == 200
+        assert client.post(f"{url}/redo").json()["position"] == 1
+        assert np.array_equal(cv2.imread(str(cleaned_path)), applied)
+
+
+def _render_proxy_only(job_dir, page_name, state, proxy=False):
+    if not proxy:
+        raise RuntimeError("full_resolution_failed")
+    return image_tools.render_tool_chain(job_dir, page_name, state, proxy=True)
@@ -0,0 +1,34 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+HEAVY_MODULES = ("torch", "easyocr", "paddleocr", "paddle", "pytesseract")
+IMPORT_TIME_BUDGET_SEC = float(os.getenv("IMPORT_TIME_BUDGET_SEC", "10"))
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import app.main
+import app.celery_app
+elapsed = time.perf_counter() - start
+print(json.dumps({"elapsed": elapsed, "loaded": [m for m in %r if m in sys.modules]}))
+""" % (HEAVY_MODULES,)
+
+
+def test_api_and_worker_import_without_ocr_backends():
+    proc = subprocess.run(
+        [sys.executable, "-c", _PROBE],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert proc.returncode == 0, proc.stderr
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    assert result["loaded"] == []
+    assert result["elapsed"] < IMPORT_TIME_BUDGET_SEC
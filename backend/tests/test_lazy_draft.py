@@ -0,0 +1,84 @@
+import json
+import types
+import uuid
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from app import celery_app, main
+
+
+def test_lazy_draft_is_ready_after_first_page(monkeypatch, tmp_path):
+    job_dir = tmp_path / "jobs" / "job-1"
+    (job_dir / "input").mkdir(parents=True)
+    (job_dir / "input" / "document.pdf").write_bytes(b"%PDF-1.4")
+    prepared = []
+    queued = []
+    monkeypatch.setattr(celery_app, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(celery_app, "DRAFT_LAZY", True)
+    monkeypatch.setattr(celery_app, "upsert_job_status", lambda *_args: None)
+    monkeypatch.setattr(celery_app, "_pdf_page_count", lambda _pdf: 100)
+    monkeypatch.setattr(celery_app, "ensure_draft_page", lambda _dir, page_num: prepared.append(page_num) or np.zeros((4, 4)))
+    monkeypatch.setattr(
+        celery_app.fill_draft_pages,
+        "apply_async",
+        lambda args, priority: queued.append((tuple(args), priority)),
+    )
+
+    assert celery_app.prepare_draft("job-1") == {"pages": 100}
+
+    status = json.loads((job_dir / "status.json").read_text())
+    assert (status["status"], status["step"], status["pages"]) == ("draft", "ready_for_edit", 100)
+    assert prepared == [1]
+    assert queued == [(("job-1",), celery_app.PREVIEW_PREFETCH_PRIORITY)]
+    assert json.loads((job_dir / "preprocess.json").read_text()) == {"use_existing_cleaned": True, "lazy_draft": True, "pages": 100}
+
+
+def test_lazy_draft_pages_are_listed_and_prepared_on_first_view(client_factory, app_with_temp_data, monkeypatch):
+    _app, tmp_path = app_with_temp_data
+    job_id = uuid.uuid4()
+    job_dir = Path(tmp_path, "jobs", str(job_id))
+    (job_dir / "cleaned").mkdir(parents=True)
+    (job_dir / "preprocess.json").write_text(json.dumps({"use_existing_cleaned": True, "lazy_draft": True, "pages": 3}))
+    # Queued (and failed) statuses carry no page count.
+    (job_dir / "status.json").write_text(json.dumps({"status": "queued", "step": "queued"}))
+    cv2.imwrite(str(job_dir / "cleaned" / "page_001.png"), np.full((20, 10), 255, dtype=np.uint8))
+    prepared = []
+
+    def _prepare(dir_path, page_num):
+        prepared.append(page_num)
+        img = np.full((20, 10), 0, dtype=np.uint8)
+        cv2.imwrite(str(Path(dir_path, "cleaned", f"page_{page_num:03}.png")), img)
+        return img
+
+    monkeypatch.setattr(main, "ensure_draft_page", _prepare)
+    monkeypatch.setattr(main, "_get_job_record_or_404", lambda _jid: types.SimpleNamespace(id=_jid, submission_id=None))
+
+    with client_factory(role="credit_evaluator") as client:
+        listed = client.get(f"/jobs/{job_id}/cleaned").json()
+        page_3 = client.get(f"/jobs/{job_id}/cleaned/page_003.png")
+        page_4 = client.get(f"/jobs/{job_id}/cleaned/page_004.png")
+
+    assert listed == {"pages": ["page_001.png", "page_002.png", "page_003.png"]}
+    assert page_3.status_code == 200
+    assert prepared == [3]
+    assert page_4.status_code == 404
+
+
+def test_lazy_draft_never_writes_uncleaned_renders_into_cleaned(client_factory, app_with_temp_data, monkeypatch):
+    _app, tmp_path = app_with_temp_data
+    job_id = uuid.uuid4()
+    job_dir = Path(tmp_path, "jobs", str(job_id))
+    (job_dir / "cleaned").mkdir(parents=True)
+    (job_dir / "preprocess.json").write_text(json.dumps({"use_existing_cleaned": True, "lazy_draft": True, "pages": 3}))
+    rendered = []
+    monkeypatch.setattr(main, "ensure_draft_page", lambda _dir, _page_num: None)
+    monkeypatch.setattr(main, "_generate_preview_page_if_missing", lambda *args, **_kw: rendered.append(args) or True)
+    monkeypatch.setattr(main, "_get_job_record_or_404", lambda _jid: types.SimpleNamespace(id=_jid, submission_id=None))
+
+    with client_factory(role="credit_evaluator") as client:
+        assert client.get(f"/jobs/{job_id}/cleaned/page_002.png").status_code == 404
+
+    assert rendered == []
+    assert not (job_dir / "cleaned" / "page_002.png").exists()
@@ -0,0 +1,89 @@
+import os
+
+import numpy as np
+
+from app import ocr_engine
+from app.disk_cache import DiskCache
+
+
+def _page(value: int) -> np.ndarray:
+    img = np.full((60, 40, 3), 255, dtype=np.uint8)
+    img[10:20, 5:30] = value
+    return img
+
+
+def _fake_items(img):
+    return [{"id": 1, "text": f"v{int(img[15, 10, 0])}", "confidence": 0.9, "bbox": [[0, 0], [1, 0], [1, 1], [0, 1]]}]
+
+
+def _use_temp_cache(monkeypatch, tmp_path):
+    monkeypatch.setattr(ocr_engine, "OCR_CACHE_ENABLED", True)
+    monkeypatch.setattr(ocr_engine, "_ocr_cache", DiskCache(str(tmp_path / "ocr"), 10 * 1024 * 1024, suffix=".json"))
+    monkeypatch.setattr(ocr_engine, "ocr_server_enabled", lambda: False)
+
+
+def test_ocr_image_reuses_cached_result_for_identical_pixels(monkeypatch, tmp_path):
+    _use_temp_cache(monkeypatch, tmp_path)
+    calls = []
+
+    def _fake_local(img, **kwargs):
+        calls.append(kwargs)
+        return _fake_items(img)
+
+    monkeypatch.setattr(ocr_engine, "ocr_image_local", _fake_local)
+
+    first = ocr_engine.ocr_image(_page(0))
+    second = ocr_engine.ocr_image(_page(0).copy())
+    other_params = ocr_engine.ocr_image(_page(0), max_width=1200)
+
+    assert first == second == other_params
+    assert len(calls) == 2
+
+
+def test_ocr_cache_key_depends_on_easyocr_batching(monkeypatch):
+    monkeypatch.setattr(ocr_engine, "OCR_CACHE_ENABLED", True)
+    kwargs = {"backend": "easyocr", "max_width": 850}
+
+    tesseract = {**kwargs, "backend": "tesseract"}
+
+    monkeypatch.setattr(ocr_engine, "EASYOCR_BATCHED", True)
+    batched = ocr_engine._ocr_cache_key(_page(0), kwargs)
+    tesseract_batched = ocr_engine._ocr_cache_key(_page(0), tesseract)
+    monkeypatch.setattr(ocr_engine, "EASYOCR_BATCHED", False)
+    serial = ocr_engine._ocr_cache_key(_page(0), kwargs)
+
+    assert batched != serial
+    assert ocr_engine._ocr_cache_key(_page(0), tesseract) == tesseract_batched
+
+
+def test_ocr_images_only_runs_cache_misses(monkeypatch, tmp_path):
+    _use_temp_cache(monkeypatch, tmp_path)
+    batches = []
+
+    def _fake_local_batch(images, **kwargs):
+        batches.append(len(images))
+        return [_fake_items(img) for img in images]
+
+    monkeypatch.setattr(ocr_engine, "ocr_image_local", lambda img, **kwargs: _fake_items(img))
+    monkeypatch.setattr(ocr_engine, "ocr_images_local", _fake_local_batch)
+
+    ocr_engine.ocr_image(_page(10))
+    results = ocr_engine.ocr_images([_page(10), _page(20), _page(30)])
+
+    assert [items[0]["text"] for items in results] == ["v10", "v20", "v30"]
+    assert batches == [2]
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=25, suffix=".bin", evict_every=1)
+    cache.put_bytes("aa01", b"x" * 10)
+    cache.put_bytes("bb02", b"x" * 10)
+    os.utime(cache.path_for("aa01"), (1, 1))
+    os.utime(cache.path_for("bb02"), (2, 2))
+    assert cache.get_bytes("aa01") == b"x" * 10
+
+    cache.put_bytes("cc03", b"x" * 10)
+
+    assert cache.get_bytes("bb02") is None
+    assert cache.get_bytes("aa01") is not None
+    assert cache.get_bytes("cc03") is not None
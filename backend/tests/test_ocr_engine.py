@@ -0,0 +1,129 @@
+import random
+
+import cv2
+import numpy as np
+import pytest
+
+from app import ocr_engine
+
+
+def _box(cx, cy, w=20.0, h=10.0):
+    return [[cx - w / 2, cy - h / 2], [cx + w / 2, cy - h / 2], [cx + w / 2, cy + h / 2], [cx - w / 2, cy + h / 2]]
+
+
+def _pairwise_keep(items):
+    # Reference O(n^2) filter the grid index replaced.
+    kept = []
+    for bbox, text in items:
+        cx, cy = ocr_engine._bbox_center(bbox)
+        key = ocr_engine._normalize_overlap_text(text)
+        duplicate = False
+        for other_bbox, other_text in kept:
+            ox, oy = ocr_engine._bbox_center(other_bbox)
+            if abs(oy - cy) <= ocr_engine.OVERLAP_DY and abs(ox - cx) <= ocr_engine.OVERLAP_DX:
+                if ocr_engine._normalize_overlap_text(other_text) == key:
+                    duplicate = True
+                    break
+        if not duplicate:
+            kept.append((bbox, text))
+    return kept
+
+
+def test_overlap_index_catches_duplicates_across_cell_boundaries():
+    index = ocr_engine._OverlapIndex(dx=30, dy=18)
+    # Centres 29.0 and 31.0 fall in neighbouring cells but are 2px apart.
+    assert index.add_if_new(_box(29.0, 17.0), "1,000.00")
+    assert not index.add_if_new(_box(31.0, 19.0), " 1,000.00 ")
+    assert not index.add_if_new(_box(58.0, 34.0), "1,000.00")
+
+
+def test_overlap_index_keeps_distinct_items_in_the_same_cell():
+    index = ocr_engine._OverlapIndex(dx=30, dy=18)
+    assert index.add_if_new(_box(5.0, 5.0), "Salary")
+    assert index.add_if_new(_box(10.0, 8.0), "Deposit")
+    # Same text, same cell row, but beyond the allowed distance.
+    assert index.add_if_new(_box(5.0, 5.0 + 18.5), "Salary")
+    assert index.add_if_new(_box(5.0 + 30.5, 5.0), "Salary")
+
+
+def test_overlap_index_matches_pairwise_filter():
+    rng = random.Random(7)
+    texts = ["a", "b", "A ", "c"]
+    for _ in range(20):
+        items = [
+            (_box(rng.uniform(0, 300), rng.uniform(0, 200)), rng.choice(texts))
+            for _ in range(100)
+        ]
+        index = ocr_engine._OverlapIndex()
+        assert [item for item in items if index.add_if_new(*item)] == _pairwise_keep(items)
+
+
+class _BlobReader:
+    """Reports every dark blob in a strip as one word named after its grey level."""
+
+    def __init__(self):
+        self.batched_calls = []
+
+    def readtext(self, chunk, **kwargs):
+        grey = chunk[:, :, 0] if chunk.ndim == 3 else chunk
+        count, labels, stats, _ = cv2.connectedComponentsWithStats((grey < 200).astype(np.uint8))
+        words = []
+        for label in range(1, count):
+            x, y, w, h, _area = stats[label]
+            level = int(grey[labels == label].min())
+            words.append(([[x, y], [x + w, y], [x + w, y + h], [x, y + h]], f"w{level}", 0.9))
+        return sorted(words, key=lambda word: (word[0][0][1], word[0][0][0]))
+
+    def readtext_batched(self, images, **kwargs):
+        assert len({image.shape for image in images}) == 1
+        self.batched_calls.append(len(images))
+        return [self.readtext(image) for image in images]
+
+
+def _blob_page(width, blocks):
+    img = np.full((430, width, 3), 255, dtype=np.uint8)
+    for level, (x, y) in enumerate(blocks):
+        img[y:y + 12, x:x + 40] = 10 + level * 5
+    return img
+
+
+@pytest.fixture
+def blob_reader(monkeypatch):
+    reader = _BlobReader()
+    monkeypatch.setattr(ocr_engine, "get_reader", lambda: reader)
+    monkeypatch.setattr(ocr_engine, "ocr_server_enabled", lambda: False)
+    monkeypatch.setattr(ocr_engine, "OCR_CACHE_ENABLED", False)
+    monkeypatch.setattr(ocr_engine, "OCR_ROI_ENABLED", False)
+    monkeypatch.setattr(ocr_engine, "EASYOCR_REFINE", False)
+    monkeypatch.setattr(ocr_engine, "EASYOCR_BATCH_SIZE", 3)
+    return reader
+
+
+def test_batched_strips_match_per_strip_readtext(blob_reader):
+    page = _blob_page(300, [(10, 5), (200, 110), (50, 390)])
+    chunks = [chunk for _top, chunk in ocr_engine._split_vertical_chunks(page, 120, 20)]
+    chunks.append(_blob_page(250, [(30, 40)])[:90])
+
+    batched = ocr_engine._readtext_strips_batched(blob_reader, chunks)
+
+    assert batched == [blob_reader.readtext(chunk) for chunk in chunks]
+    assert blob_reader.batched_calls == [3, 3]
+
+
+def test_ocr_images_batched_matches_page_by_page(blob_reader, monkeypatch):
+    # Blocks straddle strip overlaps, so de-duplication and strip offsets both matter.
+    pages = [
+        _blob_page(300, [(10, 5), (200, 95), (60, 190), (120, 385)]),
+        _blob_page(260, [(30, 300), (150, 2)]),
+    ]
+    kwargs = {"max_width": 1000, "max_pixels": 10_000_000, "chunk_height": 120, "chunk_overlap": 20}
+
+    batched = ocr_engine.ocr_images(pages, **kwargs)
+    monkeypatch.setattr(ocr_engine, "EASYOCR_BATCHED", False)
+    serial = [ocr_engine.ocr_image_local(page, **kwargs) for page in pages]
+
+    assert batched == serial
+    assert [item["text"] for item in batched[0]] == ["w10", "w15", "w20", "w25"]
+    assert batched[0][1]["bbox"][0] == [200.0, 95.0]
+    assert batched[0][3]["bbox"][0] == [120.0, 385.0]
+    assert sum(blob_reader.batched_calls) == 10
@@ -0,0 +1,92 @@
+import time
+
+import numpy as np
+import pytest
+
+from app import celery_app
+
+
+def _run_ocr_job(monkeypatch, tmp_path, workers):
+    job_dir = tmp_path / "jobs" / "job-1"
+    (job_dir / "input").mkdir(parents=True)
+    (job_dir / "input" / "document.pdf").write_bytes(b"%PDF-1.4")
+    monkeypatch.setattr(celery_app, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(celery_app, "OCR_PAGE_WORKERS", workers)
+    monkeypatch.setattr(celery_app, "OCR_IMAGE_HANDOFF_PAGES", 2)
+    monkeypatch.setattr(celery_app, "_available_memory_mb", lambda: None)
+    monkeypatch.setattr(celery_app, "upsert_job_status", lambda *_args: None)
+    monkeypatch.setattr(celery_app, "get_submission_id_for_job", lambda _jid: None)
+    monkeypatch.setattr(celery_app, "sync_job_results", lambda *_args: None)
+    monkeypatch.setattr(celery_app, "_pdf_page_count", lambda _pdf: 5)
+    monkeypatch.setattr(celery_app, "iter_pdf_layout_pages_sharded", lambda *_args: iter([]))
+
+    def _render(**kwargs):
+        for page_num in range(1, 6):
+            kwargs["page_sink"](page_num, np.full((40, 30, 3), 255, dtype=np.uint8))
+        return 5
+
+    seen = []
+
+    def _ocr_results(tasks, _workers):
+        for task in tasks:
+            seen.append((task["page_num"], task.get("image") is not None))
+            yield {"image_read_failed": True}
+
+    monkeypatch.setattr(celery_app, "_render_pdf_pages", _render)
+    monkeypatch.setattr(celery_app, "_iter_ocr_page_results", _ocr_results)
+    celery_app.process_pdf("job-1", "ocr")
+    assert all((job_dir / "cleaned" / f"page_{n:03}.png").exists() for n in range(1, 6))
+    return seen
+
+
+@pytest.mark.parametrize(
+    "workers, expected",
+    [
+        (1, [(1, True), (2, True), (3, False), (4, False), (5, False)]),
+        (2, [(n, False) for n in range(1, 6)]),
+    ],
+)
+def test_cleaned_arrays_are_handed_to_ocr_only_for_a_bounded_window(monkeypatch, tmp_path, workers, expected):
+    assert _run_ocr_job(monkeypatch, tmp_path, workers) == expected
+
+
+def _stub_ocr_parse_page(task):
+    # Later pages finish first, so the pool completes out of order.
+    time.sleep(0.02 * (6 - task["page_num"]))
+    return {"page": task["page_num"], "rows": [task["page_num"] * 10]}
+
+
+def test_pooled_ocr_results_keep_document_order(monkeypatch):
+    monkeypatch.setattr(celery_app, "_ocr_parse_page", _stub_ocr_parse_page)
+    tasks = [{"page_num": page_num} for page_num in range(1, 6)]
+
+    pooled = list(celery_app._iter_ocr_page_results(tasks, 3))
+
+    assert pooled == list(celery_app._iter_ocr_page_results(tasks, 1))
+    assert [result["page"] for result in pooled] == [1, 2, 3, 4, 5]
+
+
+def test_pooled_ocr_draws_tasks_a_bounded_window_ahead(monkeypatch):
+    monkeypatch.setattr(celery_app, "_ocr_parse_page", _stub_ocr_parse_page)
+    drawn = []
+
+    def tasks():
+        for page_num in range(1, 6):
+            drawn.append(page_num)
+            yield {"page_num": page_num}
+
+    results = celery_app._iter_ocr_page_results(tasks(), 2)
+    assert next(results)["page"] == 1
+    assert drawn == [1, 2, 3, 4]
+    assert [result["page"] for result in results] == [2, 3, 4, 5]
+
+
+def test_ocr_pool_is_capped_by_memory_without_the_ocr_server(monkeypatch):
+    monkeypatch.setattr(celery_app, "OCR_MODEL_MEMORY_MB", 1000)
+    monkeypatch.setattr(celery_app, "_available_memory_mb", lambda: 2500)
+    monkeypatch.setattr(celery_app, "ocr_server_enabled", lambda: False)
+    assert celery_app._ocr_pool_size(4, 10) == 2
+    assert celery_app._ocr_pool_size(4, 1) == 1
+
+    monkeypatch.setattr(celery_app, "ocr_server_enabled", lambda: True)
+    assert celery_app._ocr_pool_size(4, 10) == 4
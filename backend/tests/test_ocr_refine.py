@@ -0,0 +1,34 @@
+import numpy as np
+
+from app import ocr_engine
+
+
+class _FakeReader:
+    def __init__(self):
+        self.boxes = []
+
+    def recognize(self, grey, horizontal_list=None, free_list=None, **kwargs):
+        self.boxes.extend(horizontal_list)
+        return [(None, "1,204.50", 0.97)]
+
+
+def _item(text, conf, x0=10.0, y0=10.0):
+    return {"id": 1, "text": text, "confidence": conf, "bbox": [[x0, y0], [x0 + 40, y0], [x0 + 40, y0 + 10], [x0, y0 + 10]]}
+
+
+def test_refine_rereads_weak_and_malformed_amounts_from_higher_resolution(monkeypatch):
+    monkeypatch.setattr(ocr_engine, "EASYOCR_REFINE_MAX_WIDTH", 400)
+    source = np.full((400, 400, 3), 255, dtype=np.uint8)
+    low_res = ocr_engine._fit_image(source, 200, 1_000_000)
+    items = [_item("1,2O4.50", 0.95), _item("Deposit", 0.99, y0=40.0), _item("1,204.50", 0.3, y0=80.0)]
+    reader = _FakeReader()
+
+    ocr_engine._refine_easyocr_items(reader, source, low_res, items)
+
+    assert [item["text"] for item in items] == ["1,204.50", "Deposit", "1,204.50"]
+    assert items[2]["confidence"] == 0.97
+    assert len(reader.boxes) == 2
+    # Boxes are mapped into the 2x page; the stored bbox stays in low-res coordinates.
+    x_min, x_max, y_min, y_max = reader.boxes[0]
+    assert x_min < 20 and x_max > 100 and y_max > 40
+    assert items[0]["bbox"][0] == [10.0, 10.0]
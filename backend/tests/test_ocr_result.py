@@ -0,0 +1,42 @@
+import json
+
+import numpy as np
+
+from app.ocr_result import OcrPage, ocr_items_to_words, read_ocr_page, write_ocr_page
+
+
+ITEMS = [
+    {"id": 1, "text": "Balance", "confidence": 0.91, "bbox": [[10, 5], [60, 5], [60, 15], [10, 15]]},
+    {"id": 2, "text": " ", "confidence": 0.2, "bbox": [[70, 5], [80, 5], [80, 15], [70, 15]]},
+    {"id": 3, "text": "1,000.00", "confidence": 0.88, "bbox": [[100, 4], [150, 6], [149, 18], [99, 16]]},
+]
+
+
+def test_ocr_page_round_trips_through_npz(tmp_path):
+    page = OcrPage.from_items(ITEMS)
+    path = write_ocr_page(str(tmp_path), "page_001", page)
+
+    loaded = read_ocr_page(str(tmp_path), "page_001")
+
+    assert path.endswith(".npz")
+    assert loaded.texts == ["Balance", " ", "1,000.00"]
+    assert np.allclose(loaded.confidences, [0.91, 0.2, 0.88])
+    assert loaded.to_items()[2]["bbox"] == [[100.0, 4.0], [150.0, 6.0], [149.0, 18.0], [99.0, 16.0]]
+    assert loaded.words() == [
+        {"text": "Balance", "x1": 10.0, "y1": 5.0, "x2": 60.0, "y2": 15.0},
+        {"text": "1,000.00", "x1": 99.0, "y1": 4.0, "x2": 150.0, "y2": 18.0},
+    ]
+    assert ocr_items_to_words(ITEMS) == loaded.words()
+
+
+def test_read_ocr_page_falls_back_to_legacy_json(tmp_path):
+    (tmp_path / "page_002.json").write_text(json.dumps(ITEMS[:1]), encoding="utf-8")
+
+    loaded = read_ocr_page(str(tmp_path), "page_002")
+
+    assert loaded.text == "Balance"
+    assert read_ocr_page(str(tmp_path), "page_003") is None
+
+    write_ocr_page(str(tmp_path), "page_002", [])
+    assert not (tmp_path / "page_002.json").exists()
+    assert len(read_ocr_page(str(tmp_path), "page_002")) == 0
@@ -0,0 +1,123 @@
+import numpy as np
+
+from app import ocr_engine
+from app.statement_parser import find_table_header
+
+
+class _FakeReader:
+    def __init__(self, boxes):
+        # boxes: {(x_min, x_max, y_min, y_max): text} in page coordinates; chunks are not split in these tests.
+        self.boxes = boxes
+        self.recognized = []
+
+    def detect(self, chunk, **kwargs):
+        return [list(list(box) for box in self.boxes)], [[]]
+
+    def recognize(self, grey, horizontal_list=None, free_list=None, **kwargs):
+        out = []
+        for box in horizontal_list:
+            self.recognized.append(self.boxes[tuple(box)])
+            x1, x2, y1, y2 = box
+            out.append(([[x1, y1], [x2, y1], [x2, y2], [x1, y2]], self.boxes[tuple(box)], 0.9))
+        return out
+
+
+def _page():
+    img = np.full((1000, 800, 3), 255, dtype=np.uint8)
+    return img, [(0, img)]
+
+
+def _word(text, x1, y1, x2, y2):
+    return {"text": text, "x1": x1, "y1": y1, "x2": x2, "y2": y2}
+
+
+def test_find_table_header_reports_anchors_and_span():
+    words = [
+        _word("Date", 100, 300, 140, 312),
+        _word("Description", 180, 300, 260, 312),
+        _word("Debit", 400, 300, 440, 312),
+        _word("Credit", 480, 300, 530, 312),
+        _word("Balance", 600, 300, 660, 312),
+        _word("01/02/2024", 100, 330, 170, 342),
+    ]
+
+    header = find_table_header(words)
+
+    assert header is not None
+    assert header["y1"] == 300 and header["x1"] == 100 and header["x2"] == 660
+    assert header["table_x1"] == 120 and header["table_x2"] == 630
+    assert find_table_header(words[-1:]) is None
+
+
+def test_roi_ocr_skips_boxes_outside_table_below_header():
+    boxes = {
+        (100, 300, 40, 60): "ACME BANK",
+        (100, 140, 300, 312): "Date",
+        (180, 260, 300, 312): "Description",
+        (400, 440, 300, 312): "Debit",
+        (480, 530, 300, 312): "Credit",
+        (600, 660, 300, 312): "Balance",
+        (100, 170, 600, 612): "01/02/2024",
+        (600, 660, 600, 612): "1,000.00",
+        (720, 790, 600, 700): "PROMO",
+    }
+    reader = _FakeReader(boxes)
+    img, chunks = _page()
+
+    items = ocr_engine._ocr_easyocr_roi(reader, img, chunks)
+
+    texts = {item["text"] for item in items}
+    assert {"ACME BANK", "Balance", "01/02/2024", "1,000.00"} <= texts
+    assert "PROMO" not in reader.recognized
+
+
+def test_roi_ocr_recognizes_everything_without_header():
+    boxes = {
+        (100, 300, 40, 60): "ACME BANK",
+        (720, 790, 600, 700): "PROMO",
+    }
+    reader = _FakeReader(boxes)
+    img, chunks = _page()
+
+    items = ocr_engine._ocr_easyocr_roi(reader, img, chunks)
+
+    assert sorted(item["text"] for item in items) == ["ACME BANK", "PROMO"]
+
+
+class _StripReader(_FakeReader):
+    """Returns the next scripted detection per detect call and records each detected strip's width."""
+
+    def __init__(self, boxes, detections):
+        super().__init__(boxes)
+        self.detections = list(detections)
+        self.detected_widths = []
+
+    def detect(self, chunk, **kwargs):
+        self.detected_widths.append(chunk.shape[1])
+        return [self.detections.pop(0)], [[]]
+
+
+def test_roi_ocr_detects_only_the_table_span_below_the_band():
+    header = {
+        (100, 140, 300, 312): "Date",
+        (180, 260, 300, 312): "Description",
+        (400, 440, 300, 312): "Debit",
+        (480, 530, 300, 312): "Credit",
+        (600, 660, 300, 312): "Balance",
+    }
+    # The lower strip starts at y=500; its boxes are strip-relative.
+    lower = {(100, 170, 100, 112): "01/02/2024", (600, 660, 100, 112): "1,000.00"}
+    # Detection on the cropped strip reports boxes relative to the crop.
+    crop_x1 = int(100 - 800 * ocr_engine.OCR_ROI_X_PAD)
+    cropped = [[x1 - crop_x1, x2 - crop_x1, y1, y2] for (x1, x2, y1, y2) in lower]
+    reader = _StripReader({**header, **lower}, [[list(b) for b in header], cropped])
+    img = np.full((1000, 800, 3), 255, dtype=np.uint8)
+    chunks = [(0, img[:500]), (500, img[500:])]
+
+    items = ocr_engine._ocr_easyocr_roi(reader, img, chunks)
+
+    assert reader.detected_widths[0] == 800
+    assert reader.detected_widths[1] < 800
+    by_text = {item["text"]: item["bbox"] for item in items}
+    assert by_text["01/02/2024"][0] == [100.0, 600.0]
+    assert "1,000.00" in by_text
@@ -0,0 +1,73 @@
+import threading
+import time
+from multiprocessing.connection import Listener
+
+import numpy as np
+import pytest
+
+from app import ocr_engine, ocr_server
+
+
+def _start_server(socket_path, respond=True):
+    listener = Listener(str(socket_path), family="AF_UNIX", authkey=ocr_server.OCR_SERVER_AUTHKEY)
+    requests = []
+
+    def _serve():
+        conn = listener.accept()
+        requests.append(conn.recv())
+        if respond:
+            conn.send({"ok": True, "result": [{"id": 1, "text": "served", "confidence": 0.9, "bbox": []}]})
+        else:
+            time.sleep(1.0)
+        conn.close()
+        listener.close()
+
+    thread = threading.Thread(target=_serve, daemon=True)
+    thread.start()
+    return requests, thread
+
+
+@pytest.fixture
+def server_env(monkeypatch, tmp_path):
+    socket_path = tmp_path / "ocr.sock"
+    local_calls = []
+    monkeypatch.setattr(ocr_server, "OCR_SERVER_SOCKET", str(socket_path))
+    monkeypatch.setattr(ocr_engine, "ocr_server_enabled", lambda: True)
+    monkeypatch.setattr(ocr_engine, "OCR_CACHE_ENABLED", False)
+    monkeypatch.setattr(ocr_engine, "ocr_image_local", lambda img, **kwargs: local_calls.append(kwargs) or [])
+    return socket_path, local_calls
+
+
+def _page():
+    return np.full((20, 20, 3), 255, dtype=np.uint8)
+
+
+def test_ocr_image_round_trips_through_server(server_env):
+    socket_path, local_calls = server_env
+    requests, thread = _start_server(socket_path)
+
+    items = ocr_engine.ocr_image(_page(), backend="easyocr")
+    thread.join(timeout=5)
+
+    assert [item["text"] for item in items] == ["served"]
+    assert requests[0]["method"] == "ocr_image"
+    assert requests[0]["kwargs"]["backend"] == "easyocr"
+    assert local_calls == []
+
+
+def test_ocr_image_falls_back_in_process_when_server_is_down(server_env):
+    _socket_path, local_calls = server_env
+
+    assert ocr_engine.ocr_image(_page()) == []
+    assert len(local_calls) == 1
+
+
+def test_ocr_server_timeout_is_an_error_not_a_fallback(server_env, monkeypatch):
+    socket_path, local_calls = server_env
+    monkeypatch.setattr(ocr_server, "OCR_SERVER_TIMEOUT_SEC", 0.2)
+    _requests, thread = _start_server(socket_path, respond=False)
+
+    with pytest.raises(RuntimeError, match="ocr_server_timeout"):
+        ocr_engine.ocr_image(_page())
+    thread.join(timeout=5)
+    assert local_calls == []
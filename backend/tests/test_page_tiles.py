@@ -0,0 +1,125 @@
+import os
+import types
+import uuid
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+from app import main
+
+
+def _write_cleaned_page(tmp_path, job_id, width=1200, height=700, value=200):
+    cleaned_dir = Path(tmp_path, "jobs", str(job_id), "cleaned")
+    cleaned_dir.mkdir(parents=True, exist_ok=True)
+    path = cleaned_dir / "page_001.png"
+    cv2.imwrite(str(path), np.full((height, width), value, dtype=np.uint8))
+    return path
+
+
+def test_tile_endpoints_serve_cached_tiles_and_thumbnails(client_factory, app_with_temp_data, monkeypatch):
+    _app, tmp_path = app_with_temp_data
+    job_id = uuid.uuid4()
+    source = _write_cleaned_page(tmp_path, job_id)
+    monkeypatch.setattr(main, "_get_job_record_or_404", lambda _jid: types.SimpleNamespace(id=_jid, submission_id=None))
+
+    with client_factory(role="credit_evaluator") as client:
+        info = client.get(f"/jobs/{job_id}/tiles/page_001/info").json()
+        top = info["max_level"]
+        tile = client.get(f"/jobs/{job_id}/tiles/page_001/{top}/2/1")
+        missing = client.get(f"/jobs/{job_id}/tiles/page_001/{top}/3/0")
+        thumb = client.get(f"/jobs/{job_id}/thumbnails/001")
+
+        assert info["width"] == 1200 and info["height"] == 700
+        assert info["levels"][top]["cols"] == 3 and info["levels"][top]["rows"] == 2
+        assert info["levels"][0]["width"] == 1
+        assert tile.status_code == 200 and tile.headers["content-type"] == "image/webp"
+        decoded = cv2.imdecode(np.frombuffer(tile.content, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+        assert decoded.shape == (700 - 512, 1200 - 1024)
+        assert missing.status_code == 404
+        assert max(cv2.imdecode(np.frombuffer(thumb.content, dtype=np.uint8), cv2.IMREAD_GRAYSCALE).shape) == 320
+
+        # Editing the page invalidates its tiles.
+        old_version = info["version"]
+        cv2.imwrite(str(source), np.full((700, 1200), 10, dtype=np.uint8))
+        os.utime(source, ns=(1, 1))
+        fresh = client.get(f"/jobs/{job_id}/tiles/page_001/{top}/0/0")
+        assert int(cv2.imdecode(np.frombuffer(fresh.content, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)[0, 0]) < 30
+        assert not Path(tmp_path, "jobs", str(job_id), "tiles", "page_001", old_version).exists()
+
+
+def test_concurrent_tile_requests_cut_a_level_once(monkeypatch, tmp_path):
+    import threading
+    import time
+
+    from app import page_tiles
+
+    job_dir = tmp_path / "jobs" / "job-1"
+    source = _write_cleaned_page(tmp_path, "job-1")
+    stale = job_dir / "tiles" / "page_001" / "old-version"
+    stale.mkdir(parents=True)
+    writes = []
+    real_write = page_tiles._write_encoded
+
+    def _slow_write(path, img):
+        writes.append(path)
+        time.sleep(0.01)
+        real_write(path, img)
+
+    monkeypatch.setattr(page_tiles, "_write_encoded", _slow_write)
+    top = page_tiles.max_level(1200, 700)
+    results = []
+
+    def _request():
+        results.append(page_tiles.get_tile_path(str(source), str(job_dir), "page_001", top, 1, 1))
+
+    threads = [threading.Thread(target=_request) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(results)) == 1 and os.path.exists(results[0])
+    # One cut of the 3x2 top level, shared by every request.
+    assert len(writes) == 6
+    assert not stale.exists()
+    assert os.listdir(job_dir / "tiles" / "page_001") == [page_tiles.source_version(str(source))]
+
+
+def test_thumbnail_without_page_image_renders_small(client_factory, app_with_temp_data, monkeypatch):
+    from app import page_tiles
+
+    _app, tmp_path = app_with_temp_data
+    job_id = uuid.uuid4()
+    job_dir = Path(tmp_path, "jobs", str(job_id))
+    (job_dir / "input").mkdir(parents=True)
+    (job_dir / "input" / "document.pdf").write_bytes(b"%PDF-1.4")
+    renders = []
+
+    class _Renderer:
+        def __init__(self, _path):
+            pass
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *_exc):
+            return False
+
+        def render_page(self, page_num, dpi, max_pixels=None):
+            renders.append((page_num, dpi))
+            return np.full((440, 340, 3), 120, dtype=np.uint8)
+
+    monkeypatch.setattr(page_tiles, "open_pdf_renderer", _Renderer)
+    monkeypatch.setattr(main, "_generate_preview_page_if_missing", lambda *_args, **_kw: pytest.fail("full preview rendered"))
+    monkeypatch.setattr(main, "_get_job_record_or_404", lambda _jid: types.SimpleNamespace(id=_jid, submission_id=None))
+
+    with client_factory(role="credit_evaluator") as client:
+        first = client.get(f"/jobs/{job_id}/thumbnails/page_002")
+        second = client.get(f"/jobs/{job_id}/thumbnails/page_002")
+
+    assert first.status_code == 200 and second.content == first.content
+    assert renders == [(2, page_tiles.THUMBNAIL_RENDER_DPI)]
+    assert cv2.imdecode(np.frombuffer(first.content, dtype=np.uint8), cv2.IMREAD_COLOR).shape[:2] == (320, 247)
+    assert not (job_dir / "preview").exists()
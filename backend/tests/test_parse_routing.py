@@ -0,0 +1,76 @@
+import json
+
+from app import celery_app, main
+from app.bank_profiles import detect_bank_profile
+from app.statement_parser import ocr_rows_preferred, route_page_source
+
+
+def _row(n):
+    return {"row_id": f"{n:03}", "date": "01/02/2024", "description": "Deposit", "credit": "10.00", "balance": "100.00"}
+
+
+def test_route_page_source_prefers_text_layer_that_passes_quality():
+    assert route_page_source(120, [_row(n) for n in range(1, 6)], {}) == ("text", None)
+
+
+def test_route_page_source_sends_image_only_and_weak_pages_to_ocr():
+    assert route_page_source(0, [], {}) == ("ocr", "no_text_layer")
+
+    undated = [dict(_row(n), date=None) for n in range(1, 6)]
+    assert route_page_source(40, undated, {}) == ("ocr", "text_quality:low_date_ratio")
+
+
+def test_route_page_source_keeps_short_text_pages_on_text():
+    assert route_page_source(40, [_row(1)], {}) == ("text", None)
+    assert route_page_source(40, [], {}) == ("text", None)
+
+    route, reason = route_page_source(40, [dict(_row(1), balance=None)], {})
+    assert route == "ocr"
+    assert reason == "text_quality:low_balance_ratio"
+
+
+def test_ocr_rows_preferred_compares_transaction_rows():
+    profile = detect_bank_profile("")
+    assert ocr_rows_preferred([_row(1)], profile, [_row(1)], profile)
+    assert ocr_rows_preferred([], profile, [_row(1)], profile)
+    assert not ocr_rows_preferred([_row(1), _row(2)], profile, [_row(1)], profile)
+
+
+def test_parse_mode_accepts_auto():
+    for normalize in (main._normalize_parse_mode, celery_app._normalize_parse_mode):
+        assert normalize("AUTO") == "auto"
+        assert normalize("ocr") == "ocr"
+        assert normalize("bogus") == "text"
+
+
+def test_auto_job_counts_text_and_ocr_routes(monkeypatch, tmp_path):
+    job_dir = tmp_path / "jobs" / "job-1"
+    (job_dir / "input").mkdir(parents=True)
+    (job_dir / "input" / "document.pdf").write_bytes(b"%PDF-1.4")
+    layouts = [{"width": 100.0, "height": 100.0, "words": [], "text": ""} for _ in range(3)]
+    monkeypatch.setattr(celery_app, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(celery_app, "PREVIEW_PREFETCH_ENABLED", False)
+    monkeypatch.setattr(celery_app, "upsert_job_status", lambda *_args: None)
+    monkeypatch.setattr(celery_app, "get_submission_id_for_job", lambda _jid: None)
+    monkeypatch.setattr(celery_app, "sync_job_results", lambda *_args: None)
+    monkeypatch.setattr(celery_app, "_pdf_page_count", lambda _pdf: 3)
+    monkeypatch.setattr(celery_app, "iter_pdf_layout_pages_sharded", lambda *_args: iter(layouts))
+    routed = iter([("text", None), ("ocr", "no_text_layer"), ("text", None)])
+    monkeypatch.setattr(celery_app, "route_page_source", lambda *_args: next(routed))
+    monkeypatch.setattr(
+        celery_app,
+        "_ocr_parse_page",
+        lambda task: {
+            "page_w": 10,
+            "page_h": 10,
+            "ocr_page": celery_app.OcrPage.empty(),
+            "profile": celery_app.detect_bank_profile(""),
+            "parsed": ([], [], {}),
+        },
+    )
+
+    celery_app.process_pdf("job-1", "auto")
+
+    diagnostics = json.loads((job_dir / "result" / "parse_diagnostics.json").read_text())
+    assert diagnostics["job"]["routes"] == {"text": 2, "ocr": 1}
+    assert [diagnostics["pages"][f"page_00{n}"]["route"] for n in (1, 2, 3)] == ["text", "ocr", "text"]
@@ -0,0 +1,79 @@
+import json
+
+import pytest
+
+from app import pdf_preflight
+
+
+def _write_pdf(path, page_texts):
+    """Minimal PDF with one Helvetica text line per page (None for an empty page)."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in page_texts:
+        content = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET" if text else ""
+        objects.append(f"<< /Length {len(content)} >>\nstream\n{content}\nendstream")
+        content_ref = len(objects)
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_ref} 0 R >>"
+        )
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for num, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{num} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{offset:010} 00000 n \n" for offset in offsets).encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    path.write_bytes(out)
+
+
+def test_preflight_reports_text_layer_per_page(tmp_path):
+    pytest.importorskip("pypdfium2")
+    pdf_path = tmp_path / "document.pdf"
+    _write_pdf(pdf_path, ["01/02/2024 Salary deposit 1,000.00 5,000.00", None])
+
+    result = pdf_preflight.preflight_pdf(str(pdf_path))
+
+    assert result["page_count"] == 2
+    assert result["encrypted"] is False
+    assert [page["has_text"] for page in result["pages"]] == [True, False]
+    assert result["pages"][0]["words"] == 5
+    assert result["pages"][0]["width_pt"] == 612.0
+    assert result["estimate"]["suggested_mode"] == "auto"
+    assert result["estimate"]["text_pages"] == 1 and result["estimate"]["image_pages"] == 1
+    assert result["estimate"]["sampled_pages"] == 2
+
+
+def test_preflight_samples_text_on_a_bounded_number_of_pages(tmp_path, monkeypatch):
+    pytest.importorskip("pypdfium2")
+    monkeypatch.setattr(pdf_preflight, "PREFLIGHT_TEXT_SAMPLE_PAGES", 3)
+    pdf_path = tmp_path / "document.pdf"
+    _write_pdf(pdf_path, ["01/02/2024 Salary deposit 1,000.00 5,000.00"] * 4 + [None] * 5)
+
+    result = pdf_preflight.preflight_pdf(str(pdf_path))
+
+    assert result["page_count"] == 9
+    assert [page["page"] for page in result["pages"] if page["words"] is not None] == [1, 5, 9]
+    assert all(page["width_pt"] == 612.0 for page in result["pages"])
+    assert result["estimate"]["sampled_pages"] == 3
+    assert (result["estimate"]["text_pages"], result["estimate"]["image_pages"]) == (3, 6)
+    assert result["estimate"]["suggested_mode"] == "auto"
+
+
+def test_preflight_is_stored_and_summarized(tmp_path):
+    preflight = {"page_count": 1, "encrypted": False, "pages": [{"page": 1, "words": 9}], "estimate": {"suggested_mode": "text"}}
+
+    pdf_preflight.write_preflight(str(tmp_path), preflight)
+
+    assert json.loads((tmp_path / "preflight.json").read_text()) == preflight
+    assert pdf_preflight.read_preflight(str(tmp_path)) == preflight
+    assert pdf_preflight.preflight_summary(preflight) == {
+        "page_count": 1,
+        "encrypted": False,
+        "estimate": {"suggested_mode": "text"},
+    }
@@ -0,0 +1,188 @@
+import os
+
+import cv2
+import numpy as np
+import pytest
+from PIL import Image
+
+from app import celery_app, page_pyramid, pdf_renderer
+
+
+def _fake_pdftoppm(calls):
+    def _convert(pdf, dpi, fmt, first_page, last_page, output_folder, output_file, paths_only):
+        calls.append((first_page, last_page))
+        paths = []
+        for page in range(first_page, last_page + 1):
+            path = os.path.join(output_folder, f"{output_file}-{page:02}.png")
+            cv2.imwrite(path, np.full((40, 30, 3), page, dtype=np.uint8))
+            paths.append(path)
+        return paths
+
+    return _convert
+
+
+def test_render_pdf_pages_renders_shards_in_page_order(monkeypatch, tmp_path):
+    calls = []
+    monkeypatch.setattr(pdf_renderer, "PDF_RENDERER", "poppler")
+    monkeypatch.setattr(pdf_renderer, "pdfinfo_from_path", lambda path: {"Pages": 11})
+    monkeypatch.setattr(celery_app, "PAGE_PYRAMID_ENABLED", False)
+    monkeypatch.setattr(celery_app, "convert_from_path", _fake_pdftoppm(calls))
+    monkeypatch.setattr(celery_app, "PDF_RENDER_PAGES_PER_SHARD", 4)
+    monkeypatch.setattr(celery_app, "PDF_RENDER_WORKERS", 3)
+    pages_dir = tmp_path / "pages"
+    pages_dir.mkdir()
+    progress = []
+    sunk = []
+
+    total = celery_app._render_pdf_pages(
+        input_pdf="document.pdf",
+        pages_dir=str(pages_dir),
+        step_name="pdf_to_images",
+        progress_start=0,
+        progress_end=100,
+        report_fn=lambda status, step, value, **kwargs: progress.append(value),
+        dpi=100,
+        page_sink=lambda page_num, img: sunk.append((page_num, int(img[0, 0, 0]))),
+    )
+
+    assert total == 11
+    assert sorted(calls) == [(1, 4), (5, 8), (9, 11)]
+    assert sunk == [(i, i) for i in range(1, 12)]
+    assert progress == sorted(progress) and len(progress) == 11 and progress[-1] == 100
+    assert sorted(os.listdir(pages_dir)) == [f"page_{i:03}.png" for i in range(1, 12)]
+    assert sorted(os.listdir(tmp_path)) == ["pages"]
+
+
+def test_multi_shard_renders_use_pdftoppm_even_when_pdfium_is_available(monkeypatch, tmp_path):
+    calls = []
+    monkeypatch.setattr(pdf_renderer, "PDF_RENDERER", "auto")
+    monkeypatch.setattr(pdf_renderer, "pdfium", object())
+    monkeypatch.setattr(pdf_renderer, "PdfiumRenderer", lambda _path: pytest.fail("full render went through pdfium"))
+    monkeypatch.setattr(celery_app, "PAGE_PYRAMID_ENABLED", False)
+    monkeypatch.setattr(celery_app, "convert_from_path", _fake_pdftoppm(calls))
+    monkeypatch.setattr(celery_app, "PDF_RENDER_PAGES_PER_SHARD", 2)
+    monkeypatch.setattr(celery_app, "PDF_RENDER_WORKERS", 2)
+
+    pages = list(celery_app._iter_page_bases("document.pdf", str(tmp_path), 5, 100))
+
+    assert sorted(calls) == [(1, 2), (3, 4), (5, 5)]
+    assert [(page_num, int(img[0, 0, 0])) for page_num, img, *_rest in pages] == [(i, i) for i in range(1, 6)]
+
+
+def test_pdfium_renderer_renders_pages_in_process(monkeypatch, tmp_path):
+    pytest.importorskip("pypdfium2")
+    pdf_path = tmp_path / "document.pdf"
+    pages = [Image.new("RGB", (360, 480), (255, 255, 255)) for _ in range(2)]
+    pages[1].paste((255, 0, 0), (0, 0, 36, 48))
+    pages[0].save(pdf_path, save_all=True, append_images=pages[1:], resolution=72)
+    monkeypatch.setattr(celery_app, "PREVIEW_MAX_PIXELS", 10_000_000)
+    monkeypatch.setattr(celery_app, "PAGE_PYRAMID_ENABLED", False)
+    sunk = {}
+
+    total = celery_app._render_pdf_pages(
+        input_pdf=str(pdf_path),
+        pages_dir=str(tmp_path),
+        step_name="pdf_to_images",
+        progress_start=0,
+        progress_end=100,
+        report_fn=lambda *args, **kwargs: None,
+        dpi=144,
+        page_sink=lambda page_num, img: sunk.__setitem__(page_num, img),
+    )
+
+    assert total == 2
+    assert sunk[1].shape == (960, 720, 3)
+    b, g, r = sunk[2][5, 5].tolist()
+    assert r > 240 and b < 16 and g < 16
+    assert cv2.imread(str(tmp_path / "page_002.png")).shape == (960, 720, 3)
+
+    with pdf_renderer.open_pdf_renderer(str(pdf_path), backend="pdfium") as renderer:
+        small = renderer.render_page(1, 144, grayscale=True, max_pixels=100_000)
+    assert small.ndim == 2 and small.shape[0] * small.shape[1] <= 100_000
+
+
+def test_page_pyramid_rasterizes_each_page_once(monkeypatch, tmp_path):
+    calls = []
+    monkeypatch.setattr(pdf_renderer, "PDF_RENDERER", "poppler")
+    monkeypatch.setattr(pdf_renderer, "pdfinfo_from_path", lambda path: {"Pages": 3})
+    monkeypatch.setattr(celery_app, "convert_from_path", _fake_pdftoppm(calls))
+    monkeypatch.setattr(celery_app, "PAGE_PYRAMID_ENABLED", True)
+    monkeypatch.setattr(celery_app, "PAGE_PYRAMID_DPI", 200)
+    monkeypatch.setattr(page_pyramid, "PAGE_PYRAMID_ENABLED", True)
+    job_dir = tmp_path / "job"
+    pages_dir = job_dir / "pages"
+    pages_dir.mkdir(parents=True)
+
+    def _render(dpi):
+        sizes = []
+        celery_app._render_pdf_pages(
+            input_pdf="document.pdf",
+            pages_dir=str(pages_dir),
+            step_name="draft_pdf_to_images",
+            progress_start=0,
+            progress_end=100,
+            report_fn=lambda *args, **kwargs: None,
+            dpi=dpi,
+            page_sink=lambda page_num, img: sizes.append(img.shape[:2]),
+        )
+        return sizes
+
+    assert _render(100) == [(20, 15)] * 3
+    assert _render(200) == [(40, 30)] * 3
+    assert len(calls) == 1
+
+    tool_level = page_pyramid.page_level(str(job_dir), "document.pdf", 2, 150)
+    assert tool_level.shape[:2] == (30, 22) or tool_level.shape[:2] == (30, 23)
+    assert int(tool_level[0, 0, 0]) == 2
+    assert len(calls) == 1
+
+
+def test_concurrent_preview_requests_render_page_once(monkeypatch, tmp_path):
+    import threading
+    import time
+
+    renders = []
+
+    def _slow_level(job_dir, input_pdf, page_num, dpi, max_pixels=None):
+        renders.append(page_num)
+        time.sleep(0.05)
+        return np.full((20, 10, 3), page_num, dtype=np.uint8)
+
+    monkeypatch.setattr(page_pyramid, "page_level", _slow_level)
+    output = tmp_path / "preview" / "page_002.png"
+    results = []
+
+    def _request():
+        results.append(page_pyramid.ensure_page_image(str(tmp_path), "document.pdf", 2, str(output), 130))
+
+    threads = [threading.Thread(target=_request) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [True] * 4
+    assert renders == [2]
+    assert int(cv2.imread(str(output))[0, 0, 0]) == 2
+    # Lock files stay out of the page directories.
+    assert os.listdir(output.parent) == ["page_002.png"]
+    assert os.listdir(tmp_path / ".locks") == ["preview__page_002.png.lock"]
+
+
+def test_prefetch_previews_skips_pages_already_available(monkeypatch, tmp_path):
+    job_dir = tmp_path / "jobs" / "job-1"
+    (job_dir / "input").mkdir(parents=True)
+    (job_dir / "input" / "document.pdf").write_bytes(b"%PDF-1.4")
+    (job_dir / "cleaned").mkdir()
+    cv2.imwrite(str(job_dir / "cleaned" / "page_001.png"), np.zeros((4, 4), dtype=np.uint8))
+    rendered = []
+    monkeypatch.setattr(celery_app, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(celery_app, "_pdf_page_count", lambda _pdf: 3)
+    monkeypatch.setattr(
+        celery_app,
+        "ensure_page_image",
+        lambda job_dir, pdf, page_num, path, dpi, max_pixels: rendered.append((page_num, os.path.basename(path))) or True,
+    )
+
+    assert celery_app.prefetch_previews("job-1") == {"pages": 2}
+    assert rendered == [(2, "page_002.png"), (3, "page_003.png")]
@@ -0,0 +1,140 @@
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from app import celery_app
+from app.pdf_text_extract import extract_pdf_layout_pages, iter_pdf_layout_pages, iter_pdf_layout_pages_sharded
+
+
+_PAGE = (
+    '<page width="600" height="800"><flow><block><line>'
+    '<word xMin="10" yMin="20" xMax="50" yMax="30">{text}</word>'
+    '<word xMin="60" yMin="20" xMax="90" yMax="30">Deposit</word>'
+    "</line></block></flow></page>"
+)
+
+
+def _install_fake_pdftotext(monkeypatch, tmp_path, body: str):
+    script = tmp_path / "bin" / "pdftotext"
+    script.parent.mkdir()
+    script.write_text(f"#!{sys.executable}\nimport sys, time\n{body}\n")
+    script.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{script.parent}{os.pathsep}{os.environ.get('PATH', '')}")
+
+
+def test_layout_pages_stream_before_extraction_finishes(monkeypatch, tmp_path):
+    _install_fake_pdftotext(
+        monkeypatch,
+        tmp_path,
+        "out = sys.stdout\n"
+        "out.write('<html xmlns=\"http://www.w3.org/1999/xhtml\"><body><doc>')\n"
+        f"out.write({_PAGE.format(text='01/02')!r})\n"
+        "out.flush()\n"
+        "time.sleep(30)\n"
+        "out.write('</doc></body></html>')\n",
+    )
+
+    started = time.monotonic()
+    pages = iter_pdf_layout_pages("document.pdf")
+    first = next(pages)
+    pages.close()
+
+    assert time.monotonic() - started < 10
+    assert first["width"] == 600.0 and first["height"] == 800.0
+    assert first["text"] == "01/02 Deposit"
+    assert first["words"][0] == {"text": "01/02", "x1": 10.0, "y1": 20.0, "x2": 50.0, "y2": 30.0}
+
+
+def test_extract_layout_pages_reads_every_page_and_reports_failures(monkeypatch, tmp_path):
+    _install_fake_pdftotext(
+        monkeypatch,
+        tmp_path,
+        "out = sys.stdout\n"
+        "out.write('<html xmlns=\"http://www.w3.org/1999/xhtml\"><body><doc>')\n"
+        f"out.write({_PAGE.format(text='01/02')!r})\n"
+        f"out.write({_PAGE.format(text='01/03')!r})\n"
+        "out.write('</doc></body></html>')\n"
+        "sys.exit(1 if sys.argv[-2] == 'broken.pdf' else 0)\n",
+    )
+
+    pages = extract_pdf_layout_pages("document.pdf")
+    assert [page["text"] for page in pages] == ["01/02 Deposit", "01/03 Deposit"]
+
+    with pytest.raises(subprocess.CalledProcessError):
+        extract_pdf_layout_pages("broken.pdf")
+
+
+def test_sharded_extraction_merges_page_ranges_in_order(monkeypatch, tmp_path):
+    log_path = tmp_path / "calls.log"
+    _install_fake_pdftotext(
+        monkeypatch,
+        tmp_path,
+        "args = sys.argv[1:]\n"
+        "first = int(args[args.index('-f') + 1]) if '-f' in args else 1\n"
+        "last = int(args[args.index('-l') + 1]) if '-l' in args else 10\n"
+        f"open({str(log_path)!r}, 'a').write(f'{{first}}-{{last}}\\n')\n"
+        "time.sleep(0.05 * (10 - first) / 10)\n"
+        "sys.stdout.write('<html><body><doc>')\n"
+        f"page = {_PAGE!r}\n"
+        "for n in range(first, last + 1):\n"
+        "    sys.stdout.write(page.format(text=f'p{n}'))\n"
+        "sys.stdout.write('</doc></body></html>')\n",
+    )
+
+    pages = list(iter_pdf_layout_pages_sharded("document.pdf", 10, workers=3, pages_per_shard=4))
+
+    assert [page["text"] for page in pages] == [f"p{n} Deposit" for n in range(1, 11)]
+    assert sorted(log_path.read_text().split()) == ["1-4", "5-8", "9-10"]
+
+
+def test_layout_stream_keeps_pages_until_released():
+    pulled = []
+
+    def _pages():
+        for page_num in range(1, 4):
+            pulled.append(page_num)
+            yield {"text": f"page {page_num}"}
+        raise RuntimeError("pdftotext_failed")
+
+    stream = celery_app._LayoutStream(_pages())
+    assert [layout["text"] for layout in stream.head(2)] == ["page 1", "page 2"]
+    assert pulled == [1, 2]
+
+    stream.release(1)
+    assert stream.get(1) is None
+    assert stream.get(3) == {"text": "page 3"}
+    assert stream.get(4) is None
+    assert stream.error == "pdftotext_failed"
+    assert stream.count() == 3
+
+
+def test_layout_store_extracts_missing_page_once(monkeypatch, tmp_path):
+    from app import layout_store
+
+    calls = []
+
+    def _extract(pdf_path, page_num):
+        calls.append(page_num)
+        return {
+            "width": 600.0,
+            "height": 800.0,
+            "words": [{"text": "01/02", "x1": 10.0, "y1": 20.0, "x2": 50.0, "y2": 30.0}],
+            "text": "01/02",
+        }
+
+    monkeypatch.setattr(layout_store, "extract_pdf_layout_page", _extract)
+    input_pdf = tmp_path / "input" / "document.pdf"
+    input_pdf.parent.mkdir()
+    input_pdf.write_bytes(b"%PDF-1.4")
+
+    first = layout_store.load_layout_page(str(tmp_path), str(input_pdf), 37)
+    second = layout_store.load_layout_page(str(tmp_path), str(input_pdf), 37)
+
+    assert calls == [37]
+    assert first == second
+    assert second["text"] == "01/02"
+    assert second["words"] == [{"text": "01/02", "x1": 10.0, "y1": 20.0, "x2": 50.0, "y2": 30.0}]
+    assert os.path.exists(layout_store.layout_page_path(str(tmp_path), 37))